@@ -0,0 +1,57 @@
+"""
+Compares applying a sound law to a large lexicon word by word with applying
+it to the whole lexicon at once with a BatchEngine.
+
+    python -m benchmarks.bench_batch [NUMBER_OF_WORDS] [NUMBER_OF_RULES]
+
+The law is the one of bench_compile, by default of 60 rules; the lexicon has
+100000 words by default. The word-by-word time is measured on the first
+SAMPLE words and scaled up. Exits with status 1 if the engine is less than
+TARGET_SPEEDUP times as fast, or if its results differ on the sample.
+"""
+
+import sys
+import time
+
+from benchmarks.bench_compile import make_program
+from benchmarks.bench_memory import make_lexicon
+from pylaut.change.batch import BatchEngine
+from pylaut.language.phonology.compactword import CompactWord, WordTable
+from pylaut.language.phonology.word import WordFactory
+from pylaut.pylautlang import parser
+
+SAMPLE = 500
+TARGET_SPEEDUP = 100
+
+
+def main(argv):
+    n_words = int(argv[0]) if argv else 100000
+    n_rules = int(argv[1]) if len(argv) > 1 else 60
+    law = parser.compile(make_program(n_rules))[0]
+    wf = WordFactory()
+    words = list(wf.make_words(make_lexicon(n_words)))
+    table = WordTable.from_words(words)
+
+    sample = words[:SAMPLE]
+    start = time.perf_counter()
+    expected = [law.apply(w) for w in sample]
+    per_word = (time.perf_counter() - start) / len(sample) * n_words
+
+    start = time.perf_counter()
+    engine = BatchEngine(table).run([law])
+    batch = time.perf_counter() - start
+    results = list(engine.compact_words())
+
+    print("{} words, {} rules: word by word {:.1f} s (estimated), batch "
+          "{:.2f} s, {:.0f} times as fast".format(n_words, n_rules, per_word,
+                                                  batch, per_word / batch))
+    if any(CompactWord.from_word(e) != r
+           for e, r in zip(expected, results)):
+        print("the results differ")
+        sys.exit(1)
+    if per_word / batch < TARGET_SPEEDUP:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
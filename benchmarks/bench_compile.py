@@ -0,0 +1,69 @@
+"""
+Measures how long it takes to compile a long sound change file, and to
+apply a sound law made of conditional changes, i.e. of ChangeGroups, to a
+word.
+
+    python -m benchmarks.bench_compile [NUMBER_OF_RULES]
+
+The generated file has NUMBER_OF_RULES rules (300 by default), cycling
+through simple, conditional and feature changes. Building a change used to
+deep-copy it, and applying a ChangeGroup deep-copied all of its changes for
+every word.
+"""
+
+import sys
+import time
+import timeit
+
+from benchmarks.bench_memory import make_lexicon
+from pylaut.language.phonology.word import WordFactory
+from pylaut.pylautlang import parser
+
+RULES = [
+    "/p/ -> /b/ | [-consonantal]_[-consonantal]",
+    "/t/ => /d/ | [-consonantal]_[-consonantal]\n"
+    "    => /s/ | _/i/\n"
+    "    => /t/",
+    "{/k/, /ɡ/} => {/tʃ/, /dʒ/} | _[-back -consonantal]\n"
+    "           => {/k/, /ɡ/}",
+    "[+sibilant] => [+voice] | [-consonantal]_[-consonantal]\n"
+    "            => [+sibilant]",
+    "[+sibilant -voice] -> [+voice] | _[+voice]",
+    "/a/ -> /e/ | _[+front]",
+]
+
+
+def make_program(n_rules):
+    """
+    Returns a sound change file of one sound law with n_rules rules.
+    """
+    rules = [RULES[i % len(RULES)] for i in range(n_rules)]
+    return "CHANGE BEGIN\n" + "\n\n".join(rules) + "\nEND\n"
+
+
+def main(argv):
+    n_rules = int(argv[0]) if argv else 300
+    program = make_program(n_rules)
+
+    # parsing is up to lark; building the changes from the parse tree is
+    # what the change classes cost
+    pll = parser.PyLautLang(parser.get_library())
+    start = time.perf_counter()
+    tree = pll.parser.parse(program)
+    parsed = time.perf_counter()
+    law = pll.transform(tree)[0]
+    built = time.perf_counter()
+    print("{} rules: parsed in {:.0f} ms, changes built in {:.1f} ms".format(
+        n_rules, (parsed - start) * 1e3, (built - parsed) * 1e3))
+
+    wf = WordFactory()
+    words = list(wf.make_words(make_lexicon(50)))
+    best = min(
+        timeit.repeat(lambda: [law.apply(w) for w in words], number=1,
+                      repeat=3))
+    print("applied them in {:.2f} ms per word".format(best / len(words) *
+                                                       1e3))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
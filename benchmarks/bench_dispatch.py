@@ -0,0 +1,64 @@
+"""
+Measures how fast a compiled sound law of many rules, each about one of a
+large inventory of phones, applies to a lexicon that has only a few of
+them, when the rules to try are looked up per word in a RuleIndex.
+
+    python -m benchmarks.bench_dispatch [NUMBER_OF_RULES] [NUMBER_OF_WORDS]
+
+The law has NUMBER_OF_RULES rules (400 by default), cycling through
+SYMBOLS; the lexicon has 2000 words by default. Also prints the number of
+rules tried per word, against the number of rules. Exits with status 1 if
+the results differ from those of the law itself on a sample of the words.
+"""
+
+import sys
+import time
+
+from benchmarks.bench_memory import make_lexicon
+from pylaut.change.fst import compile_change
+from pylaut.language.phonology.word import WordFactory
+from pylaut.pylautlang import parser
+
+SYMBOLS = ["p", "t", "k", "q", "ʔ", "ɸ", "β", "f", "v", "θ", "ð",
+           "s", "z", "ʃ", "ʒ", "ʂ", "ʐ", "ç", "x", "ɣ", "χ", "ʁ", "ħ", "ʕ",
+           "h", "ɦ", "m", "n", "ɳ", "ɲ", "ŋ", "ɴ", "r", "ɾ", "ɬ", "ʋ", "ɹ",
+           "j", "l", "ʎ"]
+
+SAMPLE = 200
+
+
+def make_program(n_rules):
+    """
+    Returns a sound change file of one sound law with n_rules rules, each
+    lengthening one phone of SYMBOLS before a vowel. A rule bleeds the later
+    ones about the same phone.
+    """
+    rules = []
+    for i in range(n_rules):
+        symbol = SYMBOLS[i % len(SYMBOLS)]
+        rules.append("/{0}/ -> /{0}ː/ | _[-consonantal]".format(symbol))
+    return "CHANGE BEGIN\n" + "\n".join(rules) + "\nEND\n"
+
+
+def main(argv):
+    n_rules = int(argv[0]) if argv else 400
+    n_words = int(argv[1]) if len(argv) > 1 else 2000
+    law = parser.compile(make_program(n_rules))[0]
+    compiled = compile_change(law)
+    wf = WordFactory()
+    words = list(wf.make_words(make_lexicon(n_words)))
+
+    start = time.perf_counter()
+    results = [compiled.apply(w) for w in words]
+    elapsed = time.perf_counter() - start
+    tried = sum(s.applied for s in compiled.skip_stats())
+    print("{} words, {} rules: {:.3f} ms per word, {:.1f} rules tried per "
+          "word".format(n_words, n_rules, elapsed / n_words * 1e3,
+                        tried / n_words))
+    if any(law.apply(w) != r for w, r in zip(words[:SAMPLE], results)):
+        print("the results differ")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,62 @@
+"""
+Compares applying a sound law of unconditional rules to a lexicon with
+applying it after its rules have been fused (see pylaut.change.fusion).
+
+    python -m benchmarks.bench_fusion [NUMBER_OF_WORDS]
+
+The law has the rules of RULES, in order; the lexicon has 5000 words by
+default. Exits with status 1 if the fused law is less than TARGET_SPEEDUP
+times as fast, or if its results differ.
+"""
+
+import sys
+import time
+
+from benchmarks.bench_memory import make_lexicon
+from pylaut.change.fusion import fuse_sound_law
+from pylaut.language.phonology.word import WordFactory
+from pylaut.pylautlang import parser
+
+RULES = [
+    "/ʃ/ -> /sn/",
+    "/z/ -> /s/",
+    "/θ/ -> /z/",
+    "/e/ -> /i/",
+    "[+sibilant] -> [+voice]",
+    "/p/ -> /f/",
+    "/k/ -> /x/",
+    "/i/ -> /e/",
+    "/t/ -> /d/",
+    "[+nasal] -> /n/",
+]
+
+TARGET_SPEEDUP = 4
+
+
+def main(argv):
+    n_words = int(argv[0]) if argv else 5000
+    law = parser.compile("CHANGE BEGIN\n{}\nEND".format("\n".join(RULES)))[0]
+    fused = fuse_sound_law(law, debug=True)
+    wf = WordFactory()
+    words = list(wf.make_words(make_lexicon(n_words)))
+
+    start = time.perf_counter()
+    expected = [law.apply(w) for w in words]
+    separate = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [fused.apply(w) for w in words]
+    together = time.perf_counter() - start
+
+    print("{} words, {} rules: one by one {:.2f} s, fused {:.2f} s, {:.1f} "
+          "times as fast".format(n_words, len(RULES), separate, together,
+                                 separate / together))
+    if any(e != r for e, r in zip(expected, results)):
+        print("the results differ")
+        sys.exit(1)
+    if separate / together < TARGET_SPEEDUP:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,82 @@
+"""
+Measures the memory used per Word by a lexicon built with WordFactory.
+
+    python -m benchmarks.bench_memory [NUMBER_OF_WORDS]
+
+Exits with status 1 if a word takes more than TARGET_BYTES_PER_WORD.
+Words of the generated lexicon have about eight phonemes; with dict-backed
+phonemes, syllables and words they took about 3000 bytes each.
+"""
+
+import random
+import sys
+import tracemalloc
+
+from pylaut.language.phonology.compactword import WordTable
+from pylaut.language.phonology.word import WordFactory
+
+# the most memory a word of the generated lexicon may take, in bytes
+TARGET_BYTES_PER_WORD = 2048
+
+ONSETS = ["p", "t", "k", "b", "d", "m", "n", "s", "l", "r", "j", "w", ""]
+NUCLEI = ["a", "e", "i", "o", "u", "aː", "iː"]
+CODAS = ["", "", "n", "s", "r", "l"]
+
+
+def make_lexicon(n_words, seed=0):
+    """
+    Returns n_words random, stressed words of two to four syllables.
+    """
+    rng = random.Random(seed)
+    words = []
+    for _ in range(n_words):
+        n_syllables = rng.randint(2, 4)
+        syllables = [
+            rng.choice(ONSETS) + rng.choice(NUCLEI) + rng.choice(CODAS)
+            for _ in range(n_syllables)
+        ]
+        stress = rng.randrange(n_syllables)
+        syllables[stress] = "'" + syllables[stress]
+        words.append(".".join(syllables))
+    return words
+
+
+def measure(n_words):
+    raw_words = make_lexicon(n_words)
+    wf = WordFactory()
+    # load the feature model etc. before measuring
+    wf.make_word(raw_words[0])
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    lexicon = [wf.make_word(w) for w in raw_words]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    n_phonemes = sum(len(w) for w in lexicon)
+
+    # the same lexicon as a WordTable
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    table = WordTable.from_words(lexicon)
+    after_table = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(table) == n_words
+
+    return ((after - before) / n_words, n_phonemes / n_words,
+            (after_table - before) / n_words)
+
+
+def main(argv):
+    n_words = int(argv[0]) if argv else 10000
+    per_word, phonemes_per_word, per_table_word = measure(n_words)
+    print("{} words, {:.1f} phonemes per word: {:.0f} bytes per word "
+          "(target {})".format(n_words, phonemes_per_word, per_word,
+                               TARGET_BYTES_PER_WORD))
+    print("as a WordTable: {:.0f} bytes per word".format(per_table_word))
+    if per_word > TARGET_BYTES_PER_WORD:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
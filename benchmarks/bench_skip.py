@@ -0,0 +1,61 @@
+"""
+Measures how much of a lexicon a compiled sound law skips, rule by rule,
+because a word has none of the phones a rule's domain can match, and how
+fast it applies the law.
+
+    python -m benchmarks.bench_skip [NUMBER_OF_WORDS]
+
+The law has the rules of RULES, most of which are about phones that are
+rare or missing in the generated lexicon (of 2000 words by default), as in
+a sound change file written for a language with a larger inventory.
+"""
+
+import sys
+import time
+
+from benchmarks.bench_memory import make_lexicon
+from pylaut.change.fst import compile_change
+from pylaut.language.phonology.word import WordFactory
+from pylaut.pylautlang import parser
+
+RULES = [
+    "/θ/ -> /s/",
+    "/x/ -> /h/ | _[-consonantal]",
+    "Epenthesis([+sibilant -voice], /ə/)",
+    "/ʃ/ -> /sn/",
+    "Metathesis([+sibilant -voice],[-consonantal])",
+    "/e/ -> /i/ | _#",
+    "/ɡ/ -> /ɣ/ | [-consonantal]_[-consonantal]",
+    "Epenthesis([+glottal], /a/)",
+    "[+nasal] -> [+voice] | _[+sibilant]",
+    "/ʒ/ -> /j/",
+]
+
+
+def main(argv):
+    n_words = int(argv[0]) if argv else 2000
+    law = parser.compile("CHANGE BEGIN\n{}\nEND".format("\n".join(RULES)))[0]
+    compiled = compile_change(law)
+    wf = WordFactory()
+    words = list(wf.make_words(make_lexicon(n_words)))
+
+    start = time.perf_counter()
+    expected = [law.apply(w) for w in words]
+    plain = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [compiled.apply(w) for w in words]
+    skipping = time.perf_counter() - start
+
+    print(compiled.skip_report())
+    print("{} words, {} rules: {:.2f} ms per word, compiled and skipping "
+          "{:.3f} ms per word".format(n_words, len(RULES),
+                                      plain / n_words * 1e3,
+                                      skipping / n_words * 1e3))
+    if any(e != r for e, r in zip(expected, results)):
+        print("the results differ")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
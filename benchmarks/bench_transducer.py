@@ -0,0 +1,70 @@
+"""
+Measures how the time to apply a conditioned sound change grows with the
+length of the word.
+
+    python -m benchmarks.bench_transducer [LONGEST_WORD_IN_SYLLABLES]
+
+Exits with status 1 if a phoneme of the longest word takes more than
+TARGET_GROWTH times as long as one of the shortest, i.e. if applying a
+change is not roughly linear in the length of the word. When positions in
+the word were found by searching for the current phoneme, it was
+quadratic.
+"""
+
+import sys
+import timeit
+
+from pylaut.language.phonology.word import WordFactory
+from pylaut.pylautlang import parser
+
+# how much longer a phoneme of the longest word may take than one of the
+# shortest
+TARGET_GROWTH = 2.0
+
+CHANGE = "CHANGE BEGIN [+sibilant] -> [+voice] | [+syllabic]_[+syllabic] END"
+
+
+def make_word(wf, n_syllables):
+    """
+    Returns a word of n_syllables syllables, stressed on the first.
+    """
+    syllables = [("sa", "na", "ta")[i % 3] for i in range(n_syllables)]
+    return wf.make_word("'" + ".".join(syllables))
+
+
+def time_per_phoneme(change, word, repeat=5):
+    """
+    Returns the fastest time of applying change to word, per phoneme, in
+    seconds.
+    """
+    number = max(1, 2000 // len(word))
+    best = min(timeit.repeat(lambda: change.apply(word), number=number,
+                             repeat=repeat))
+    return best / number / len(word)
+
+
+def main(argv):
+    longest = int(argv[0]) if argv else 512
+    wf = WordFactory()
+    change = parser.compile(CHANGE)[0]
+    lengths = []
+    n = 8
+    while n <= longest:
+        lengths.append(n)
+        n *= 2
+
+    times = []
+    for n_syllables in lengths:
+        word = make_word(wf, n_syllables)
+        times.append(time_per_phoneme(change, word))
+        print("{:5d} phonemes: {:.2f} µs per phoneme".format(
+            len(word), times[-1] * 1e6))
+    growth = times[-1] / times[0]
+    print("growth from shortest to longest: {:.2f} (target {})".format(
+        growth, TARGET_GROWTH))
+    if growth > TARGET_GROWTH:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,393 @@
+"""
+Module defining BatchEngine, which applies sound changes to all the words of
+a lexicon at once rather than word by word.
+"""
+
+import functools
+from bisect import bisect_left
+from typing import Iterable, Iterator, List
+
+from pylaut.change.change import AllOf, AnyOf, AtPhoneIndex, Not, PhoneAt
+from pylaut.change.fst import (CompileError, check_test, flatten_changes,
+                               output_function, segmental_rule)
+from pylaut.change.fusion import FusedChange
+from pylaut.language.phonology.compactword import (CompactWord, WordTable,
+                                                   can_store)
+
+# the most distinct phones a BatchEngine can hold, one per byte value
+MAX_PHONES = 256
+
+
+@functools.singledispatch
+def _condition_mask(condition, engine) -> int:
+    """
+    Returns the mask of the positions at which condition is True.
+    """
+    raise CompileError("{} cannot be compiled.".format(condition))
+
+
+@_condition_mask.register
+def _(condition: PhoneAt, engine):
+    return engine.shifted(engine.test_mask(condition.pred),
+                          condition.position)
+
+
+@_condition_mask.register
+def _(condition: AtPhoneIndex, engine):
+    if condition.index >= 0:
+        return engine.shifted(engine.word_starts_mask(), -condition.index)
+    return engine.shifted(engine.word_ends_mask(), -condition.index - 1)
+
+
+@_condition_mask.register
+def _(condition: Not, engine):
+    return engine.all_mask() ^ _condition_mask(condition.condition, engine)
+
+
+@_condition_mask.register
+def _(condition: AllOf, engine):
+    mask = engine.all_mask()
+    for c in condition.conditions:
+        mask &= _condition_mask(c, engine)
+    return mask
+
+
+@_condition_mask.register
+def _(condition: AnyOf, engine):
+    mask = 0
+    for c in condition.conditions:
+        mask |= _condition_mask(c, engine)
+    return mask
+
+
+class BatchEngine():
+    """
+    Applies sound changes to many words at once.
+
+    The words are kept one after the other in a bytearray with a byte per
+    phone, a code standing for one of the (at most MAX_PHONES) distinct
+    phone IDs of the words, along with the positions at which words and
+    syllables start.
+
+    Changes that can be compiled (see the fst module) are applied to all
+    words at once with masks: ints with the bit 8p set if a condition holds
+    at position p. A phone test's mask is made by translating the codes, a
+    condition at an offset shifts it and clears the positions whose word
+    does not reach that far, and Not, AllOf and AnyOf are bitwise
+    operations. Where every phone changed becomes one phone, the codes are
+    substituted by merging the translated codes under the mask of the
+    positions the change applies to; only insertions and deletions are made
+    one position at a time. Other changes are applied word by word.
+
+    While the words have more than MAX_PHONES distinct phones, or when a
+    change would make them have more, the engine holds the words as a list
+    of CompactWords and applies every change word by word. So it does while
+    a word has contours, which it holds as a Word (see can_store).
+
+    :param WordTable table: The words to change.
+    """
+
+    def __init__(self, table: WordTable):
+        self.feature_model = table.feature_model
+        self._load(table)
+
+    def _code(self, phone_id: int) -> int:
+        try:
+            return self._codes_of[phone_id]
+        except KeyError:
+            code = self._codes_of[phone_id] = len(self.phone_ids)
+            self.phone_ids.append(phone_id)
+            return code
+
+    def _has_room(self, phone_ids: Iterable[int]) -> bool:
+        """
+        Returns whether the engine can give a code to each of phone_ids.
+        """
+        new = set(phone_ids).difference(self._codes_of)
+        return len(self.phone_ids) + len(new) <= MAX_PHONES
+
+    def _load(self, table: WordTable) -> None:
+        ids = table.phone_ids
+        self.phone_ids = []
+        self._codes_of = dict()
+        self._masks = dict()
+        if not self._has_room(ids):
+            # too many phones for a byte each
+            self.words = list(table)
+            return
+        self.words = None
+        self.codes = bytearray(self._code(i) for i in ids)
+        self.word_starts = list(table.word_starts)
+        # syllable offsets are relative to their word in a WordTable
+        self.syllable_starts = []
+        n_words = len(table.word_starts)
+        n_syllables = len(table.syllable_starts)
+        for w in range(n_words):
+            start = table.word_starts[w]
+            end = (table.word_syllables[w + 1]
+                   if w + 1 < n_words else n_syllables)
+            for s in range(table.word_syllables[w], end):
+                self.syllable_starts.append(start + table.syllable_starts[s])
+        self.word_syllables = list(table.word_syllables)
+        self.stress = bytes(table.stress)
+
+    def __len__(self):
+        if self.words is not None:
+            return len(self.words)
+        return len(self.word_starts)
+
+    # masks
+
+    def all_mask(self) -> int:
+        """
+        Returns the mask of all positions.
+        """
+        try:
+            return self._masks["all"]
+        except KeyError:
+            mask = self._masks["all"] = int.from_bytes(
+                b"\x01" * len(self.codes), "little")
+            return mask
+
+    def _positions_mask(self, name: str, positions: Iterable[int]) -> int:
+        try:
+            return self._masks[name]
+        except KeyError:
+            marks = bytearray(len(self.codes))
+            for p in positions:
+                marks[p] = 1
+            mask = self._masks[name] = int.from_bytes(marks, "little")
+            return mask
+
+    def word_starts_mask(self) -> int:
+        """
+        Returns the mask of the first position of each word.
+        """
+        n = len(self.codes)
+        return self._positions_mask(
+            "starts", (p for p in self.word_starts if p < n))
+
+    def word_ends_mask(self) -> int:
+        """
+        Returns the mask of the last position of each word.
+        """
+        ends = self.word_starts[1:] + [len(self.codes)]
+        return self._positions_mask(
+            "ends", (e - 1 for s, e in zip(self.word_starts, ends) if e > s))
+
+    def _crossing(self, offset: int) -> int:
+        """
+        Returns the mask of the positions p for which p + offset is not in
+        the same word as p.
+        """
+        key = ("crossing", offset)
+        try:
+            return self._masks[key]
+        except KeyError:
+            pass
+        mask = 0
+        if offset > 0:
+            ends = self.word_ends_mask()
+            for k in range(offset):
+                mask |= ends >> 8 * k
+        else:
+            starts = self.word_starts_mask()
+            for k in range(-offset):
+                mask |= starts << 8 * k
+            mask &= self.all_mask()
+        self._masks[key] = mask
+        return mask
+
+    def shifted(self, mask: int, offset: int) -> int:
+        """
+        Returns the mask of the positions p for which p + offset is in mask
+        and in the same word as p.
+        """
+        if offset > 0:
+            mask >>= 8 * offset
+        elif offset < 0:
+            mask = (mask << -8 * offset) & self.all_mask()
+        else:
+            return mask
+        return mask & ~self._crossing(offset)
+
+    def _test_table(self, test) -> bytearray:
+        check_test(test)
+        model = self.feature_model
+        table = bytearray(MAX_PHONES)
+        for code, phone_id in enumerate(self.phone_ids):
+            if test(model.interned_phone(phone_id)):
+                table[code] = 1
+        return table
+
+    def test_mask(self, test) -> int:
+        """
+        Returns the mask of the positions whose phone passes a phone test.
+        """
+        return int.from_bytes(self.codes.translate(self._test_table(test)),
+                              "little")
+
+    # applying changes
+
+    def run(self, changes: Iterable) -> "BatchEngine":
+        """
+        Applies changes (Changes, ChangeGroups or SoundLaws) in order.
+        """
+        for change in changes:
+            for part in flatten_changes(change):
+                self.apply(part)
+        return self
+
+    def apply(self, change) -> None:
+        """
+        Applies a single change to all words, at once if it can be compiled
+        and word by word otherwise.
+        """
+        if self.words is not None:
+            self._apply_per_word(change)
+            return
+        if isinstance(change, FusedChange):
+            self._apply_fused(change)
+            return
+        try:
+            domain, conditions, changer = segmental_rule(change)
+            output = output_function(changer, self.feature_model)
+            in_domain = self._test_table(domain)
+            fire = int.from_bytes(self.codes.translate(in_domain), "little")
+            if fire:
+                fire &= _condition_mask(AllOf(conditions), self)
+        except CompileError:
+            self._apply_per_word(change)
+            return
+        if fire and not self._substitute(fire, output, in_domain):
+            self._apply_per_word(change)
+
+    def _apply_fused(self, change: FusedChange) -> None:
+        output = change.output_function(self.feature_model)
+        if output is None:
+            self._apply_per_word(change)
+            return
+        # a fused change applies wherever it changes the phone
+        in_domain = bytearray(MAX_PHONES)
+        for code, phone_id in enumerate(self.phone_ids):
+            if output(phone_id) != (phone_id, ):
+                in_domain[code] = 1
+        fire = int.from_bytes(self.codes.translate(in_domain), "little")
+        if fire and not self._substitute(fire, output, in_domain):
+            self._apply_per_word(change)
+
+    def _substitute(self, fire: int, output, in_domain: bytearray) -> bool:
+        """
+        Replaces the phones at the positions in fire by their output, and
+        returns True, or returns False without changing anything if that
+        would make more than MAX_PHONES distinct phones.
+        """
+        n = len(self.codes)
+        outputs = [(code, output(phone_id))
+                   for code, phone_id in enumerate(self.phone_ids)
+                   if in_domain[code]]
+        if not self._has_room(o for _, out in outputs for o in out):
+            return False
+        table = bytearray(range(MAX_PHONES))
+        variable = []
+        for code, out in outputs:
+            if len(out) == 1:
+                table[code] = self._code(out[0])
+            else:
+                variable.append((code, out))
+        if variable:
+            varying = bytearray(MAX_PHONES)
+            for code, _ in variable:
+                varying[code] = 1
+            if fire & int.from_bytes(self.codes.translate(varying), "little"):
+                self._substitute_positions(fire, output)
+                return True
+        # every phone that changes becomes one phone
+        under = fire * 0xff
+        old = int.from_bytes(self.codes, "little")
+        new = int.from_bytes(self.codes.translate(table), "little")
+        self.codes = bytearray(
+            ((new & under) | (old & ~under)).to_bytes(n, "little"))
+        return True
+
+    def _substitute_positions(self, fire: int, output) -> None:
+        marks = fire.to_bytes(len(self.codes), "little")
+        codes = self.codes
+        new_codes = bytearray()
+        positions = []
+        # shifts[i] is how much the positions after positions[i] move
+        shifts = []
+        shift = 0
+        prev = 0
+        p = marks.find(1)
+        while p != -1:
+            new_codes += codes[prev:p]
+            out = output(self.phone_ids[codes[p]])
+            new_codes.extend(self._code(o) for o in out)
+            shift += len(out) - 1
+            positions.append(p)
+            shifts.append(shift)
+            prev = p + 1
+            p = marks.find(1, prev)
+        new_codes += codes[prev:]
+
+        def moved(q):
+            i = bisect_left(positions, q)
+            return q + (shifts[i - 1] if i else 0)
+
+        self.codes = new_codes
+        self.word_starts = [moved(q) for q in self.word_starts]
+        self.syllable_starts = [moved(q) for q in self.syllable_starts]
+        self._masks = dict()
+
+    def _apply_per_word(self, change) -> None:
+        words = [change.apply(w) for w in self.compact_words()]
+        if all(isinstance(w, CompactWord) or can_store(w) for w in words):
+            self._load(WordTable.from_words(words, self.feature_model))
+        else:
+            self.words = words
+
+    # results
+
+    def compact_words(self) -> Iterator[CompactWord]:
+        """
+        Yields the words as CompactWords, in order, or as Words those with
+        contours (see can_store).
+        """
+        if self.words is not None:
+            yield from self.words
+            return
+        n_words = len(self.word_starts)
+        n_syllables = len(self.syllable_starts)
+        ends = self.word_starts[1:] + [len(self.codes)]
+        for w in range(n_words):
+            start, end = self.word_starts[w], ends[w]
+            first = self.word_syllables[w]
+            last = (self.word_syllables[w + 1]
+                    if w + 1 < n_words else n_syllables)
+            stress = 0
+            for k, s in enumerate(range(first, last)):
+                if self.stress[s // 8] >> s % 8 & 1:
+                    stress |= 1 << k
+            yield CompactWord(
+                self.feature_model,
+                [self.phone_ids[c] for c in self.codes[start:end]],
+                [q - start for q in self.syllable_starts[first:last]], stress)
+
+    def word_table(self) -> WordTable:
+        """
+        Returns the words as a WordTable.
+
+        :raises ValueError: If a word has contours.
+        """
+        return WordTable.from_words(self.compact_words(), self.feature_model)
+
+
+def run_batch(changes: Iterable, words: Iterable) -> List[CompactWord]:
+    """
+    Applies changes to words (Words or CompactWords) with a BatchEngine and
+    returns the results as CompactWords, or as Words those with contours.
+    """
+    table = (words if isinstance(words, WordTable) else
+             WordTable.from_words(words))
+    return list(BatchEngine(table).run(changes).compact_words())
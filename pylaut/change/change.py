@@ -1,6 +1,8 @@
-from copy import deepcopy
+from copy import copy
 
 from pylaut import utils
+from pylaut.change.changecache import new_fingerprint
+from pylaut.language.phonology.compactword import compact_aware
 from pylaut.language.phonology.phone import Phone
 from pylaut.language.phonology.word import Syllable, Word
 from pylaut.utils import flatten_partial
@@ -24,30 +26,15 @@ class This(object):
         if kind == Syllable:
 
             def run_at_syllable(ch, p=pred):
-                idx = ch.syllables.index(ch.syllable)
-                if idx + position < 0:
-                    return False
-                try:
-                    return p(ch.syllables[ch.syllables.index(ch.syllable) +
-                                          position])
-                except IndexError:
+                idx = ch.syllable_index + position
+                if idx < 0 or idx >= len(ch.syllables):
                     return False
+                return p(ch.syllables[idx])
 
             return run_at_syllable
 
         elif kind == Phone:
-
-            def run_at_phoneme(ch, p=pred):
-                idx = ch.phonemes.index(ch.phoneme)
-                if idx + position < 0:
-                    return False
-                try:
-                    return p(
-                        ch.phonemes[ch.phonemes.index(ch.phoneme) + position])
-                except IndexError:
-                    return False
-
-            return run_at_phoneme
+            return PhoneAt(position, pred)
 
         else:
             raise ValueError("Unknown position type")
@@ -66,7 +53,7 @@ class This(object):
         if kind == Syllable:
             return lambda pred: lambda ch: lambda f, c: ch._run_syl(pred, f, c)
         elif kind == Phone:
-            return lambda pred: lambda ch: lambda f, c: ch._run_ph(pred, f, c)
+            return ForAllPhones
         else:
             raise ValueError("Unknown position type")
 
@@ -86,32 +73,143 @@ class This(object):
         """
 
         def is_at_syllable(td, index=index):
-            return td.syllable == td.syllables[index]
-
-        def is_at_phoneme(td, index=index):
-            return td.phoneme == td.phonemes[index]
+            if index < 0:
+                return td.syllable_index == len(td.syllables) + index
+            return td.syllable_index == index
 
         if kind == Syllable:
             return is_at_syllable
         elif kind == Phone:
-            return is_at_phoneme
+            return AtPhoneIndex(index)
         else:
             raise ValueError("Unknown position type")
 
 
+# The conditions and domains below are what This.at, This.is_at_index and
+# This.forall return for phones. They are objects rather than closures so
+# that changes made of them can be compiled (see the fst module).
+
+
+class PhoneAt(object):
+    """
+    PhoneAt :: Transducer -> Bool
+
+    True if the phoneme at offset `position` from the current one satisfies
+    `pred`; False if there is no phoneme there.
+    """
+
+    def __init__(self, position, pred):
+        self.position = position
+        self.pred = pred
+
+    def __call__(self, td):
+        idx = td.phoneme_index + self.position
+        if idx < 0 or idx >= len(td.phonemes):
+            return False
+        return self.pred(td.phonemes[idx])
+
+
+class AtPhoneIndex(object):
+    """
+    AtPhoneIndex :: Transducer -> Bool
+
+    True if the current phoneme is at the absolute position `index` of the
+    word, counted from the end if it is negative.
+    """
+
+    def __init__(self, index):
+        self.index = index
+
+    def __call__(self, td):
+        if self.index < 0:
+            return td.phoneme_index == len(td.phonemes) + self.index
+        return td.phoneme_index == self.index
+
+
+class Not(object):
+    """
+    Not :: Transducer -> Bool
+
+    The negation of a condition.
+    """
+
+    def __init__(self, condition):
+        self.condition = condition
+
+    def __call__(self, td):
+        return not self.condition(td)
+
+
+class AllOf(object):
+    """
+    AllOf :: Transducer -> Bool
+
+    True if all of a list of conditions are.
+    """
+
+    def __init__(self, conditions):
+        self.conditions = tuple(conditions)
+
+    def __call__(self, td):
+        for c in self.conditions:
+            if not c(td):
+                return False
+        return True
+
+
+class AnyOf(object):
+    """
+    AnyOf :: Transducer -> Bool
+
+    True if any of a list of conditions is.
+    """
+
+    def __init__(self, conditions):
+        self.conditions = tuple(conditions)
+
+    def __call__(self, td):
+        for c in self.conditions:
+            if c(td):
+                return True
+        return False
+
+
+class ForAllPhones(object):
+    """
+    ForAllPhones :: Transducer -> ((Transducer -> WordPart) *
+                                    (Transducer -> Bool)) -> Word
+
+    The domain of a change over all phonemes that satisfy `pred`. See
+    This.forall.
+    """
+
+    def __init__(self, pred):
+        self.pred = pred
+
+    def __call__(self, td):
+        return lambda f, c: td._run_ph(self.pred, f, c)
+
+
 # word -> word
 class Change(object):
     """
     Core data structure to represent a sound change.
     Each method takes a change and returns a new one, thus enabling persistence
     and method chaining.
+
+    Changes are never changed after they are built: the new change shares
+    everything but the part that differs with the old one, so building a
+    change costs no copying. The conditions are a tuple for that reason.
     """
 
     def __init__(self):
         self.appl = None
         self.changes = None
         self.label = None
-        self.conditions = []
+        self.conditions = ()
+        # whether ChangeCaches may cache this change, see uncached
+        self.cacheable = True
+        self._fingerprint = new_fingerprint()
 
     def __call__(self, w):
         return self.apply(w)
@@ -144,9 +242,7 @@ class Change(object):
             ch.when(This.at(Phone, 0, λ p: p.is_vowel()))
             ch.when(λ td: td.phoneme.is_vowel())
         """
-        nc = deepcopy(self)
-        nc.conditions.append(what)
-        return nc
+        return self._with_condition(what)
 
     def unless(self, what):
         """
@@ -154,9 +250,7 @@ class Change(object):
 
         when, but with the condition negated
         """
-        nc = deepcopy(self)
-        nc.conditions.append(lambda x: not what(x))
-        return nc
+        return self._with_condition(Not(what))
 
     def to(self, fetcher):
         """
@@ -188,7 +282,7 @@ class Change(object):
                 λ p: p.feature_is_false("continuant"), f, c))
 
         """
-        nc = deepcopy(self)
+        nc = self._derive()
         nc.appl = fetcher if nc.appl is None else utils.o(fetcher, nc.appl)
         return nc
 
@@ -205,26 +299,69 @@ class Change(object):
         This would set the change to shift stress to a certain syllable when
             its conditions are met.
         """
-        nc = deepcopy(self)
+        nc = self._derive()
         nc.changes = changer if nc.changes is None else utils.o(
             changer, nc.changes)
         return nc
 
+    def _derive(self):
+        """
+        Returns a shallow copy of self to be made into a new change, with a
+        fingerprint of its own. The parts of the new change that differ from
+        self must be replaced, never changed in place.
+        """
+        nc = copy(self)
+        nc._fingerprint = new_fingerprint()
+        return nc
+
+    def _with_condition(self, condition):
+        nc = self._derive()
+        nc.conditions = self.conditions + (condition,)
+        return nc
+
+    def fingerprint(self):
+        """
+        Returns the fingerprint that identifies this change in a
+        ChangeCache. Every change made, e.g. by when or do, gets a new one.
+        """
+        return self._fingerprint
+
+    def uncached(self):
+        """
+        uncached :: Change -> Change
+
+        Returns the change, marked never to be cached by a ChangeCache. This
+        is for changes that are not pure functions of the word, e.g. because
+        they close over state that changes between applications.
+        """
+        nc = self._derive()
+        nc.cacheable = False
+        return nc
+
     def _eval(self, transducer):
         """
         _eval :: (Change * Transducer) -> Word
 
         Evaluates self using a Transducer object.
         """
+        conditions = self.conditions
         return self.appl(transducer)(
-            self.changes, lambda pos: all((c(pos) for c in self.conditions)))
+            self.changes, lambda pos: all(c(pos) for c in conditions))
 
-    def apply(self, word_obj):
+    def apply(self, word_obj, cache=None):
         """
         apply :: (Change * Word) -> Word
 
-        Call this method to apply a sound change to a word.
+        Call this method to apply a sound change to a word. CompactWords
+        are changed into CompactWords. If a ChangeCache is given, the result
+        is looked up in it first.
         """
+        if cache is not None:
+            return cache.apply(self, word_obj)
+        return self._apply(word_obj)
+
+    @compact_aware
+    def _apply(self, word_obj):
         # TODO: stop this calling back-and-forth fuckness
         return Transducer(word_obj, self)()
 
@@ -233,14 +370,29 @@ class Transducer(object):
     """
     Class for applying sound changes to words. Supports iteration through
     both syllables and phonemes.
+
+    While a change runs, phoneme_index is the position of the current
+    phoneme in phonemes, syllable_index that of the current syllable in
+    syllables, and syllable_phoneme_index that of the current phoneme in
+    its syllable. Functions that need the current position should read
+    these rather than search for the current phoneme or syllable, which is
+    slow and goes wrong if it occurs more than once. Functions that insert
+    into phonemes and the current syllable, as Epenthesis does, must insert
+    after the current position and call advance.
     """
 
     def __init__(self, word, change):
-        self.word = word
+        # changes may edit the word they run on in place (see e.g.
+        # Epenthesis), which must not affect the word passed in
+        self.word = word.shallow_copy()
         self.syllables = self.word.syllables
         self.syllable = self.syllables[0]
         self.phonemes = self.word.phonemes
-        self.phoneme = self.phonemes[0]
+        self.phoneme = self.phonemes[0] if self.phonemes else None
+        self.syllable_index = 0
+        self.phoneme_index = 0
+        self.syllable_phoneme_index = 0
+        self.stressed_position = self.word.get_stressed_position()
 
         self.change = change
 
@@ -275,11 +427,20 @@ class Transducer(object):
             A new Word object derived from self.word by applying self.change.
         """
         new_syllables = []
-        for syllable in self.word:
+        self.phoneme_index = -1
+        # syllables may grow while they are run over, see advance
+        for self.syllable_index, syllable in enumerate(self.syllables):
             self.syllable = syllable
             new_syllable = []
-            for phoneme in syllable:
+            phonemes = syllable.phonemes
+            changed = False
+            i = 0
+            while i < len(phonemes):
+                phoneme = phonemes[i]
+                self.syllable_phoneme_index = i
+                self.phoneme_index += 1
                 self.phoneme = phoneme
+                i += 1
                 if self.ignore_next:
                     np = phoneme
                     self.ignore_next = False
@@ -289,10 +450,14 @@ class Transducer(object):
                               if pred(phoneme) and cond(self) else phoneme)
                     except IndexError:
                         np = phoneme
+                    changed = changed or np is not phoneme
                 new_syllable.append(np)
             clean_syllable = flatten_partial(
                 filter(lambda x: x is not None, new_syllable))
             ns = Syllable(clean_syllable)
+            if not changed:
+                # syllables the change leaves alone keep their phone set
+                ns._share_phone_set(syllable)
             if syllable.is_stressed():
                 ns.set_stressed()
             new_syllables.append(ns)
@@ -321,7 +486,7 @@ class Transducer(object):
             A new Word object derived from self.word by applying self.change.
         """
         new_syllables = []
-        for syllable in self.word:
+        for self.syllable_index, syllable in enumerate(self.syllables):
             self.syllable = syllable
             if not self.ignore_next:
                 try:
@@ -338,7 +503,8 @@ class Transducer(object):
 
     def advance(self):
         """
-        Causes the Transducer to skip the next phoneme.
+        Causes the Transducer to skip the next phoneme (or syllable). The
+        cursors still count the skipped one.
         """
         self.ignore_next = True
 
@@ -347,16 +513,26 @@ class ChangeGroup(Change):
     """
     A class for grouping together several Changes that still need
     to be applied all at once.
+
+    A condition given to the group (with when or unless) is also given to
+    each of its changes when it is added, so applying the group just applies
+    its changes in order.
     """
     def __init__(self, changes):
         super().__init__()
-        self.changes = changes
+        self.changes = tuple(changes)
+        self.cacheable = all(
+            getattr(ch, "cacheable", True) for ch in changes)
+
+    def _with_condition(self, condition):
+        nc = super()._with_condition(condition)
+        nc.changes = tuple(
+            ch._with_condition(condition) for ch in self.changes)
+        return nc
 
-    def apply(self, word_obj):
-        new_changes = [deepcopy(ch) for ch in self.changes]
-        for ch in new_changes:
-            ch.conditions.extend(self.conditions)
+    @compact_aware
+    def _apply(self, word_obj):
         new_word = word_obj
-        for ch in new_changes:
+        for ch in self.changes:
             new_word = ch.apply(new_word)
         return new_word
@@ -1,19 +1,31 @@
-import copy
 from itertools import zip_longest
 from typing import Iterable, List, Optional
 
 from pylaut.change.change import Change, This, Transducer
+from pylaut.language.phonology.compactword import compact_aware
+from pylaut.language.phonology.naturalclass import SymbolClass
 from pylaut.language.phonology.phone import Phone
-from pylaut.language.phonology.phonology import Phoneme, Phonology
-from pylaut.language.phonology.word import Syllable, Word, WordFactory
+from pylaut.language.phonology.phonology import Phoneme
+from pylaut.language.phonology.syllabifier import Syllabifier
+from pylaut.language.phonology.word import Syllable, Word
 
 
 class Contour(Phoneme):
+    __slots__ = ("children", )
+
+    # contours are identified by their children, not their features
+    _internable = False
+
     def __init__(self, plist):
         super().__init__()
         self.children = plist
         self.symbol = "".join(p.symbol for p in self.children)
 
+    def copy(self):
+        new = super().copy()
+        new.children = [p.copy() for p in self.children]
+        return new
+
     def __repr__(self):
         return "".join(["/", self.symbol, "/"])
 
@@ -23,20 +35,27 @@ class ComplexDomain(Change):
         super().__init__()
         self.contour = plist
 
-    def apply(self, word_obj):
-        return super().apply(sequence_to_contour(word_obj, self.contour))
+    @compact_aware
+    def _apply(self, word_obj):
+        return super()._apply(
+            sequence_to_contour(word_obj.shallow_copy(), self.contour))
 
 
 class Resyllabify(Change):
+    """
+    Divides a word into syllables afresh by sonority, keeping its phonemes
+    and stress. The syllable structure is taken from the Syllabifier of a
+    WordFactory, if one is given.
+    """
+
     def __init__(self, wf=None):
         super().__init__()
         self.wf = wf
+        self.syllabifier = wf.syllabifier if wf else Syllabifier()
 
-    def apply(self, word_obj):
-        segs = [p.symbol for p in word_obj.phonemes]
-        if not self.wf:
-            self.wf = WordFactory(Phonology(segs))
-        return self.wf.fromlist(segs)
+    @compact_aware
+    def _apply(self, word_obj):
+        return self.syllabifier.syllabify_word(word_obj)
 
 
 def match_subsequence(w: Word, ph: Phoneme,
@@ -77,13 +96,62 @@ def sequence_to_contour(w: Word, seq: List[Phoneme]) -> Word:
 
 
 def change_feature(phone: Phone, name: str, value: str) -> Phone:
-    np = copy.deepcopy(phone)
-    if value == '+':
-        np.set_features_true(name)
-    elif value == '-':
-        np.set_features_false(name)
-    np.set_symbol_from_features()
-    return np
+    if value in ('+', '-'):
+        return phone.with_feature(name, value)
+    return phone.with_features({})
+
+
+class SetFeatures(object):
+    """
+    SetFeatures :: Transducer -> Phone
+
+    The codomain of a change that gives the current phoneme the feature
+    values in `edits`. Results are looked up in the tables given with
+    add_table (see InventoryClosure.install_tables) where possible.
+    """
+
+    def __init__(self, edits):
+        self.edits = dict(edits)
+        # feature model -> phone ID -> interned result
+        self.tables = dict()
+
+    def add_table(self, feature_model, table):
+        """
+        Adds the results of the edits for phone IDs of a feature model, as
+        a dictionary from phone ID to interned phone.
+        """
+        self.tables.setdefault(feature_model, dict()).update(table)
+
+    def __repr__(self):
+        return "[{}]".format(" ".join(
+            v + k for k, v in self.edits.items()))
+
+    def __call__(self, td):
+        phone = td.phoneme
+        table = self.tables.get(phone.feature_model)
+        if table is not None:
+            result = table.get(phone.phone_id)
+            if result is not None:
+                return result
+        return phone.with_features(self.edits)
+
+
+class ReplaceWith(object):
+    """
+    ReplaceWith :: Transducer -> Tuple[Phone]
+
+    The codomain of a change that replaces the current phoneme with a fixed
+    sequence of phonemes, which may be empty.
+    """
+
+    def __init__(self, phonemes):
+        self.phonemes = phonemes
+
+    def __repr__(self):
+        return "/{}/".format("".join(p.symbol for p in self.phonemes) or "0")
+
+    def __call__(self, td):
+        return self.phonemes
 
 
 def delete_phonemes(syllable: Syllable,
@@ -93,27 +161,27 @@ def delete_phonemes(syllable: Syllable,
 
 
 def before_stress(td: Transducer) -> bool:
-    wstr = td.word.get_stressed_position()
+    wstr = td.stressed_position
     if wstr is None:
         return False
     else:
-        return (td.syllables.index(td.syllable) < wstr)
+        return td.syllable_index < wstr
 
 
 def after_stress(td: Transducer) -> bool:
-    wstr = td.word.get_stressed_position()
+    wstr = td.stressed_position
     if wstr is None:
         return False
     else:
-        return (td.syllables.index(td.syllable) > wstr)
+        return td.syllable_index > wstr
 
 
 def replace_phonemes(domain: List[Phone],
                      codomain: List[Phone]) -> Change:
 
     dom = Contour(domain)
-    return ComplexDomain(domain).do(lambda x: codomain).to(
-        This.forall(Phone)(lambda p: p.is_symbol(dom.symbol)))
+    return ComplexDomain(domain).do(ReplaceWith(codomain)).to(
+        This.forall(Phone)(SymbolClass(dom.symbol)))
 
 
 def is_diphthong(nucleus: Iterable[Phone], diphthong: Iterable[str]) -> bool:
@@ -0,0 +1,114 @@
+"""
+Module defining ChangeCache, a bounded memo of the results of applying sound
+changes to words.
+"""
+
+import itertools
+from collections import OrderedDict, namedtuple
+
+from pylaut.language.phonology.compactword import CompactWord
+
+CacheStats = namedtuple("CacheStats",
+                        ["hits", "misses", "bypassed", "evictions", "size",
+                         "maxsize"])
+
+_fingerprints = itertools.count()
+
+
+def new_fingerprint() -> int:
+    """
+    Returns a new rule fingerprint, different from all the others handed
+    out in this process. Changes and SoundLaws take one when they are made.
+    """
+    return next(_fingerprints)
+
+
+def _unshared(result):
+    """
+    Returns a cached result that may be changed in place without changing
+    the cache: a copy of a Word (see Word.shallow_copy), or a CompactWord,
+    which cannot be changed, as it is.
+    """
+    if isinstance(result, CompactWord):
+        return result
+    return result.shallow_copy()
+
+
+def _word_key(word):
+    if isinstance(word, CompactWord):
+        return word
+    return word.structural_key()
+
+
+class ChangeCache():
+    """
+    A least-recently-used memo of (rule, word) -> changed word, where the
+    rule is a Change or SoundLaw, identified by its fingerprint, and the word
+    is identified by its structure (see Word.structural_key).
+
+    Pass a cache to Change.apply, SoundLaw.apply or Lexicon.run_sound_changes
+    to use it. Rules whose cacheable attribute is False (see Change.uncached)
+    are applied as usual and counted as bypassed.
+
+    Each lookup of a Word gets a copy of the cached result, so results may
+    be changed in place like those of the rule itself, but the phonemes of
+    a copy are those of the cached result.
+
+    :param int maxsize: The most results to keep.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        if maxsize < 1:
+            raise ValueError("A ChangeCache must hold at least one result.")
+        self.maxsize = maxsize
+        self._results = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._results)
+
+    def apply(self, rule, word):
+        """
+        Returns rule applied to word, from the cache if possible.
+        """
+        if not getattr(rule, "cacheable", False):
+            self.bypassed += 1
+            return rule.apply(word)
+        key = (rule.fingerprint(), _word_key(word))
+        try:
+            result = self._results[key]
+        except KeyError:
+            pass
+        else:
+            self._results.move_to_end(key)
+            self.hits += 1
+            return _unshared(result)
+
+        self.misses += 1
+        result = rule.apply(word)
+        self._results[key] = _unshared(result)
+        if len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+            self.evictions += 1
+        return result
+
+    def stats(self) -> CacheStats:
+        """
+        Returns the numbers of hits, misses, bypassed rules and evictions
+        so far, and the current and maximum size of the cache.
+        """
+        return CacheStats(self.hits, self.misses, self.bypassed,
+                          self.evictions, len(self._results), self.maxsize)
+
+    def clear(self) -> None:
+        """
+        Empties the cache and resets its statistics.
+        """
+        self._results.clear()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
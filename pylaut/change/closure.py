@@ -0,0 +1,228 @@
+"""
+Module defining InventoryClosure, a static analysis of a list of sound
+changes over a starting inventory of phones, such as the phonemes of a
+Lexicon's Phonology.
+
+A word can only ever have the phones of the inventory and those that the
+changes make of them. The analysis runs each change over a set of phones
+rather than over words: a change whose domain is a phone test (see
+dispatch.domain_test) and whose codomain is known (SetFeatures or
+ReplaceWith, see fst.output_function, or a FusedChange) turns each phone it
+can apply to into a known sequence of phones. This gives the phones that
+can be reached after each stage, a complete table of what each change does
+to those phones, and the changes that can never fire because no phone that
+can be reached is in their domain.
+
+Conditions are assumed to hold somewhere, so the phones a conditional
+change applies to may also be left as they are. Changes whose codomain is
+not known (such as those made with lambdas or most library functions)
+could make any phone, so after one, the reachable phones are no longer
+known to be all there are, and no change is reported as dead.
+"""
+
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pylaut.change.change_functions import (ComplexDomain, ReplaceWith,
+                                            Resyllabify, SetFeatures)
+from pylaut.change.dispatch import domain_test
+from pylaut.change.fst import (CompileError, describe, flatten_changes,
+                               output_function, segmental_rule)
+from pylaut.change.fusion import FusedChange
+
+Stage = namedtuple("Stage",
+                   ["change", "domain", "table", "reachable", "complete"])
+Stage.__doc__ = """
+What a change does to the phones that can be reached before it:
+
+* domain: the phone IDs it can apply to, or None if it has no phone test
+* table: the phone IDs it turns each of those into, or None if that is not
+  known
+* reachable: the phone IDs that can be reached after it
+* complete: whether words can have no other phones after it
+"""
+
+
+class InventoryClosure():
+    """
+    Runs changes over a starting inventory of phones (see the module
+    documentation). stages has a Stage per change, in order, with the
+    changes of SoundLaws and ChangeGroups taken one by one.
+
+    :param Iterable changes: The Changes, ChangeGroups or SoundLaws, in
+                             order.
+    :param Iterable inventory: The starting phones.
+    :param feature_model: The FeatureModel of the phones, by default that
+                          of the first one.
+    :raises ValueError: If a phone of the inventory cannot be interned in
+                        the feature model.
+    """
+
+    def __init__(self, changes: Iterable, inventory: Iterable,
+                 feature_model=None):
+        inventory = list(inventory)
+        if feature_model is None:
+            if not inventory:
+                raise ValueError("An empty inventory has no feature model.")
+            feature_model = inventory[0].feature_model
+        self.feature_model = feature_model
+        initial = set()
+        for phone in inventory:
+            phone_id = None
+            if phone.feature_model is feature_model:
+                phone_id = phone.phone_id
+            if phone_id is None:
+                raise ValueError("{} cannot be interned in {}.".format(
+                    phone, feature_model))
+            initial.add(phone_id)
+        self.initial = frozenset(initial)
+
+        self.changes = [
+            part for change in changes for part in flatten_changes(change)
+        ]
+        self.stages = []
+        reachable, complete = self.initial, True
+        for change in self.changes:
+            stage = self._run(change, reachable, complete)
+            self.stages.append(stage)
+            reachable, complete = stage.reachable, stage.complete
+
+    def _output(self, change):
+        """
+        Returns a function from a phone ID to the phone IDs change turns it
+        into, or None if that is not known.
+        """
+        if isinstance(change, FusedChange):
+            return change.output_function(self.feature_model)
+        try:
+            _, _, changer = segmental_rule(change)
+            return output_function(changer, self.feature_model)
+        except CompileError:
+            return None
+
+    def _made_phones(self, change) -> Optional[frozenset]:
+        """
+        Returns the phone IDs a change without a phone test can add to a
+        word, or None if that is not known.
+        """
+        if isinstance(change, Resyllabify):
+            return frozenset()
+        if not (type(change) is ComplexDomain
+                and isinstance(change.changes, ReplaceWith)):
+            return None
+        made = set()
+        for phone in change.changes.phonemes:
+            if phone.feature_model is not self.feature_model:
+                return None
+            phone_id = phone.phone_id
+            if phone_id is None:
+                return None
+            made.add(phone_id)
+        return frozenset(made)
+
+    def _run(self, change, reachable: frozenset, complete: bool) -> Stage:
+        test = domain_test(change)
+        if test is None:
+            made = self._made_phones(change)
+            if made is None:
+                return Stage(change, None, None, reachable, False)
+            return Stage(change, None, None, reachable | made, complete)
+
+        phones = self.feature_model._interned_phones
+        domain = frozenset(p for p in reachable if test(phones[p]))
+        output = self._output(change)
+        if output is None:
+            return Stage(change, domain, None, reachable,
+                         complete and not domain)
+        table = {p: output(p) for p in domain}
+        made = frozenset(o for out in table.values() for o in out)
+        if getattr(change, "conditions", ()):
+            return Stage(change, domain, table, reachable | made, complete)
+        # the change applies to every phone in its domain
+        return Stage(change, domain, table, (reachable - domain) | made,
+                     complete)
+
+    @property
+    def reachable(self) -> frozenset:
+        """
+        The phone IDs that can be reached after all the changes.
+        """
+        return self.stages[-1].reachable if self.stages else self.initial
+
+    @property
+    def complete(self) -> bool:
+        """
+        Whether words can have no other phones than reachable after all
+        the changes.
+        """
+        return self.stages[-1].complete if self.stages else True
+
+    def phones(self, phone_ids: Iterable[int]) -> List:
+        """
+        Returns the interned phones of phone IDs, ordered by symbol.
+        """
+        phones = self.feature_model._interned_phones
+        return sorted((phones[p] for p in phone_ids), key=lambda p: p.symbol)
+
+    def dead_changes(self) -> List[Tuple[int, object]]:
+        """
+        Returns the index and the change of each change that can never
+        fire, because no phone that can be reached before it is in its
+        domain.
+        """
+        dead = []
+        complete = True
+        for i, stage in enumerate(self.stages):
+            if complete and stage.domain is not None and not stage.domain:
+                dead.append((i, stage.change))
+            complete = stage.complete
+        return dead
+
+    def feature_tables(self) -> List[Tuple[SetFeatures, Dict[int, object]]]:
+        """
+        Returns, for each change whose codomain is a SetFeatures, the
+        SetFeatures and a table from the ID of each phone that can be
+        reached in its domain to the interned phone it turns it into.
+        """
+        phones = self.feature_model._interned_phones
+        tables = []
+        for stage in self.stages:
+            changer = getattr(stage.change, "changes", None)
+            if isinstance(changer, SetFeatures) and stage.table is not None:
+                tables.append((changer, {
+                    p: phones[out[0]]
+                    for p, out in stage.table.items()
+                }))
+        return tables
+
+    def install_tables(self) -> int:
+        """
+        Gives each SetFeatures of the changes its table (see
+        feature_tables), so that it looks the result up rather than editing
+        features, and returns the number of tables installed.
+        """
+        tables = self.feature_tables()
+        for changer, table in tables:
+            changer.add_table(self.feature_model, table)
+        return len(tables)
+
+    def report(self) -> str:
+        """
+        Returns a line per change with the number of phones that can be
+        reached in its domain and after it, and whether it can never fire
+        or makes phones that are not known.
+        """
+        dead = {i for i, _ in self.dead_changes()}
+        lines = ["start: {} phones".format(len(self.initial))]
+        for i, stage in enumerate(self.stages):
+            line = "{}: {}:".format(i, describe(stage.change))
+            if stage.domain is not None:
+                line += " {} in domain,".format(len(stage.domain))
+            line += " {} phones".format(len(stage.reachable))
+            if i in dead:
+                line += ", never fires"
+            elif not stage.complete and (i == 0
+                                         or self.stages[i - 1].complete):
+                line += ", makes phones that are not known"
+            lines.append(line)
+        return "\n".join(lines)
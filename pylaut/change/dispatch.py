@@ -0,0 +1,180 @@
+"""
+Module defining RuleIndex, an inverted index from interned phone IDs (see
+FeatureModel.intern) to the rules of a list of changes that can apply to
+them, so that only the rules that might fire on a word are tried.
+
+The domain of a change over phonemes (This.forall(Phone)) is a predicate
+on phones. If it is a NaturalClass or SymbolClass, as PyLautLang and
+lib.make_predicate make, it depends only on the features of a phone, so it
+can be evaluated once for each phone of the finite inventory of a feature
+model rather than for every phoneme of every word.
+"""
+
+from typing import Iterable, List, Optional
+
+from pylaut.change.change import Change, ForAllPhones
+from pylaut.change.change_functions import ComplexDomain
+from pylaut.language.phonology.naturalclass import NaturalClass, SymbolClass
+
+
+def domain_test(change):
+    """
+    Returns a phone test (such as a NaturalClass) that every phone a change
+    applies to passes, or None if there is none that can be evaluated ahead
+    of time. The change leaves words without such phones alone.
+
+    This is the domain of Changes (and ComplexDomains of a single phoneme)
+    over phonemes picked out by a NaturalClass or SymbolClass, whatever
+    their conditions and codomain, and what the domain_test method of other
+    changes (such as FusedChange) returns.
+    """
+    if type(change) is Change or (type(change) is ComplexDomain
+                                  and len(change.contour) == 1):
+        if not isinstance(change.appl, ForAllPhones):
+            return None
+        if not isinstance(change.appl.pred, (NaturalClass, SymbolClass)):
+            return None
+        return change.appl.pred
+    method = getattr(change, "domain_test", None)
+    return None if method is None else method()
+
+
+class DomainSet():
+    """
+    The set of the phone IDs of a feature model that pass a phone test, as
+    a bitset (bit i for phone ID i). Phones interned after the set was made
+    are tested when a word with one of them is met.
+
+    :param test: The phone test, e.g. from domain_test.
+    :param feature_model: The FeatureModel of the phone IDs.
+    """
+
+    def __init__(self, test, feature_model):
+        self.test = test
+        self.feature_model = feature_model
+        self.bits = 0
+        self.n_phones = 0
+        self.update()
+
+    def update(self) -> int:
+        """
+        Tests the phones interned since the last update, and returns the
+        set.
+        """
+        phones = self.feature_model._interned_phones
+        for phone_id in range(self.n_phones, len(phones)):
+            if self.test(phones[phone_id]):
+                self.bits |= 1 << phone_id
+        self.n_phones = len(phones)
+        return self.bits
+
+    def intersects(self, bits: int) -> bool:
+        """
+        Returns whether a set of phone IDs has a phone ID in the set.
+        """
+        if bits >> self.n_phones:
+            self.update()
+        return bool(bits & self.bits)
+
+
+class RuleIndex():
+    """
+    Maps each phone ID of a feature model to the set of the rules (changes
+    of a list, by index) whose domain can match it, as a bitset (bit r for
+    rule r). Rules without a domain test (see domain_test) are candidates
+    for every word.
+
+    The domains are evaluated over all phones interned in the model when
+    the index is made, so phones of the inventory should be interned by
+    then, e.g. by passing them as inventory; phones interned later are
+    added when a word with one of them is met.
+
+    The rules that might fire on a word are found with one walk over the
+    set of its phone IDs (see candidates). To keep the order of rules that
+    feed or bleed each other, apply the candidates in order, ask again with
+    the phones a rule adds to the word for the rules after it (feeding), and
+    check each one with may_apply against the word as it is when its turn
+    comes (bleeding). CompiledChange does this.
+
+    :param Iterable changes: The rules.
+    :param feature_model: The FeatureModel of the phone IDs.
+    :param Iterable inventory: Phones to intern first, such as the phonemes
+                               of a Phonology.
+    """
+
+    def __init__(self, changes: Iterable, feature_model,
+                 inventory: Iterable = ()):
+        self.changes = list(changes)
+        self.feature_model = feature_model
+        for phone in inventory:
+            phone.intern()
+        self.domains = []
+        self.always = 0
+        for r, change in enumerate(self.changes):
+            test = domain_test(change)
+            if test is None:
+                self.domains.append(None)
+                self.always |= 1 << r
+            else:
+                self.domains.append(DomainSet(test, feature_model))
+        self.all_rules = (1 << len(self.changes)) - 1
+        # phone ID -> the rules whose domain has it
+        self._rules = []
+        self._update()
+
+    def __len__(self):
+        return len(self.changes)
+
+    def _update(self) -> None:
+        n_phones = len(self.feature_model._interned_phones)
+        domains = [(r, d.update()) for r, d in enumerate(self.domains)
+                   if d is not None]
+        for phone_id in range(len(self._rules), n_phones):
+            rules = 0
+            for r, bits in domains:
+                if bits >> phone_id & 1:
+                    rules |= 1 << r
+            self._rules.append(rules)
+
+    def rules_for(self, phone_id: int) -> int:
+        """
+        Returns the set of the rules whose domain can match a phone ID, not
+        counting those that are candidates for every word.
+        """
+        if phone_id >= len(self._rules):
+            self._update()
+        return self._rules[phone_id]
+
+    def candidates(self, bits: Optional[int]) -> int:
+        """
+        Returns the set of the rules that might fire on a word with the set
+        of phone IDs bits (see Word.phone_set), or all rules if bits is
+        None.
+        """
+        if bits is None:
+            return self.all_rules
+        if bits >> len(self._rules):
+            self._update()
+        rules_of = self._rules
+        rules = self.always
+        while bits:
+            low = bits & -bits
+            rules |= rules_of[low.bit_length() - 1]
+            bits ^= low
+        return rules
+
+    def may_apply(self, r: int, bits: Optional[int]) -> bool:
+        """
+        Returns whether rule r might fire on a word with the set of phone
+        IDs bits, or True if bits is None.
+        """
+        domain = self.domains[r]
+        return bits is None or domain is None or domain.intersects(bits)
+
+    def rules(self, phone_id: int) -> List[int]:
+        """
+        Returns the indices of the rules that might fire on a phone ID, in
+        order, including those that are candidates for every word.
+        """
+        rules = self.rules_for(phone_id) | self.always
+        return [r for r in range(len(self.changes)) if rules >> r & 1]
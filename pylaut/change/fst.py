@@ -0,0 +1,645 @@
+"""
+Module compiling segmental sound changes into deterministic finite-state
+transducers over interned phone IDs (see FeatureModel.intern), which apply
+them to a word in a single pass from left to right.
+
+A change can be compiled if it is a plain Change (or a ComplexDomain of a
+single phoneme) over phonemes (This.forall(Phone)) that:
+
+* picks out phonemes by a NaturalClass or SymbolClass
+* changes them with SetFeatures or ReplaceWith
+* only has conditions on the phonemes at fixed offsets and on the position
+  in the word (PhoneAt, AtPhoneIndex), combined with Not, AllOf and AnyOf
+
+This covers the changes PyLautLang makes of sound change rules with feature
+and phoneme expressions and relative conditions. Other changes, such as
+those made with lambdas or library functions, and words with phonemes that
+cannot be interned, are applied by the Transducer as usual.
+"""
+
+import functools
+from collections import namedtuple
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from pylaut.change.change import (AllOf, AnyOf, AtPhoneIndex, Change,
+                                  ChangeGroup, ForAllPhones, Not, PhoneAt)
+from pylaut.change.change_functions import (ComplexDomain, ReplaceWith,
+                                            SetFeatures)
+from pylaut.change.changecache import new_fingerprint
+from pylaut.change.dispatch import RuleIndex, domain_test
+from pylaut.change.soundlaw import SoundLaw
+from pylaut.language.phonology.compactword import CompactWord, phone_set
+from pylaut.language.phonology.naturalclass import NaturalClass, SymbolClass
+from pylaut.language.phonology.word import Syllable, Word
+
+# the signature of the positions before the start and after the end of a
+# word; the signature of every phone has the bit _PHONE set
+BOUNDARY = 0
+_PHONE = 1
+
+
+SkipStats = namedtuple("SkipStats", ["change", "applied", "skipped"])
+
+
+class CompileError(Exception):
+    """
+    Raised for changes that cannot be compiled into an FST.
+    """
+
+
+@functools.singledispatch
+def _compile_condition(condition, fst):
+    """
+    Returns a function on a window accessor (offset -> signature) that is
+    True where condition is.
+    """
+    raise CompileError("{} cannot be compiled.".format(condition))
+
+
+@_compile_condition.register
+def _(condition: PhoneAt, fst):
+    offset = condition.position
+    bit = fst._test_bit(condition.pred, offset)
+    return lambda at: bool(at(offset) & bit)
+
+
+@_compile_condition.register
+def _(condition: AtPhoneIndex, fst):
+    # the phoneme is at the index if the position just beyond it is the
+    # word boundary and the one before that is not
+    if condition.index >= 0:
+        outside, inside = -(condition.index + 1), -condition.index
+    else:
+        outside, inside = -condition.index, -condition.index - 1
+    fst._use_offset(outside)
+    fst._use_offset(inside)
+    return lambda at: at(outside) == BOUNDARY and at(inside) != BOUNDARY
+
+
+@_compile_condition.register
+def _(condition: Not, fst):
+    f = _compile_condition(condition.condition, fst)
+    return lambda at: not f(at)
+
+
+@_compile_condition.register
+def _(condition: AllOf, fst):
+    fs = [_compile_condition(c, fst) for c in condition.conditions]
+    return lambda at: all(f(at) for f in fs)
+
+
+@_compile_condition.register
+def _(condition: AnyOf, fst):
+    fs = [_compile_condition(c, fst) for c in condition.conditions]
+    return lambda at: any(f(at) for f in fs)
+
+
+def segmental_rule(change):
+    """
+    Returns the domain (a phone test), the conditions and the codomain of a
+    compilable change.
+
+    :raises CompileError: If the change cannot be compiled.
+    """
+    if not (type(change) is Change or
+            (type(change) is ComplexDomain and len(change.contour) == 1)):
+        raise CompileError("{} cannot be compiled.".format(change))
+    if not isinstance(change.appl, ForAllPhones):
+        raise CompileError("{} is not a change over phonemes.".format(change))
+    if not isinstance(change.changes, (SetFeatures, ReplaceWith)):
+        raise CompileError("{} cannot be compiled.".format(change.changes))
+    return change.appl.pred, change.conditions, change.changes
+
+
+def check_test(test) -> None:
+    """
+    Raises CompileError unless test is a phone test that can be compiled,
+    i.e. a NaturalClass or SymbolClass.
+    """
+    if not isinstance(test, (NaturalClass, SymbolClass)):
+        raise CompileError("{} cannot be compiled.".format(test))
+
+
+def output_function(changer, feature_model):
+    """
+    Returns a function from a phone ID to the tuple of phone IDs the
+    codomain of a compilable change (SetFeatures or ReplaceWith) turns it
+    into.
+
+    :raises CompileError: If the phones of a ReplaceWith cannot be interned
+                          in feature_model.
+    """
+    if isinstance(changer, SetFeatures):
+        edits = changer.edits
+
+        def set_features(phone_id):
+            phone = feature_model.edit_interned(
+                feature_model.interned_phone(phone_id), edits)
+            return (phone._phone_id, )
+
+        return set_features
+    ids = []
+    for phone in changer.phonemes:
+        if phone.feature_model is not feature_model:
+            raise CompileError("{} does not use the feature model {}.".format(
+                phone, feature_model))
+        interned = phone.intern()
+        if interned._phone_id is None:
+            raise CompileError("{} cannot be interned.".format(phone))
+        ids.append(interned._phone_id)
+    ids = tuple(ids)
+    return lambda phone_id: ids
+
+
+def describe(change) -> str:
+    """
+    Returns a short description of a change over phonemes with a domain
+    test, in the form of the rule it was made from (with " | ..." for its
+    conditions, if it has any), or its repr.
+    """
+    test = domain_test(change)
+    if test is None or not isinstance(change, Change):
+        return repr(change)
+    changer = change.changes
+    return "{} -> {}{}".format(test,
+                               getattr(changer, "__name__", None) or changer,
+                               " | ..." if change.conditions else "")
+
+
+def flatten_changes(change) -> list:
+    """
+    Returns the Changes a SoundLaw or ChangeGroup applies, in order, or a
+    list of change itself.
+    """
+    if isinstance(change, (SoundLaw, ChangeGroup)):
+        # a group's conditions are already its changes' (see ChangeGroup)
+        return [c for ch in change.changes for c in flatten_changes(ch)]
+    return [change]
+
+
+class SegmentalFst():
+    """
+    A deterministic finite-state transducer that applies one compilable
+    change to sequences of phone IDs of one feature model.
+
+    Each phone ID is reduced to a signature, the set of the change's phone
+    tests (such as NaturalClasses) it passes. The state of the transducer is
+    the window of the signatures of the phones at the offsets the change
+    looks at, so whether the change applies to a phone is decided once per
+    state. Output is delayed by the right context of the change. States and
+    transitions are made the first time they are needed.
+
+    :param Change change: A compilable change.
+    :param feature_model: The FeatureModel of the phone IDs.
+    :raises CompileError: If the change cannot be compiled.
+    """
+
+    def __init__(self, change, feature_model):
+        domain, conditions, changer = segmental_rule(change)
+        self.feature_model = feature_model
+        self._tests = []
+        self._bits = []
+        self.left = 0
+        self.right = 0
+        self.domain = self._test_bit(domain, 0)
+        self.conditions = [_compile_condition(c, self) for c in conditions]
+        self._output = output_function(changer, feature_model)
+
+        self._outputs = dict()
+        self._signatures = dict()
+        start = (BOUNDARY, ) * (self.left + self.right + 1)
+        self._states = {start: 0}
+        self._windows = [start]
+        self._transitions = [dict()]
+        self._fires = [self._fire(start)]
+
+    def _use_offset(self, offset: int) -> None:
+        self.left = max(self.left, -offset)
+        self.right = max(self.right, offset)
+
+    def _test_bit(self, test, offset: int) -> int:
+        check_test(test)
+        self._use_offset(offset)
+        try:
+            return self._bits[self._tests.index(test)]
+        except ValueError:
+            bit = _PHONE << (len(self._tests) + 1)
+            self._tests.append(test)
+            self._bits.append(bit)
+            return bit
+
+    def _fire(self, window: Tuple[int, ...]) -> bool:
+        left = self.left
+
+        def at(offset):
+            return window[left + offset]
+
+        return bool(window[left] & self.domain) and all(
+            f(at) for f in self.conditions)
+
+    def _signature(self, phone_id: int) -> int:
+        phone = self.feature_model.interned_phone(phone_id)
+        sig = _PHONE
+        for test, bit in zip(self._tests, self._bits):
+            if test(phone):
+                sig |= bit
+        self._signatures[phone_id] = sig
+        return sig
+
+    def _add_transition(self, state: int, sig: int) -> int:
+        window = self._windows[state][1:] + (sig, )
+        target = self._states.get(window)
+        if target is None:
+            target = self._states[window] = len(self._windows)
+            self._windows.append(window)
+            self._transitions.append(dict())
+            self._fires.append(self._fire(window))
+        self._transitions[state][sig] = target
+        return target
+
+    def n_states(self) -> int:
+        """
+        Returns the number of states made so far.
+        """
+        return len(self._windows)
+
+    def positions(self, phone_ids: Sequence[int]) -> List[int]:
+        """
+        Returns the positions in phone_ids at which the change applies.
+        """
+        signatures = self._signatures
+        transitions = self._transitions
+        fires = self._fires
+        positions = []
+        state = 0
+        k = -self.right
+        for phone_id in phone_ids:
+            sig = signatures.get(phone_id)
+            if sig is None:
+                sig = self._signature(phone_id)
+            target = transitions[state].get(sig)
+            if target is None:
+                target = self._add_transition(state, sig)
+            state = target
+            if fires[state]:
+                positions.append(k)
+            k += 1
+        for _ in range(self.right):
+            target = transitions[state].get(BOUNDARY)
+            if target is None:
+                target = self._add_transition(state, BOUNDARY)
+            state = target
+            if fires[state]:
+                positions.append(k)
+            k += 1
+        return positions
+
+    def output(self, phone_id: int) -> Tuple[int, ...]:
+        """
+        Returns the phone IDs the change turns a phone ID into.
+        """
+        try:
+            return self._outputs[phone_id]
+        except KeyError:
+            out = self._outputs[phone_id] = self._output(phone_id)
+            return out
+
+    def apply(self, phone_ids: Sequence[int], syllable_starts: Sequence[int],
+              phones: Optional[Sequence] = None):
+        """
+        Applies the change to a word given as phone IDs and syllable
+        offsets. If the word's phones are given too, unchanged positions keep
+        their phone, and changed ones get interned phones.
+
+        :returns: The new phone IDs, syllable offsets and phones, or the
+                  arguments themselves if the change does not apply.
+        """
+        positions = self.positions(phone_ids)
+        if not positions:
+            return phone_ids, syllable_starts, phones
+        interned = self.feature_model._interned_phones
+        new_ids = []
+        new_starts = []
+        new_phones = None if phones is None else []
+        ends = list(syllable_starts[1:]) + [len(phone_ids)]
+        positions.append(len(phone_ids))
+        next_pos = positions[0]
+        p_idx = 0
+        for start, end in zip(syllable_starts, ends):
+            new_starts.append(len(new_ids))
+            for i in range(start, end):
+                if i == next_pos:
+                    out = self.output(phone_ids[i])
+                    new_ids.extend(out)
+                    if new_phones is not None:
+                        new_phones.extend(interned[o] for o in out)
+                    p_idx += 1
+                    next_pos = positions[p_idx]
+                else:
+                    new_ids.append(phone_ids[i])
+                    if new_phones is not None:
+                        new_phones.append(phones[i])
+        return new_ids, new_starts, new_phones
+
+
+def word_phones(word, feature_model):
+    """
+    Returns the phones, phone IDs, syllable offsets and stress bitmap of a
+    Word, or None if one of its phones cannot be interned in feature_model.
+    See word_from_phones for the way back.
+    """
+    phones = []
+    ids = []
+    starts = []
+    stress = 0
+    for i, syllable in enumerate(word.syllables):
+        starts.append(len(ids))
+        if syllable.is_stressed():
+            stress |= 1 << i
+        for phone in syllable.phonemes:
+            if (phone.feature_model is not feature_model
+                    or getattr(phone, "children", None)):
+                return None
+            phone_id = phone._phone_id
+            if phone_id is None:
+                phone_id = phone.intern()._phone_id
+                if phone_id is None:
+                    return None
+            phones.append(phone)
+            ids.append(phone_id)
+    return phones, ids, starts, stress
+
+
+def word_from_phones(phones, syllable_starts, stress) -> Word:
+    """
+    Returns a Word of phones, divided into syllables at syllable_starts,
+    with the syllables in the stress bitmap stressed (bit i for syllable
+    i).
+    """
+    ends = list(syllable_starts[1:]) + [len(phones)]
+    syllables = []
+    for i, (start, end) in enumerate(zip(syllable_starts, ends)):
+        syllable = Syllable(phones[start:end])
+        if stress >> i & 1:
+            syllable.set_stressed()
+        syllables.append(syllable)
+    return Word(syllables)
+
+
+class CompiledChange():
+    """
+    A Change, ChangeGroup or SoundLaw whose changes are applied by
+    SegmentalFsts where possible, and by the Transducer otherwise. Compiled
+    changes take and return Words and CompactWords like the change they
+    were made from, with the same results; see differential.
+
+    FSTs are made for each feature model the first time a word of it is
+    changed.
+
+    The changes that might apply to a word are looked up by its phone IDs
+    (see Word.phone_set and CompactWord.phone_set) in a RuleIndex, and only
+    those are run, in order. The phones a change adds to the word bring in
+    the later changes that might apply to them, and each change is checked
+    against the word as it is when its turn comes, so changes that feed or
+    bleed each other work as usual. A word no change applies to is
+    returned as it is. skip_stats and skip_report tell how often each
+    change was skipped.
+
+    :param change: The Change, ChangeGroup or SoundLaw to compile.
+    """
+
+    def __init__(self, change):
+        self.change = change
+        self.parts = flatten_changes(change)
+        self.cacheable = all(
+            getattr(ch, "cacheable", True) for ch in self.parts)
+        self._fingerprint = new_fingerprint()
+        # (part index, feature model) -> SegmentalFst, or None
+        self._fsts = dict()
+        # feature model -> RuleIndex
+        self._indices = dict()
+        self._words = 0
+        self._applied = [0] * len(self.parts)
+
+    def __repr__(self):
+        return "CompiledChange {}".format(self.change)
+
+    def __call__(self, w):
+        return self.apply(w)
+
+    def fingerprint(self):
+        """
+        Returns the fingerprint that identifies this change in a
+        ChangeCache.
+        """
+        return self._fingerprint
+
+    def fst(self, i: int, feature_model) -> Optional[SegmentalFst]:
+        """
+        Returns the FST of the i-th change for a feature model, or None if
+        that change cannot be compiled.
+        """
+        key = (i, feature_model)
+        try:
+            return self._fsts[key]
+        except KeyError:
+            pass
+        try:
+            fst = SegmentalFst(self.parts[i], feature_model)
+        except CompileError:
+            fst = None
+        self._fsts[key] = fst
+        return fst
+
+    def compiled(self, feature_model) -> List[bool]:
+        """
+        Returns whether each change can be compiled for a feature model.
+        """
+        return [
+            self.fst(i, feature_model) is not None
+            for i in range(len(self.parts))
+        ]
+
+    def index(self, feature_model) -> RuleIndex:
+        """
+        Returns the RuleIndex of the changes for a feature model.
+        """
+        try:
+            return self._indices[feature_model]
+        except KeyError:
+            index = self._indices[feature_model] = RuleIndex(
+                self.parts, feature_model)
+            return index
+
+    def _next(self, index: RuleIndex, pending: int, bits: Optional[int]):
+        """
+        Returns the index of the first change of pending that might apply
+        to a word with the phone IDs bits, and the changes left after it;
+        or None and 0 if there is none.
+        """
+        while pending:
+            low = pending & -pending
+            pending ^= low
+            i = low.bit_length() - 1
+            if index.may_apply(i, bits):
+                self._applied[i] += 1
+                return i, pending
+        return None, 0
+
+    @staticmethod
+    def _fed(index: RuleIndex, i: int, old: Optional[int],
+             new: Optional[int]) -> int:
+        """
+        Returns the changes after the i-th that might apply to the phones
+        it added to a word, whose phone IDs went from old to new.
+        """
+        added = None if old is None or new is None else new & ~old
+        return index.candidates(added) >> (i + 1) << (i + 1)
+
+    def skip_stats(self) -> List[SkipStats]:
+        """
+        Returns, for each change, how many times it has been applied to a
+        word and how many times it has been skipped.
+        """
+        return [
+            SkipStats(part, applied, self._words - applied)
+            for part, applied in zip(self.parts, self._applied)
+        ]
+
+    def skip_report(self) -> str:
+        """
+        Returns a line per change with the share of words it skipped.
+        """
+        lines = []
+        for i, stats in enumerate(self.skip_stats()):
+            total = stats.applied + stats.skipped
+            rate = stats.skipped / total if total else 0
+            lines.append("{}: {}: skipped {} of {} words ({:.1%})".format(
+                i, describe(stats.change), stats.skipped, total, rate))
+        return "\n".join(lines)
+
+    def apply(self, word, cache=None):
+        """
+        Applies the change to a Word or CompactWord. If a ChangeCache is
+        given, the result is looked up in it first.
+        """
+        if cache is not None:
+            return cache.apply(self, word)
+        if isinstance(word, CompactWord):
+            return self._apply_compact(word)
+        return self._apply_word(word)
+
+    def _apply_compact(self, word: CompactWord) -> CompactWord:
+        model = word.feature_model
+        ids, starts, stress = word.phone_ids, word.syllable_starts, word.stress
+        bits = word.phone_set()
+        index = self.index(model)
+        self._words += 1
+        i, pending = self._next(index, index.candidates(bits), bits)
+        while i is not None:
+            fst = self.fst(i, model)
+            new_bits = bits
+            if fst is not None:
+                new_ids, starts, _ = fst.apply(ids, starts)
+                if new_ids is not ids:
+                    ids = new_ids
+                    new_bits = phone_set(ids)
+            else:
+                new = self.parts[i].apply(
+                    CompactWord(model, ids, starts, stress))
+                if not isinstance(new, CompactWord):
+                    # it made a contour: go on word by word
+                    return self._apply_rest(i, new)
+                ids, starts, stress = (new.phone_ids, new.syllable_starts,
+                                       new.stress)
+                new_bits = new.phone_set()
+            if new_bits != bits:
+                pending |= self._fed(index, i, bits, new_bits)
+                bits = new_bits
+            i, pending = self._next(index, pending, bits)
+        if ids is word.phone_ids:
+            return word
+        return CompactWord(model, ids, starts, stress)
+
+    def _apply_rest(self, i: int, word: Word) -> Word:
+        """
+        Applies the changes after change i to a Word, without compiling or
+        skipping them.
+        """
+        for j in range(i + 1, len(self.parts)):
+            self._applied[j] += 1
+            word = self.parts[j].apply(word)
+        return word
+
+    def _apply_word(self, word: Word) -> Word:
+        model = None
+        for phone in word.phonemes:
+            model = phone.feature_model
+            break
+        if model is None:
+            # there is nothing to compile against
+            self._words += 1
+            for i, part in enumerate(self.parts):
+                self._applied[i] += 1
+                word = part.apply(word)
+            return word
+
+        # the word is either word, or if that is None, the phones etc. in
+        # state; the phone IDs are made only once an FST is needed
+        bits = word.phone_set(model)
+        state = None
+        index = self.index(model)
+        self._words += 1
+        i, pending = self._next(index, index.candidates(bits), bits)
+        while i is not None:
+            fst = self.fst(i, model)
+            if fst is not None and state is None:
+                state = word_phones(word, model)
+            new_bits = bits
+            if fst is not None and state is not None:
+                phones, ids, starts, stress = state
+                new_ids, starts, phones = fst.apply(ids, starts, phones)
+                if new_ids is not ids:
+                    state = phones, new_ids, starts, stress
+                    new_bits = phone_set(new_ids)
+                    word = None
+            else:
+                if word is None:
+                    word = word_from_phones(*_without_ids(state))
+                word = self.parts[i].apply(word)
+                new_bits = word.phone_set(model)
+                state = None
+            if new_bits != bits:
+                pending |= self._fed(index, i, bits, new_bits)
+                bits = new_bits
+            i, pending = self._next(index, pending, bits)
+        if word is None:
+            word = word_from_phones(*_without_ids(state))
+        return word
+
+    def differential(self, words: Iterable) -> list:
+        """
+        Applies both the change and its compiled version to words, and
+        returns a (word, expected, got) triple for each word on which they
+        disagree, in the sense of == or of their reprs. Useful to check
+        that a set of changes is compiled correctly.
+        """
+        mismatches = []
+        for word in words:
+            expected = self.change.apply(word)
+            got = self.apply(word)
+            if expected != got or repr(expected) != repr(got):
+                mismatches.append((word, expected, got))
+        return mismatches
+
+
+def _without_ids(state):
+    phones, _, starts, stress = state
+    return phones, starts, stress
+
+
+def compile_change(change) -> CompiledChange:
+    """
+    Compiles a Change, ChangeGroup or SoundLaw. See CompiledChange.
+    """
+    return CompiledChange(change)
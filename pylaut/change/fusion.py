@@ -0,0 +1,302 @@
+"""
+Module defining a pass that fuses runs of consecutive context-free changes
+of a SoundLaw into single changes, so that they are applied to a word, or a
+lexicon, in one pass instead of one pass each.
+
+A change is context-free if it can be compiled (see the fst module) and has
+no conditions, as are the changes PyLautLang makes of unconditional rules
+of a single phoneme or feature expression (/ʃ/ -> /sn/, [+sibilant] ->
+[+voice], [+sibilant] -> /t/). Each such change turns every phone in its
+domain into a fixed sequence of phones, whatever surrounds it, so a run of
+them is the same as one change that turns each phone into what the run
+would make of it. The run ends at the first change that is not
+context-free, so the order of the changes is kept.
+"""
+
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+from pylaut.change.change import ChangeGroup
+from pylaut.change.changecache import new_fingerprint
+from pylaut.change.fst import (CompileError, check_test, describe,
+                               flatten_changes, segmental_rule,
+                               word_from_phones, word_phones)
+from pylaut.change.fst import output_function as _output_function
+from pylaut.change.soundlaw import SoundLaw, SoundLawGroup
+from pylaut.language.phonology.compactword import CompactWord
+
+
+def context_free_rule(change):
+    """
+    Returns the domain (a phone test) and the codomain of a context-free
+    change.
+
+    :raises CompileError: If the change is not context-free.
+    """
+    domain, conditions, changer = segmental_rule(change)
+    if conditions:
+        raise CompileError("{} has conditions.".format(change))
+    check_test(domain)
+    return domain, changer
+
+
+def is_context_free(change) -> bool:
+    """
+    Returns whether a change is context-free, and so can be fused.
+    """
+    try:
+        context_free_rule(change)
+    except CompileError:
+        return False
+    return True
+
+
+class FusedDomain():
+    """
+    A phone test passed by the phones that pass any of a list of tests.
+    """
+
+    def __init__(self, tests):
+        self.tests = tuple(tests)
+
+    def __repr__(self):
+        return " or ".join(repr(t) for t in self.tests)
+
+    def __call__(self, phone):
+        return any(t(phone) for t in self.tests)
+
+
+class FusedChange():
+    """
+    A run of context-free changes, applied as one change that turns each
+    phone into the sequence of phones the run would turn it into. The
+    sequence is worked out for each phone ID of a feature model the first
+    time it is met.
+
+    A FusedChange takes and returns Words and CompactWords like the changes
+    it was made from, with the same results. Words with phones that cannot
+    be interned are changed by the changes one after the other.
+
+    :param Iterable changes: The context-free changes, in order.
+    :raises CompileError: If one of the changes is not context-free.
+    """
+
+    def __init__(self, changes: Iterable):
+        self.changes = tuple(changes)
+        self.rules = [context_free_rule(ch) for ch in self.changes]
+        self.cacheable = all(
+            getattr(ch, "cacheable", True) for ch in self.changes)
+        self._fingerprint = new_fingerprint()
+        # feature model -> phone ID -> phone IDs, or None
+        self._outputs = dict()
+
+    def __repr__(self):
+        return "FusedChange {}".format("; ".join(
+            describe(ch) for ch in self.changes))
+
+    def __call__(self, w):
+        return self.apply(w)
+
+    def fingerprint(self):
+        """
+        Returns the fingerprint that identifies this change in a
+        ChangeCache.
+        """
+        return self._fingerprint
+
+    def domain_test(self):
+        """
+        Returns a phone test passed by every phone the changes apply to: the
+        phones in the domain of one of them. See dispatch.domain_test.
+        """
+        return FusedDomain([domain for domain, _ in self.rules])
+
+    def output_function(self, feature_model
+                        ) -> Optional[Callable[[int], Tuple[int, ...]]]:
+        """
+        Returns a function from a phone ID of a feature model to the tuple
+        of phone IDs the changes turn it into, or None if the changes
+        replace phones with phones that cannot be interned in the model.
+        """
+        try:
+            return self._outputs[feature_model]
+        except KeyError:
+            pass
+        try:
+            steps = [(domain, _output_function(changer, feature_model))
+                     for domain, changer in self.rules]
+        except CompileError:
+            self._outputs[feature_model] = None
+            return None
+
+        table = dict()
+        phones = feature_model._interned_phones
+
+        def output(phone_id):
+            try:
+                return table[phone_id]
+            except KeyError:
+                pass
+            seq = (phone_id, )
+            for domain, step in steps:
+                new = []
+                for p in seq:
+                    if domain(phones[p]):
+                        new.extend(step(p))
+                    else:
+                        new.append(p)
+                seq = tuple(new)
+            table[phone_id] = seq
+            return seq
+
+        self._outputs[feature_model] = output
+        return output
+
+    def apply(self, word, cache=None):
+        """
+        Applies the changes to a Word or CompactWord. If a ChangeCache is
+        given, the result is looked up in it first.
+        """
+        if cache is not None:
+            return cache.apply(self, word)
+        if isinstance(word, CompactWord):
+            return self._apply_compact(word)
+        return self._apply_word(word)
+
+    def _apply_each(self, word):
+        for ch in self.changes:
+            word = ch.apply(word)
+        return word
+
+    def _apply_compact(self, word: CompactWord) -> CompactWord:
+        output = self.output_function(word.feature_model)
+        if output is None:
+            return self._apply_each(word)
+        ids, starts, _ = _substitute(output, word.phone_ids,
+                                     word.syllable_starts)
+        if ids is word.phone_ids:
+            return word
+        return CompactWord(word.feature_model, ids, starts, word.stress)
+
+    def _apply_word(self, word):
+        model = None
+        for phone in word.phonemes:
+            model = phone.feature_model
+            break
+        output = None if model is None else self.output_function(model)
+        state = None if output is None else word_phones(word, model)
+        if state is None:
+            return self._apply_each(word)
+        phones, ids, starts, stress = state
+        _, starts, phones = _substitute(output, ids, starts, phones,
+                                        model._interned_phones)
+        return word_from_phones(phones, starts, stress)
+
+
+def _substitute(output, phone_ids: Sequence[int],
+                syllable_starts: Sequence[int],
+                phones: Optional[Sequence] = None,
+                interned: Optional[Sequence] = None):
+    """
+    Replaces each phone ID of a word by its output. If the word's phones
+    are given too, unchanged positions keep their phone, and changed ones
+    get phones from interned, the interned phones of their feature model.
+
+    :returns: The new phone IDs, syllable offsets and phones, or the
+              arguments themselves if no phone changes.
+    """
+    outputs = [output(p) for p in phone_ids]
+    if all(len(out) == 1 and out[0] == p
+           for p, out in zip(phone_ids, outputs)):
+        return phone_ids, syllable_starts, phones
+    new_ids = []
+    new_starts = []
+    new_phones = None if phones is None else []
+    ends = list(syllable_starts[1:]) + [len(phone_ids)]
+    for start, end in zip(syllable_starts, ends):
+        new_starts.append(len(new_ids))
+        for i in range(start, end):
+            out = outputs[i]
+            new_ids.extend(out)
+            if new_phones is None:
+                continue
+            if len(out) == 1 and out[0] == phone_ids[i]:
+                new_phones.append(phones[i])
+            else:
+                new_phones.extend(interned[o] for o in out)
+    return new_ids, new_starts, new_phones
+
+
+def fuse_changes(changes: Iterable, debug: bool = False,
+                 name: Optional[str] = None) -> List:
+    """
+    Returns a list of changes that does the same as changes, applied in
+    order, with each run of two or more consecutive context-free changes
+    replaced by a FusedChange. ChangeGroups are taken apart into their
+    changes, which are fused like the others.
+
+    :param Iterable changes: Changes, such as the changes of a SoundLaw.
+    :param bool debug: Whether to print the changes that are fused.
+    :param Optional[str] name: A name for the changes to print along with
+                               them, such as that of their SoundLaw.
+    :returns: The fused changes.
+    :return-type: List
+    """
+    flat = []
+    for ch in changes:
+        if isinstance(ch, ChangeGroup):
+            flat.extend(flatten_changes(ch))
+        else:
+            flat.append(ch)
+
+    fused = []
+    run = []
+
+    def end_run(end):
+        if len(run) > 1:
+            fused.append(FusedChange(run))
+            if debug:
+                print("{}fused changes {} to {}: {}".format(
+                    "" if name is None else "{}: ".format(name),
+                    end - len(run), end - 1,
+                    "; ".join(describe(ch) for ch in run)))
+        else:
+            fused.extend(run)
+        run.clear()
+
+    for i, ch in enumerate(flat):
+        if is_context_free(ch):
+            run.append(ch)
+        else:
+            end_run(i)
+            fused.append(ch)
+    end_run(len(flat))
+    return fused
+
+
+def fuse_sound_law(law: SoundLaw, debug: bool = False) -> SoundLaw:
+    """
+    Returns a SoundLaw like law, whose changes are fused with fuse_changes.
+    The sound laws of a SoundLawGroup are fused one by one.
+
+    :param SoundLaw law: The sound law to fuse.
+    :param bool debug: Whether to print the changes that are fused.
+    :returns: The fused sound law.
+    :return-type: SoundLaw
+    """
+    if isinstance(law, SoundLawGroup):
+        return SoundLawGroup(
+            [fuse_sound_law(ch, debug) for ch in law.children],
+            law.date,
+            sc_lib=law.sc_lib,
+            sc_lib_name=law.sc_lib_name,
+            sc_lib_version=law.sc_lib_version,
+            name=law.name,
+            description=law.description)
+    return SoundLaw(law.code,
+                    fuse_changes(law.changes, debug, name=repr(law)),
+                    law.date,
+                    sc_lib=law.sc_lib,
+                    sc_lib_name=law.sc_lib_name,
+                    sc_lib_version=law.sc_lib_version,
+                    name=law.name,
+                    description=law.description)
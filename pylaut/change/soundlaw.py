@@ -1,5 +1,7 @@
 import importlib
 import json as jm
+from pylaut.change.changecache import new_fingerprint
+from pylaut.language.phonology.compactword import compact_aware
 from pylaut.pylautlang import lib
 
 
@@ -39,6 +41,7 @@ class SoundLaw():
         self.sc_lib_version = sc_lib_version
         self.description = description
         self.name = name
+        self._fingerprint = new_fingerprint()
 
         self.validate()
 
@@ -144,7 +147,31 @@ class SoundLaw():
 
         return sc_lib
 
-    def apply(self, word):
+    @property
+    def cacheable(self):
+        """
+        Whether ChangeCaches may cache this law: True if all its changes
+        may be cached.
+        """
+        return all(getattr(c, "cacheable", True) for c in self.changes)
+
+    def fingerprint(self):
+        """
+        Returns the fingerprint that identifies this law in a ChangeCache.
+        """
+        return self._fingerprint
+
+    def apply(self, word, cache=None):
+        """
+        Applies the changes of the law to a word in order. If a ChangeCache
+        is given, the result is looked up in it first.
+        """
+        if cache is not None:
+            return cache.apply(self, word)
+        return self._apply(word)
+
+    @compact_aware
+    def _apply(self, word):
         new_word = word
         for change in self.changes:
             new_word = change.apply(new_word)
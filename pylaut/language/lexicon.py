@@ -1,4 +1,7 @@
 from pylaut.language.phonology import word, phonology
+from pylaut.language.phonology.compactword import (CompactWord, WordTable,
+                                                   can_store)
+from pylaut.language.phonology.syllabifier import Syllabifier
 import random
 import pathlib
 
@@ -64,8 +67,9 @@ class Lexicon(object):
 
         self.factory = word.WordFactory()
 
-        for entry in self.entries:
-            entry.set_phonetic(self.factory.make_word(entry.ipa))
+        words = self.factory.make_words(e.ipa for e in self.entries)
+        for entry, phonetic in zip(self.entries, words):
+            entry.set_phonetic(phonetic)
 
         for entry in self.entries:
             for syllable in entry.phonetic.syllables:
@@ -79,9 +83,107 @@ class Lexicon(object):
         new.entries = self.entries + other.entries
         return new
 
-    def run_sound_changes(self, changes):
+    def run_sound_changes(self, changes, resyllabify=False, cache=None,
+                          batch=False):
+        """
+        Returns a new Lexicon with the changes applied to every word, in
+        order. Repeated forms are only changed once if a ChangeCache is
+        given.
+
+        If batch is set, the changes are applied to all words at once by a
+        BatchEngine, which is much faster for changes that can be compiled
+        (see the fst module). Words keep their type, Word or CompactWord,
+        but words with contours (see can_store) are Words.
+        """
+        if batch:
+            return self._run_batch(changes, resyllabify)
+        new = Lexicon()
+        new.entries = [
+            e.run_sound_changes(changes, cache) for e in self.entries
+        ]
+        if resyllabify:
+            new = new.resyllabify()
+        return new
+
+    def _run_batch(self, changes, resyllabify):
+        # imported here, since the change modules import this package
+        from pylaut.change.batch import BatchEngine
+
+        if not all(e.phonetic for e in self.entries):
+            raise ValueError("Could not run sound changes: "
+                             "no word objects instantiated.")
+        if not all(isinstance(e.phonetic, CompactWord) or can_store(e.phonetic)
+                   for e in self.entries):
+            # a BatchEngine only takes words without contours
+            return self.run_sound_changes(changes, resyllabify)
+        engine = BatchEngine(self.word_table()).run(changes)
+        new = Lexicon()
+        for entry, phonetic in zip(self.entries, engine.compact_words()):
+            new_entry = LexiconEntry(entry.ipa, entry.orthography, entry.gloss,
+                                     entry.date)
+            if not isinstance(entry.phonetic, CompactWord) and isinstance(
+                    phonetic, CompactWord):
+                phonetic = phonetic.to_word()
+            new_entry.set_phonetic(phonetic)
+            new.add_entry(new_entry)
+        if resyllabify:
+            new = new.resyllabify()
+        return new
+
+    def inventory_closure(self, changes):
+        """
+        Returns an InventoryClosure of changes over the phonemes of the
+        lexicon's phonology: the phones its words can have after each of
+        the changes, and the changes that can never fire on them.
+        """
+        # imported here, since the change modules import this package
+        from pylaut.change.closure import InventoryClosure
+
+        if self.phonology is None:
+            raise ValueError("Could not analyse sound changes: "
+                             "no phonology instantiated.")
+        return InventoryClosure(changes, self.phonology.phonemes)
+
+    def compact(self):
+        """
+        Stores the words of the lexicon as CompactWords, which take a
+        fraction of the memory of Words and can be passed to sound changes
+        all the same. Words with contours (see can_store) are kept as Words.
+        """
+        for entry in self.entries:
+            if (entry.phonetic and not isinstance(entry.phonetic, CompactWord)
+                    and can_store(entry.phonetic)):
+                entry.set_phonetic(CompactWord.from_word(entry.phonetic))
+
+    def word_table(self):
+        """
+        Returns the words of the lexicon, in order, as a WordTable.
+
+        :raises ValueError: If a word has contours.
+        """
+        return WordTable.from_words(e.phonetic for e in self.entries
+                                    if e.phonetic)
+
+    def resyllabify(self, syllabifier=None):
+        """
+        Returns a new Lexicon whose words are divided into syllables afresh,
+        e.g. after a set of sound changes has run. See Syllabifier.
+        """
+        if not all(e.phonetic for e in self.entries):
+            raise ValueError("Could not resyllabify: "
+                             "no word objects instantiated.")
+        if syllabifier is None:
+            syllabifier = Syllabifier(self.phonology)
         new = Lexicon()
-        new.entries = [e.run_sound_changes(changes) for e in self.entries]
+        new.language = self.language
+        new.date = self.date
+        new.phonology = self.phonology
+        words = syllabifier.syllabify_words(e.phonetic for e in self.entries)
+        for entry, phonetic in zip(self.entries, words):
+            new_entry = LexiconEntry(entry.ipa, entry.orthography, entry.gloss,
+                                     entry.date)
+            new_entry.set_phonetic(phonetic)
+            new.add_entry(new_entry)
         return new
 
 
@@ -114,7 +216,7 @@ class LexiconEntry(object):
     def set_date(self, value, system):
         self.date = (value, system)
 
-    def run_sound_changes(self, changes):
+    def run_sound_changes(self, changes, cache=None):
         if not self.phonetic:
             raise ValueError("Could not run sound changes: "
                              "no word objects instantiated.")
@@ -123,6 +225,6 @@ class LexiconEntry(object):
                                self.date)
             w = self.phonetic
             for ch in changes:
-                w = ch.apply(w)
+                w = ch.apply(w, cache)
             new.set_phonetic(w)
             return new
@@ -0,0 +1,298 @@
+"""
+Module defining compact representations of words: CompactWord, a word as
+arrays of phone IDs (see FeatureModel.intern) and syllable offsets, and
+WordTable, many such words in a handful of flat buffers.
+
+Both convert to and from Word, and CompactWords can be passed to Changes
+and SoundLaws directly (see compact_aware). Only internable phones can be
+stored, so a word with contours cannot be (see can_store).
+"""
+
+import functools
+from array import array
+from typing import Iterable, Iterator, List
+
+from pylaut.language.phonology import featureset
+from pylaut.language.phonology.word import Syllable, Word
+
+
+def _phone_ids(phones: Iterable, feature_model) -> List[int]:
+    ids = []
+    for phone in phones:
+        if getattr(phone, "children", None) is not None:
+            raise ValueError("{} is a contour, which cannot be stored in a "
+                             "CompactWord.".format(phone))
+        if phone.feature_model is not feature_model:
+            raise ValueError("{} does not use the feature model of the "
+                             "word.".format(phone))
+        interned = phone.intern()
+        if interned._phone_id is None:
+            raise ValueError("{} cannot be interned.".format(phone))
+        ids.append(interned._phone_id)
+    return ids
+
+
+def phone_set(phone_ids: Iterable[int]) -> int:
+    """
+    Returns a set of phone IDs as a bitset, with bit i set for phone ID i.
+    """
+    bits = 0
+    for phone_id in phone_ids:
+        bits |= 1 << phone_id
+    return bits
+
+
+def can_store(word) -> bool:
+    """
+    Returns whether a Word can be made into a CompactWord, that is, whether
+    it has no contours.
+    """
+    return all(
+        getattr(phone, "children", None) is None for phone in word.phonemes)
+
+
+def _word_model(word, feature_model):
+    if feature_model is not None:
+        return feature_model
+    for phone in word.phonemes:
+        return phone.feature_model
+    return featureset.get_feature_model("monophone")
+
+
+class CompactWord():
+    """
+    A word stored as an array of interned phone IDs, an array of the offsets
+    at which its syllables start, and a bitmap of its stressed syllables
+    (bit i for syllable i).
+
+    CompactWords are equal if their phones, syllables and stress are, and
+    can be used as dictionary keys; they should not be changed.
+
+    :param feature_model: The FeatureModel of the phone IDs.
+    :param phone_ids: The phone IDs.
+    :param syllable_starts: The index of the first phone of each syllable.
+    :param int stress: The stressed syllables.
+    """
+
+    __slots__ = ("feature_model", "phone_ids", "syllable_starts", "stress",
+                 "_phone_set")
+
+    def __init__(self, feature_model, phone_ids: Iterable[int],
+                 syllable_starts: Iterable[int], stress: int = 0):
+        self.feature_model = feature_model
+        self.phone_ids = array("H", phone_ids)
+        self.syllable_starts = array("H", syllable_starts)
+        self.stress = stress
+        self._phone_set = None
+
+    @classmethod
+    def from_word(cls, word: Word, feature_model=None) -> "CompactWord":
+        """
+        Makes a CompactWord from a Word. The feature model is that of the
+        word's phonemes, unless one is given.
+
+        :raises ValueError: If a phoneme of the word is a contour, uses
+                            another feature model or cannot be interned.
+        """
+        feature_model = _word_model(word, feature_model)
+        phone_ids = array("H")
+        starts = array("H")
+        stress = 0
+        for i, syllable in enumerate(word.syllables):
+            starts.append(len(phone_ids))
+            phone_ids.extend(_phone_ids(syllable.phonemes, feature_model))
+            if syllable.is_stressed():
+                stress |= 1 << i
+        return cls(feature_model, phone_ids, starts, stress)
+
+    def to_word(self) -> Word:
+        """
+        Returns the word as a Word. Its phonemes are mutable copies of the
+        interned phones, so that each position of the word holds a distinct
+        object.
+        """
+        phones = self.feature_model._interned_phones
+        ends = list(self.syllable_starts[1:]) + [len(self.phone_ids)]
+        syllables = []
+        for i, (start, end) in enumerate(zip(self.syllable_starts, ends)):
+            syllable = Syllable(
+                [phones[p].copy() for p in self.phone_ids[start:end]])
+            if self.stress >> i & 1:
+                syllable.set_stressed()
+            syllables.append(syllable)
+        if not syllables:
+            syllables.append(Syllable([]))
+        return Word(syllables)
+
+    @property
+    def phonemes(self) -> list:
+        """
+        The interned phones of the word, in order.
+        """
+        phones = self.feature_model._interned_phones
+        return [phones[p] for p in self.phone_ids]
+
+    @property
+    def syllables(self) -> List[Syllable]:
+        """
+        The syllables of the word, built afresh on every access.
+        """
+        return self.to_word().syllables
+
+    def phone_set(self) -> int:
+        """
+        Returns the set of the word's phone IDs as a bitset (bit i for phone
+        ID i), worked out the first time it is asked for.
+        """
+        if self._phone_set is None:
+            self._phone_set = phone_set(self.phone_ids)
+        return self._phone_set
+
+    def __len__(self):
+        return len(self.phone_ids)
+
+    def __repr__(self):
+        phones = self.feature_model._interned_phones
+        ends = list(self.syllable_starts[1:]) + [len(self.phone_ids)]
+        syllables = []
+        for i, (start, end) in enumerate(zip(self.syllable_starts, ends)):
+            symbols = [phones[p].symbol for p in self.phone_ids[start:end]]
+            syllables.append(("'" if self.stress >> i & 1 else "") +
+                             "".join(symbols))
+        return "/" + ".".join(syllables) + "/"
+
+    def __eq__(self, other):
+        return (isinstance(other, CompactWord)
+                and self.feature_model is other.feature_model
+                and self.stress == other.stress
+                and self.phone_ids == other.phone_ids
+                and self.syllable_starts == other.syllable_starts)
+
+    def __hash__(self):
+        return hash((self.phone_ids.tobytes(),
+                     self.syllable_starts.tobytes(), self.stress))
+
+
+def compact_aware(apply):
+    """
+    Decorates a method that takes and returns a Word (such as Change.apply)
+    so that it also takes a CompactWord, converting it to a Word and the
+    result back. A result with contours (see can_store) is returned as a
+    Word.
+    """
+
+    @functools.wraps(apply)
+    def apply_compact(self, word, *args, **kwargs):
+        if isinstance(word, CompactWord):
+            result = apply(self, word.to_word(), *args, **kwargs)
+            if not can_store(result):
+                return result
+            return CompactWord.from_word(result, word.feature_model)
+        return apply(self, word, *args, **kwargs)
+
+    return apply_compact
+
+
+class WordTable():
+    """
+    Many words of one feature model in four flat arrays: the phone IDs of
+    all words, one after the other; the index of each word's first phone;
+    the offsets of the syllables of all words, relative to their word; and
+    the index of each word's first syllable. The stress of each syllable is
+    a bit in a bytearray.
+
+    :param feature_model: The FeatureModel of the phone IDs.
+    """
+
+    def __init__(self, feature_model=None):
+        if feature_model is None:
+            feature_model = featureset.get_feature_model("monophone")
+        self.feature_model = feature_model
+        self.phone_ids = array("H")
+        self.word_starts = array("I")
+        self.syllable_starts = array("H")
+        self.word_syllables = array("I")
+        self.stress = bytearray()
+
+    @classmethod
+    def from_words(cls, words: Iterable, feature_model=None) -> "WordTable":
+        """
+        Makes a WordTable from Words or CompactWords.
+        """
+        words = iter(words)
+        first = next(words, None)
+        if feature_model is None and first is not None:
+            feature_model = first.feature_model if isinstance(
+                first, CompactWord) else _word_model(first, None)
+        table = cls(feature_model)
+        if first is not None:
+            table.append(first)
+            for word in words:
+                table.append(word)
+        return table
+
+    def append(self, word) -> None:
+        """
+        Adds a Word or CompactWord to the end of the table.
+        """
+        if not isinstance(word, CompactWord):
+            word = CompactWord.from_word(word, self.feature_model)
+        elif word.feature_model is not self.feature_model:
+            raise ValueError("{} does not use the feature model of the "
+                             "table.".format(word))
+        self.word_starts.append(len(self.phone_ids))
+        self.word_syllables.append(len(self.syllable_starts))
+        self.phone_ids.extend(word.phone_ids)
+        for i in range(len(word.syllable_starts)):
+            n = len(self.syllable_starts)
+            if n % 8 == 0:
+                self.stress.append(0)
+            if word.stress >> i & 1:
+                self.stress[n // 8] |= 1 << n % 8
+            self.syllable_starts.append(word.syllable_starts[i])
+
+    def __len__(self):
+        return len(self.word_starts)
+
+    def _bounds(self, i: int):
+        n = len(self.word_starts)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("word index out of range")
+        last = i + 1 == n
+        phones_end = len(self.phone_ids) if last else self.word_starts[i + 1]
+        syllables_end = (len(self.syllable_starts)
+                         if last else self.word_syllables[i + 1])
+        return (self.word_starts[i], phones_end, self.word_syllables[i],
+                syllables_end)
+
+    def __getitem__(self, i: int) -> CompactWord:
+        phones_start, phones_end, syl_start, syl_end = self._bounds(i)
+        stress = 0
+        for k, n in enumerate(range(syl_start, syl_end)):
+            if self.stress[n // 8] >> n % 8 & 1:
+                stress |= 1 << k
+        return CompactWord(self.feature_model,
+                           self.phone_ids[phones_start:phones_end],
+                           self.syllable_starts[syl_start:syl_end], stress)
+
+    def __iter__(self) -> Iterator[CompactWord]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def words(self) -> Iterator[Word]:
+        """
+        Yields every word of the table as a Word.
+        """
+        for word in self:
+            yield word.to_word()
+
+    def nbytes(self) -> int:
+        """
+        Returns the size of the table's buffers in bytes.
+        """
+        return (sum(a.itemsize * len(a)
+                    for a in (self.phone_ids, self.word_starts,
+                              self.syllable_starts, self.word_syllables)) +
+                len(self.stress))
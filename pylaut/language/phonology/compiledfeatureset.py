@@ -0,0 +1,351 @@
+"""
+Module for compiling feature sets into a binary file that FeatureModels can
+memory-map instead of parsing the text tables on every load.
+
+A compiled feature set is stored next to its feature set file, with the
+suffix SUFFIX. It is laid out as follows, all integers little-endian:
+
+* a header (see _HEADER) with the offsets of the other sections
+* a JSON block with the feature names, the diacritic table, the names of
+  the IPA lookup files and the size, modification time and CRC-32 of every
+  text file it was compiled from
+* one fixed-size record per IPA symbol, in the order of the IPA file (see
+  _ROW): the symbol's position in the string heap, its packed feature
+  vector, and, for rows that cannot be packed (values other than +, - and 0,
+  or the wrong number of values), the position of its raw values
+* the row numbers sorted by symbol, for binary search
+* a heap of UTF-8 strings
+
+Compile a feature set with compile_feature_set, or from the command line:
+
+    python -m pylaut.language.phonology.compiledfeatureset monophone [path]
+"""
+
+import json
+import mmap
+import os
+import pathlib
+import struct
+import sys
+import zlib
+from collections.abc import ItemsView, Mapping
+from typing import Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+MAGIC = b"PLFS"
+VERSION = 1
+SUFFIX = ".fsb"
+
+# magic, version, bytes per feature mask, number of features, number of rows,
+# offset and length of the JSON block, offsets of rows, index and heap
+_HEADER = struct.Struct("<4sHHIIIIIII")
+# symbol offset and length, raw values offset (_PACKED if packed) and length
+_ROW = struct.Struct("<IIII")
+_PACKED = 0xFFFFFFFF
+_INDEX = struct.Struct("<I")
+
+
+class CompiledFeatureSetError(Exception):
+    pass
+
+
+def compiled_path(feature_set_file_name: str,
+                  dir_path: pathlib.Path) -> pathlib.Path:
+    """
+    Returns the path of the compiled version of a feature set.
+    """
+    return pathlib.Path(dir_path) / (feature_set_file_name + SUFFIX)
+
+
+def _source_stamp(fpath: pathlib.Path) -> List:
+    st = os.stat(fpath)
+    with open(fpath, "rb") as inf:
+        crc = zlib.crc32(inf.read())
+    return [fpath.name, st.st_size, st.st_mtime_ns, crc]
+
+
+def compile_feature_set(feature_set_file_name: str,
+                        feature_set_path: Optional[str] = None,
+                        out_path: Optional[str] = None) -> pathlib.Path:
+    """
+    Compiles a feature set and its IPA lookup tables into a binary file.
+
+    :param str feature_set_file_name: The feature set file name.
+    :param Optional[str] feature_set_path: The directory to load from; the
+                                           package data if not given.
+    :param Optional[str] out_path: Where to write the compiled file. Defaults
+                                   to the feature set's own directory, which
+                                   is where FeatureModel looks for it.
+    :returns: The path of the compiled file.
+    :return-type: pathlib.Path
+    """
+    # imported here, since featureset imports this module
+    from pylaut.language.phonology.featureset import FeatureModel
+
+    model = FeatureModel(feature_set_file_name,
+                         feature_set_path,
+                         use_compiled=False)
+    sources = [_source_stamp(fpath) for fpath in model.source_files()]
+    if out_path is None:
+        out_path = compiled_path(feature_set_file_name,
+                                 model.source_files()[0].parent)
+    out_path = pathlib.Path(out_path)
+
+    n_features = len(model.features)
+    mask_bytes = (n_features + 7) // 8
+    row_size = _ROW.size + 2 * mask_bytes
+
+    meta = json.dumps({
+        "features": model.features,
+        "ipa_file": model._ipa_file_name,
+        "ipa_dcs_file": model._ipa_dcs_file_name,
+        "ipa_lookup": model._feature_set_ipa_lookup,
+        "diacritics": [[dc, sorted(feats)]
+                       for dc, feats in model._ipa_diacritics.items()],
+        "sources": sources,
+    }).encode("utf-8")
+
+    heap = bytearray()
+
+    def add_string(s):
+        encoded = s.encode("utf-8")
+        offset = len(heap)
+        heap.extend(encoded)
+        return offset, len(encoded)
+
+    rows = bytearray()
+    symbols = []
+    for symbol, feature_list in model._ipa_dict.items():
+        sym_off, sym_len = add_string(symbol)
+        raw_off, raw_len = _PACKED, 0
+        specified, positive = 0, 0
+        try:
+            specified, positive = model.encode_features(feature_list)
+        except ValueError:
+            raw_off, raw_len = add_string(" ".join(feature_list))
+        rows += _ROW.pack(sym_off, sym_len, raw_off, raw_len)
+        rows += specified.to_bytes(mask_bytes, "little")
+        rows += positive.to_bytes(mask_bytes, "little")
+        symbols.append(symbol.encode("utf-8"))
+
+    order = sorted(range(len(symbols)), key=symbols.__getitem__)
+    index = b"".join(_INDEX.pack(i) for i in order)
+
+    meta_off = _HEADER.size
+    rows_off = meta_off + len(meta)
+    index_off = rows_off + len(rows)
+    heap_off = index_off + len(index)
+    header = _HEADER.pack(MAGIC, VERSION, mask_bytes, n_features,
+                          len(symbols), meta_off, len(meta), rows_off,
+                          index_off, heap_off)
+    assert len(rows) == row_size * len(symbols)
+
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    with open(tmp_path, "wb") as outf:
+        outf.write(header + meta + rows + index + heap)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+class CompiledFeatureSet():
+    """
+    A memory-mapped compiled feature set. The file's pages are shared by
+    every process that maps it; rows are only decoded when they are used.
+    """
+
+    def __init__(self, fpath: pathlib.Path):
+        self.path = pathlib.Path(fpath)
+        with open(self.path, "rb") as inf:
+            self._map = mmap.mmap(inf.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = self._map
+        if len(buf) < _HEADER.size:
+            raise CompiledFeatureSetError(
+                "{} is not a compiled feature set.".format(self.path))
+        (magic, version, self._mask_bytes, self.n_features, self.n_rows,
+         meta_off, meta_len, self._rows_off, self._index_off,
+         self._heap_off) = _HEADER.unpack_from(buf, 0)
+        if magic != MAGIC:
+            raise CompiledFeatureSetError(
+                "{} is not a compiled feature set.".format(self.path))
+        if version != VERSION:
+            raise CompiledFeatureSetError(
+                "{} has version {}, should be {}.".format(
+                    self.path, version, VERSION))
+        self._row_size = _ROW.size + 2 * self._mask_bytes
+
+        meta = json.loads(buf[meta_off:meta_off + meta_len].decode("utf-8"))
+        self.features = meta["features"]
+        self.ipa_file_name = meta["ipa_file"]
+        self.ipa_dcs_file_name = meta["ipa_dcs_file"]
+        self.ipa_lookup = meta["ipa_lookup"]
+        self.diacritics: Dict[str, FrozenSet[str]] = {
+            dc: frozenset(feats)
+            for dc, feats in meta["diacritics"]
+        }
+        self.sources = meta["sources"]
+
+    def close(self) -> None:
+        self._map.close()
+
+    def is_current(self, dir_path: pathlib.Path) -> bool:
+        """
+        Returns False if any of the text files this was compiled from has
+        changed. Files that do not exist are ignored, so a compiled feature
+        set can be shipped without its sources.
+        """
+        for name, size, mtime_ns, crc in self.sources:
+            fpath = pathlib.Path(dir_path) / name
+            try:
+                st = os.stat(fpath)
+            except OSError:
+                continue
+            if st.st_size != size:
+                return False
+            if st.st_mtime_ns != mtime_ns:
+                # e.g. after a fresh checkout; fall back to the contents
+                with open(fpath, "rb") as inf:
+                    if zlib.crc32(inf.read()) != crc:
+                        return False
+        return True
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._heap_off + offset
+        return self._map[start:start + length].decode("utf-8")
+
+    def _row(self, i: int) -> Tuple[int, int, int, int, int, int]:
+        """
+        Returns the symbol offset and length, the raw values offset and
+        length, and the packed masks of row i.
+        """
+        start = self._rows_off + i * self._row_size
+        sym_off, sym_len, raw_off, raw_len = _ROW.unpack_from(
+            self._map, start)
+        start += _ROW.size
+        mid = start + self._mask_bytes
+        specified = int.from_bytes(self._map[start:mid], "little")
+        positive = int.from_bytes(self._map[mid:mid + self._mask_bytes],
+                                  "little")
+        return sym_off, sym_len, raw_off, raw_len, specified, positive
+
+    def symbol(self, i: int) -> str:
+        sym_off, sym_len = _ROW.unpack_from(
+            self._map, self._rows_off + i * self._row_size)[:2]
+        return self._string(sym_off, sym_len)
+
+    def vector(self, i: int) -> Optional[Tuple[int, int]]:
+        """
+        Returns the packed feature vector of row i, or None if the row could
+        not be packed.
+        """
+        _, _, raw_off, _, specified, positive = self._row(i)
+        if raw_off != _PACKED:
+            return None
+        return specified, positive
+
+    def feature_list(self, i: int) -> List[str]:
+        """
+        Returns the feature values of row i as they were in the IPA file.
+        """
+        _, _, raw_off, raw_len, specified, positive = self._row(i)
+        if raw_off != _PACKED:
+            return self._string(raw_off, raw_len).split()
+        values = []
+        for n in range(self.n_features):
+            if not specified >> n & 1:
+                values.append("0")
+            elif positive >> n & 1:
+                values.append("+")
+            else:
+                values.append("-")
+        return values
+
+    def packed_rows(self) -> Iterator[Tuple[str, Optional[Tuple[int, int]],
+                                            Optional[List[str]]]]:
+        """
+        Yields (symbol, packed vector, None) for every row, or (symbol, None,
+        feature list) for rows that could not be packed.
+        """
+        for i in range(self.n_rows):
+            (sym_off, sym_len, raw_off, raw_len, specified,
+             positive) = self._row(i)
+            symbol = self._string(sym_off, sym_len)
+            if raw_off == _PACKED:
+                yield symbol, (specified, positive), None
+            else:
+                yield symbol, None, self._string(raw_off, raw_len).split()
+
+    def find(self, symbol: str) -> Optional[int]:
+        """
+        Returns the row number of a symbol, or None if there is none.
+        """
+        key = symbol.encode("utf-8")
+        lo, hi = 0, self.n_rows
+        while lo < hi:
+            mid = (lo + hi) // 2
+            row = _INDEX.unpack_from(self._map,
+                                     self._index_off + mid * _INDEX.size)[0]
+            sym_off, sym_len = _ROW.unpack_from(
+                self._map, self._rows_off + row * self._row_size)[:2]
+            start = self._heap_off + sym_off
+            probe = self._map[start:start + sym_len]
+            if probe == key:
+                return row
+            elif probe < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def table(self) -> "IpaTable":
+        return IpaTable(self)
+
+
+class _IpaTableItems(ItemsView):
+    def __iter__(self):
+        compiled = self._mapping._compiled
+        for i in range(compiled.n_rows):
+            yield compiled.symbol(i), compiled.feature_list(i)
+
+
+class IpaTable(Mapping):
+    """
+    A read-only mapping from IPA symbols to feature lists, backed by a
+    CompiledFeatureSet, that stands in for FeatureModel._ipa_dict. Iterates
+    in the order of the IPA file.
+    """
+
+    def __init__(self, compiled: CompiledFeatureSet):
+        self._compiled = compiled
+
+    def __getitem__(self, symbol):
+        if not isinstance(symbol, str):
+            raise KeyError(symbol)
+        i = self._compiled.find(symbol)
+        if i is None:
+            raise KeyError(symbol)
+        return self._compiled.feature_list(i)
+
+    def __contains__(self, symbol):
+        return isinstance(symbol, str) and \
+            self._compiled.find(symbol) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self._compiled.n_rows):
+            yield self._compiled.symbol(i)
+
+    def __len__(self):
+        return self._compiled.n_rows
+
+    def items(self):
+        return _IpaTableItems(self)
+
+
+def main(argv: List[str]) -> None:
+    if not 1 <= len(argv) <= 2:
+        print("usage: python -m pylaut.language.phonology.compiledfeatureset "
+              "FEATURE_SET [PATH]")
+        sys.exit(2)
+    print(compile_feature_set(*argv))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,288 @@
+"""
+Module defining FeatureMatrix, a table of packed feature vectors (see
+FeatureModel.encode_features) for answering queries about many segments at
+once: which are in a natural class, which features single out a set of them,
+and how far apart they all are.
+
+Besides the rows, the matrix keeps one bitset per feature and value, with
+bit i set if row i has that value, so a query over the whole table is a
+handful of operations on Python ints rather than a loop over segments.
+"""
+
+import itertools
+from array import array
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import pylaut.utils as utils
+
+
+class FeatureMatrix():
+    """
+    A matrix with one row per segment and one column per feature of a
+    feature model.
+
+    Rows are labelled, e.g. with IPA symbols (FeatureModel.feature_matrix)
+    or with Phones (from_phones); queries return labels in row order.
+    `values` holds the matrix itself, row-major, as an array of signed bytes:
+    1 for +, -1 for - and 0 for unspecified features.
+
+    :param feature_model: The FeatureModel the rows are encoded in.
+    :param labels: One label per row.
+    :param vectors: One (specified, positive) pair of bitmasks per row.
+    """
+
+    # the most feature combinations minimal_specification tries when
+    # searching for a shorter specification than the greedy one
+    MAX_SPECIFICATION_SEARCH = 1 << 17
+
+    def __init__(self, feature_model, labels: Sequence[Hashable],
+                 vectors: Sequence[Tuple[int, int]]):
+        if len(labels) != len(vectors):
+            raise ValueError("{} labels given for {} rows.".format(
+                len(labels), len(vectors)))
+        self.feature_model = feature_model
+        self.features = list(feature_model.features)
+        self.labels = list(labels)
+        self.specified = [v[0] for v in vectors]
+        self.positive = [v[1] for v in vectors]
+        self._rows = {label: i for i, label in enumerate(self.labels)}
+
+        n_features = len(self.features)
+        self._all_rows = (1 << len(self.labels)) - 1
+
+        self.values = array("b", bytes(len(self.labels) * n_features))
+        # feature index -> rows with + / - / 0 for it
+        plus = [0] * n_features
+        minus = [0] * n_features
+        for i, (specified, positive) in enumerate(vectors):
+            row_bit = 1 << i
+            offset = i * n_features
+            for f in range(n_features):
+                if positive >> f & 1:
+                    plus[f] |= row_bit
+                    self.values[offset + f] = 1
+                elif specified >> f & 1:
+                    minus[f] |= row_bit
+                    self.values[offset + f] = -1
+        self._plus = plus
+        self._minus = minus
+        self._null = [self._all_rows ^ (p | m) for p, m in zip(plus, minus)]
+
+    @classmethod
+    def from_phones(cls, phones: Iterable, feature_model=None):
+        """
+        Builds a matrix with one row per phone, labelled with the phone
+        itself. All phones must use the same features as the feature model.
+        """
+        phones = list(phones)
+        if feature_model is None:
+            if not phones:
+                raise ValueError("Cannot infer the feature model of an empty "
+                                 "matrix.")
+            feature_model = phones[0].feature_model
+        for phone in phones:
+            features = phone.feature_model.features
+            if (phone.feature_model is not feature_model
+                    and features != feature_model.features):
+                raise ValueError("{} does not use the feature model of the "
+                                 "matrix.".format(phone))
+        return cls(feature_model, phones,
+                   [(ph._specified, ph._positive) for ph in phones])
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __contains__(self, label):
+        return label in self._rows
+
+    def row(self, label) -> array:
+        """
+        Returns the values of a row as an array of 1, -1 and 0.
+        """
+        n_features = len(self.features)
+        i = self._rows[label]
+        return self.values[i * n_features:(i + 1) * n_features]
+
+    def column(self, feature: str) -> array:
+        """
+        Returns the values of a feature for every row.
+        """
+        f = self.features.index(feature)
+        return self.values[f::len(self.features)]
+
+    def subset(self, labels: Iterable[Hashable]) -> "FeatureMatrix":
+        """
+        Returns a matrix containing only the given rows, in the given order.
+        """
+        rows = [self._rows[label] for label in labels]
+        return FeatureMatrix(self.feature_model,
+                             [self.labels[i] for i in rows],
+                             [(self.specified[i], self.positive[i])
+                              for i in rows])
+
+    def _labels_of(self, rows: int) -> List[Hashable]:
+        labels = []
+        while rows:
+            low = rows & -rows
+            labels.append(self.labels[low.bit_length() - 1])
+            rows ^= low
+        return labels
+
+    def _rows_of(self, labels: Iterable[Hashable]) -> int:
+        rows = 0
+        for label in labels:
+            rows |= 1 << self._rows[label]
+        return rows
+
+    def _class_rows(self, feature_dict: Dict[str, str]) -> int:
+        care, specified, positive = self.feature_model.natural_class_masks(
+            feature_dict)
+        rows = self._all_rows
+        while care and rows:
+            low = care & -care
+            f = low.bit_length() - 1
+            if positive & low:
+                rows &= self._plus[f]
+            elif specified & low:
+                rows &= self._minus[f]
+            else:
+                rows &= self._null[f]
+            care ^= low
+        return rows
+
+    def select(self, feature_dict: Dict[str, str]) -> List[Hashable]:
+        """
+        Returns the labels of all rows in the natural class described by a
+        dictionary of feature values, e.g. {"consonantal": "+",
+        "voice": "-"}.
+
+        :param Dict[str, str] feature_dict: The feature values.
+        :returns: The matching labels, in row order.
+        :return-type: List[Hashable]
+        """
+        return self._labels_of(self._class_rows(feature_dict))
+
+    def count(self, feature_dict: Dict[str, str]) -> int:
+        """
+        Returns the number of rows in a natural class.
+        """
+        return utils.popcount(self._class_rows(feature_dict))
+
+    def minimal_specification(self, labels: Iterable[Hashable]
+                              ) -> Optional[Dict[str, str]]:
+        """
+        Returns a smallest dictionary of feature values that the given rows
+        all have and no other row has, i.e. the shortest description of
+        them as a natural class within this matrix. Ties are broken in
+        favour of features earlier in the feature set.
+
+        If the search space is too large (see MAX_SPECIFICATION_SEARCH),
+        the result is found greedily and may not be the smallest.
+
+        :param Iterable[Hashable] labels: The rows to describe.
+        :returns: The feature values, or None if the rows are not a natural
+                  class within this matrix.
+        :return-type: Optional[Dict[str, str]]
+        """
+        members = self._rows_of(labels)
+        if not members:
+            raise ValueError("Cannot specify an empty set of rows.")
+        outsiders = self._all_rows ^ members
+
+        # features on which all the members agree, with the rows each one
+        # rules out
+        candidates = []
+        for f, feature in enumerate(self.features):
+            for value, rows in (("+", self._plus[f]), ("-", self._minus[f])):
+                if members & rows == members:
+                    candidates.append((feature, value,
+                                       outsiders & ~rows))
+        covered = 0
+        for _, _, excluded in candidates:
+            covered |= excluded
+        if covered != outsiders:
+            return None
+        if not outsiders:
+            return {}
+
+        # a greedy cover gives an upper bound
+        greedy = []
+        remaining = outsiders
+        while remaining:
+            best = max(candidates,
+                       key=lambda c: utils.popcount(c[2] & remaining))
+            greedy.append(best)
+            remaining &= ~best[2]
+        best = greedy
+
+        # look for anything shorter, smallest sizes first
+        tried = 0
+        for size in range(1, len(greedy)):
+            found = None
+            for combination in itertools.combinations(candidates, size):
+                tried += 1
+                if tried > self.MAX_SPECIFICATION_SEARCH:
+                    break
+                excluded = 0
+                for _, _, rows in combination:
+                    excluded |= rows
+                if excluded == outsiders:
+                    found = combination
+                    break
+            if found is not None:
+                best = found
+                break
+            if tried > self.MAX_SPECIFICATION_SEARCH:
+                break
+
+        order = {feature: f for f, feature in enumerate(self.features)}
+        return {
+            feature: value
+            for feature, value, _ in sorted(best, key=lambda c: order[c[0]])
+        }
+
+    def distance_matrix(self) -> List[array]:
+        """
+        Returns the pairwise Hamming distances between the rows, i.e. the
+        number of features in which each pair of rows differs, as one array
+        of unsigned bytes per row.
+
+        The distances from a row to all the others are summed feature by
+        feature in bit-sliced form: bit i of the k-th counter holds bit k of
+        row i's running distance, so each feature costs a few operations on
+        ints with one bit per row.
+        """
+        n_rows = len(self.labels)
+        n_features = len(self.features)
+        if n_features > 255:
+            raise ValueError("Too many features for a byte distance matrix.")
+        n_counters = max(1, n_features.bit_length())
+        # spreads the bits of a counter into one byte per row: '0' -> 0 and
+        # '1' -> the counter's weight
+        spread = [
+            bytes.maketrans(b"01", bytes([0, 1 << k]))
+            for k in range(n_counters)
+        ]
+        columns = list(zip(self._plus, self._minus, self._null))
+
+        matrix = []
+        for i in range(n_rows):
+            counters = [0] * n_counters
+            offset = i * n_features
+            for f in range(n_features):
+                value = self.values[offset + f]
+                same = columns[f][0 if value == 1 else 1 if value == -1 else 2]
+                carry = self._all_rows ^ same
+                for k in range(n_counters):
+                    if not carry:
+                        break
+                    counters[k], carry = (counters[k] ^ carry,
+                                          counters[k] & carry)
+            distances = 0
+            for k, counter in enumerate(counters):
+                if counter:
+                    bits = format(counter, "0{}b".format(n_rows))[::-1]
+                    distances |= int.from_bytes(
+                        bits.encode("ascii").translate(spread[k]), "little")
+            matrix.append(array("B", distances.to_bytes(n_rows, "little")))
+        return matrix
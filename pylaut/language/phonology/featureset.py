@@ -6,11 +6,36 @@ of providing basic infrastructure.
 """
 
 import json
+import os
 import pathlib
 import pkgutil
-from typing import List, Optional, Tuple
+import threading
+import time
+import warnings
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import pylaut.utils as utils
+from pylaut.language.phonology import compiledfeatureset
+from pylaut.language.phonology.featurematrix import FeatureMatrix
+from pylaut.language.phonology.ipatokeniser import IpaTokeniser
+from pylaut.language.phonology.symbolsearch import SymbolSearch
+
+# the directory the package feature sets are loaded from by pkgutil
+_PACKAGE_DATA_PATH = pathlib.Path(__file__).resolve().parents[2] / 'data'
+
+
+class FeatureSetWarning(UserWarning):
+    """
+    A warning issued when a feature set is loaded that has problems which do
+    not prevent its use, e.g. symbols that do not contrast.
+    """
+
+
+class NoSymbolError(Exception):
+    """
+    Raised when no IPA symbol, even with diacritics, can be found for a set
+    of features.
+    """
 
 
 class FeatureModel():
@@ -35,10 +60,15 @@ class FeatureModel():
 
     @staticmethod
     def jdefault(o):
-        if isinstance(o, set):
+        if isinstance(o, (set, frozenset)):
             return list(o)
+        if isinstance(o, compiledfeatureset.IpaTable):
+            return dict(o.items())
 
-    def __init__(self, feature_set_file_name, feature_set_path=None):
+    def __init__(self,
+                 feature_set_file_name,
+                 feature_set_path=None,
+                 use_compiled=True):
 
         # stores whether the feature set defines an IPA lookup table
         self._feature_set_ipa_lookup = False
@@ -46,13 +76,60 @@ class FeatureModel():
         self._feature_set_file_name = feature_set_file_name
         self._feature_set_path = feature_set_path
 
+        # whether to load a compiled version of the feature set, if there is
+        # an up-to-date one, and the CompiledFeatureSet loaded, if any
+        self._use_compiled = use_compiled
+        self._compiled = None
+
+        # names of the IPA lookup files, as given in the feature set header
+        self._ipa_file_name = None
+        self._ipa_dcs_file_name = None
+
         # self.features is a canonical order for features
         self.features = list()
         self._ipa_dict = dict()
         self._ipa_diacritics = dict()
 
+        # feature name -> bit in the packed feature vectors, see
+        # encode_features
+        self._feature_bits = dict()
+        # cache of natural class masks, see natural_class_masks
+        self._natural_classes = dict()
+
+        # feature tuple -> IPA symbol, see _build_ipa_index
+        self._ipa_index = dict()
+        # the same for packed feature vectors
+        self._ipa_vector_index = dict()
+        # search structure for symbols needing diacritics, built on demand
+        self._symbol_search = None
+        # FeatureMatrix of the IPA table, built on demand
+        self._feature_matrix = None
+        # IpaTokeniser for the IPA table, built on demand
+        self._tokeniser = None
+        # (kept symbol, duplicate symbol) pairs of non-contrasting symbols
+        self.duplicate_symbols = list()
+
+        # interned phones, see intern
+        self._interned = dict()
+        self._interned_phones = list()
+        self._feature_edits = dict()
+        self._intern_lock = threading.Lock()
+
+        # per-vector classification tables, see property_table
+        self._property_tables = dict()
+        # canonical feature vectors, see shared_vector
+        self._shared_vectors = dict()
+
         self.load_feature_set()
 
+    def __copy__(self):
+        # FeatureModels are shared between all the Phones using them (see
+        # FeatureModelRegistry), so copying a Phone must not copy its model
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
     def _load_feature_set_file(self, fname: str,
                                dir_path: Optional[str]) -> str:
         """
@@ -115,6 +192,9 @@ class FeatureModel():
         else:
             ipa_dcs_file_name = None
 
+        self._ipa_file_name = ipa_file_name
+        self._ipa_dcs_file_name = ipa_dcs_file_name
+
         if not dir_path:
             try:
                 ipa_file = pkgutil.get_data(
@@ -145,11 +225,63 @@ class FeatureModel():
 
         return ipa_file, ipa_dcs_file
 
+    def _data_dir(self) -> pathlib.Path:
+        if self._feature_set_path:
+            return pathlib.Path(self._feature_set_path)
+        return _PACKAGE_DATA_PATH
+
+    def compiled_file(self) -> pathlib.Path:
+        """
+        Returns the path at which a compiled version of this feature set
+        would be found (see compiledfeatureset).
+        """
+        return compiledfeatureset.compiled_path(self._feature_set_file_name,
+                                                self._data_dir())
+
+    def _load_compiled_feature_set(self) -> bool:
+        """
+        Loads the feature set from its compiled version, if there is one and
+        it is not older than the text files. The IPA table is memory-mapped
+        rather than read into a dict.
+
+        :returns: Whether the compiled version was used.
+        :return-type: bool
+        """
+        fpath = self.compiled_file()
+        if not fpath.is_file():
+            return False
+        try:
+            compiled = compiledfeatureset.CompiledFeatureSet(fpath)
+        except (OSError, ValueError,
+                compiledfeatureset.CompiledFeatureSetError) as e:
+            warnings.warn(
+                "Ignoring compiled feature set {}: {}".format(fpath, e),
+                FeatureSetWarning)
+            return False
+        if not compiled.is_current(self._data_dir()):
+            compiled.close()
+            return False
+
+        self._compiled = compiled
+        self._ipa_file_name = compiled.ipa_file_name
+        self._ipa_dcs_file_name = compiled.ipa_dcs_file_name
+        self._feature_set_ipa_lookup = compiled.ipa_lookup
+        self.features = list(compiled.features)
+        self._build_feature_index()
+        self._ipa_dict = compiled.table()
+        self._ipa_diacritics = dict(compiled.diacritics)
+        self._build_ipa_index()
+        return True
+
     def load_feature_set(self) -> None:
         """
         Loads a feature set from disk, parses its files and
         stores the relevant properties in the FeatureModel object.
+        Uses a compiled version of the feature set instead, if there is an
+        up-to-date one and use_compiled was not set to False.
         """
+        if self._use_compiled and self._load_compiled_feature_set():
+            return
 
         feature_set_raw = self._load_feature_set_file(
             self._feature_set_file_name, self._feature_set_path)
@@ -166,6 +298,7 @@ class FeatureModel():
 
         # assign properties
         self.features = feature_set
+        self._build_feature_index()
 
         # does the feature set specify ipa lookup?
         if self._feature_set_ipa_lookup and not self._ipa_dict:
@@ -194,20 +327,340 @@ class FeatureModel():
                                 feature_set_ipa_dc[0]] = frozenset(
                                     feature_set_ipa_dc[1:])
 
+        self._build_ipa_index()
+
+    def _build_ipa_index(self, warn: bool = True) -> None:
+        """
+        Builds the reverse lookup tables from packed feature vectors (or, for
+        rows that cannot be packed, feature tuples) to IPA symbols used by
+        is_good_ipa. Symbols whose features are identical to those of
+        an earlier symbol do not contrast; the earlier symbol is used for
+        lookups, and the pairs are recorded in self.duplicate_symbols. Rows
+        that do not have a value for every feature can never match a phone
+        and are left out. Both problems are reported with a
+        FeatureSetWarning, unless warn is False.
+        """
+        self._ipa_index = dict()
+        self._ipa_vector_index = dict()
+        self._symbol_search = None
+        self._feature_matrix = None
+        self._tokeniser = None
+        self.duplicate_symbols = list()
+        malformed = list()
+        if self._compiled is not None:
+            rows = self._compiled.packed_rows()
+        else:
+            rows = self._packed_rows()
+        for symbol, vector, feature_list in rows:
+            if vector is not None:
+                index, key = self._ipa_vector_index, vector
+            elif len(feature_list) == len(self.features):
+                # e.g. PHOIBLE contour values, which no Phone can have
+                index, key = self._ipa_index, tuple(feature_list)
+            else:
+                malformed.append(symbol)
+                continue
+            if key in index:
+                self.duplicate_symbols.append((index[key], symbol))
+                continue
+            index[key] = symbol
+
+        if not warn:
+            return
+        if malformed:
+            warnings.warn(
+                "Feature set '{}': symbols without a value for every "
+                "feature: {}".format(self._feature_set_file_name,
+                                     " ".join(malformed)), FeatureSetWarning)
+        if self.duplicate_symbols:
+            warnings.warn(
+                "Feature set '{}': {} symbols do not contrast with an earlier "
+                "symbol and will never be produced: {}".format(
+                    self._feature_set_file_name, len(self.duplicate_symbols),
+                    " ".join("{}={}".format(k, d)
+                             for k, d in self.duplicate_symbols)),
+                FeatureSetWarning)
+
+    def feature_matrix(self) -> FeatureMatrix:
+        """
+        Returns a FeatureMatrix with one row per IPA symbol of the feature
+        set, labelled with the symbol, for queries over the whole set, e.g.
+        feature_matrix().select({"consonantal": "+", "voice": "-"}).
+        Symbols whose features cannot be packed (e.g. PHOIBLE contours) are
+        left out.
+        """
+        if self._feature_matrix is None:
+            if self._compiled is not None:
+                rows = self._compiled.packed_rows()
+            else:
+                rows = self._packed_rows()
+            rows = [(symbol, vector) for symbol, vector, _ in rows
+                    if vector is not None]
+            self._feature_matrix = FeatureMatrix(self,
+                                                 [r[0] for r in rows],
+                                                 [r[1] for r in rows])
+        return self._feature_matrix
+
+    def tokeniser(self) -> IpaTokeniser:
+        """
+        Returns an IpaTokeniser that splits IPA strings into the segments of
+        this feature set, with the longest base symbols and all their
+        diacritics.
+        """
+        if self._tokeniser is None:
+            self._tokeniser = IpaTokeniser(self._ipa_dict.keys(),
+                                           self._ipa_diacritics.keys())
+        return self._tokeniser
+
+    def _packed_rows(self):
+        """
+        Yields (symbol, packed vector, None) for every row of the IPA table,
+        or (symbol, None, feature list) for rows that cannot be packed.
+        """
+        for symbol, feature_list in self._ipa_dict.items():
+            try:
+                yield symbol, self.encode_features(feature_list), None
+            except ValueError:
+                yield symbol, None, feature_list
+
+    def _build_feature_index(self) -> None:
+        """
+        Assigns every feature its bit in the packed feature vectors, in
+        canonical order.
+        """
+        self._feature_bits = {f: 1 << i for i, f in enumerate(self.features)}
+        self._natural_classes = dict()
+
+    def encode_features(self, feature_list: List[str]) -> Tuple[int, int]:
+        """
+        Packs a feature list into two bitmasks laid out in canonical feature
+        order: the first has a bit set for every feature that is specified
+        (+ or -), the second for every feature that is +. Null features
+        have neither bit set.
+
+        :param List[str] feature_list: Feature values in canonical order.
+        :returns: A (specified, positive) tuple of bitmasks.
+        :return-type: Tuple[int, int]
+        """
+        if len(feature_list) != len(self.features):
+            raise ValueError("Feature list has {} values, but the feature "
+                             "set has {} features.".format(
+                                 len(feature_list), len(self.features)))
+        specified, positive = 0, 0
+        bit = 1
+        for value in feature_list:
+            if value == self._TRUE_FEATURE:
+                specified |= bit
+                positive |= bit
+            elif value == self._FALSE_FEATURE:
+                specified |= bit
+            elif value != self._NULL_FEATURE and value is not None:
+                raise ValueError(
+                    "'{}' not a valid feature value.".format(value))
+            bit <<= 1
+        return specified, positive
+
+    def decode_features(self, specified: int, positive: int) -> List[str]:
+        """
+        Unpacks a (specified, positive) pair of bitmasks into a feature list
+        in canonical order. The inverse of encode_features.
+
+        :param int specified: The mask of specified features.
+        :param int positive: The mask of positive features.
+        :returns: The feature values in canonical order.
+        :return-type: List[str]
+        """
+        feature_list = []
+        bit = 1
+        for _ in self.features:
+            if positive & bit:
+                feature_list.append(self._TRUE_FEATURE)
+            elif specified & bit:
+                feature_list.append(self._FALSE_FEATURE)
+            else:
+                feature_list.append(self._NULL_FEATURE)
+            bit <<= 1
+        return feature_list
+
+    def natural_class_masks(self, feature_dict: Dict[str, str]
+                            ) -> Tuple[int, int, int]:
+        """
+        Turns a dictionary of feature values describing a natural class into
+        a (care, specified, positive) triple of bitmasks. A packed feature
+        vector (s, p) belongs to the class iff
+        s & care == specified and p & care == positive.
+        Results are cached per feature dictionary.
+
+        :param Dict[str, str] feature_dict: Feature names and values.
+        :returns: The masks describing the class.
+        :return-type: Tuple[int, int, int]
+        """
+        key = frozenset(feature_dict.items())
+        try:
+            return self._natural_classes[key]
+        except KeyError:
+            pass
+        care, specified, positive = 0, 0, 0
+        for feature, value in feature_dict.items():
+            bit = self._feature_bits.get(feature)
+            if bit is None:
+                raise Exception("{} not a valid feature.".format(feature))
+            if value == self._TRUE_FEATURE:
+                specified |= bit
+                positive |= bit
+            elif value == self._FALSE_FEATURE:
+                specified |= bit
+            elif value != self._NULL_FEATURE:
+                raise Exception("{} not a valid feature value.".format(value))
+            care |= bit
+        masks = (care, specified, positive)
+        self._natural_classes[key] = masks
+        return masks
+
+    def packed_hamming(self, specified_a: int, positive_a: int,
+                       specified_b: int, positive_b: int) -> int:
+        """
+        Returns the mask of features in which two packed feature vectors
+        differ. Its popcount is the Hamming distance between the vectors.
+        """
+        return (specified_a ^ specified_b) | (positive_a ^ positive_b)
+
+    def intern(self, phone):
+        """
+        Returns the canonical, immutable phone of this feature model that has
+        the same class and features as `phone`. The first phone interned for
+        a feature vector becomes (a frozen copy of) the canonical one, with
+        its symbol set from its features, and is assigned a phone ID, its
+        index in the table of interned phones. Interned phones may be shared
+        freely, and compared by identity.
+
+        Phones are interned by their class and features only, so phones
+        that differ only in their symbol (such as one whose symbol was set
+        by hand) share the canonical phone, whose symbol is the one the
+        model gives those features. Only if there is none is the symbol of
+        the first phone interned kept.
+
+        :param Phone phone: A phone using this feature model.
+        :returns: The interned phone.
+        :return-type: Phone
+        """
+        if phone._phone_id is not None or not phone._internable:
+            return phone
+        key = (type(phone), phone._specified, phone._positive)
+        interned = self._interned.get(key)
+        if interned is not None:
+            return interned
+        with self._intern_lock:
+            interned = self._interned.get(key)
+            if interned is None:
+                interned = phone.copy()
+                # the phone's symbol may not have been updated after its
+                # features were set, and would be shared by every phone
+                # with these features
+                try:
+                    interned.set_symbol_from_features()
+                except NoSymbolError:
+                    # no symbol for these features: keep the phone's own
+                    pass
+                interned._phone_id = len(self._interned_phones)
+                interned._frozen = True
+                self._interned_phones.append(interned)
+                self._interned[key] = interned
+        return interned
+
+    def interned_phone(self, phone_id: int):
+        """
+        Returns the interned phone with the ID phone_id.
+        """
+        return self._interned_phones[phone_id]
+
+    def interned_phones(self) -> list:
+        """
+        Returns a list of all phones interned so far, indexed by phone ID.
+        """
+        return list(self._interned_phones)
+
+    def edit_interned(self, phone, feature_dict: Dict[str, str]):
+        """
+        Returns the interned phone that results from setting the features in
+        feature_dict on the interned phone `phone` and recomputing its
+        symbol. Results are cached, so repeated edits cost a dictionary
+        lookup.
+
+        :param Phone phone: An interned phone of this feature model.
+        :param Dict[str, str] feature_dict: The feature values to set.
+        :returns: The interned result of the edit.
+        :return-type: Phone
+        """
+        key = (phone._phone_id, frozenset(feature_dict.items()))
+        edited = self._feature_edits.get(key)
+        if edited is None:
+            new = phone.copy()
+            for feature, value in feature_dict.items():
+                new.set_feature(feature, value)
+            new.set_symbol_from_features()
+            edited = self.intern(new)
+            self._feature_edits[key] = edited
+        return edited
+
+    def shared_vector(self, specified: int, positive: int) -> Tuple[int, int]:
+        """
+        Returns a feature vector equal to the one passed, made of the same
+        int objects for all equal vectors. Phones store these to avoid
+        holding one pair of ints each.
+        """
+        key = (specified, positive)
+        return self._shared_vectors.setdefault(key, key)
+
+    def property_table(self, classifier) -> dict:
+        """
+        Returns the table in which the results of a classifier (a function
+        computing properties of a phone from its features, such as
+        MonoPhone._classify) are cached, keyed by packed feature vector.
+        The table is filled by the phones using it; see Phone._properties.
+        """
+        try:
+            return self._property_tables[classifier]
+        except KeyError:
+            return self._property_tables.setdefault(classifier, dict())
+
+    def source_files(self) -> List[pathlib.Path]:
+        """
+        Returns the paths of the files this feature model was loaded from,
+        that is, the feature set file and, if defined, its IPA lookup tables.
+        Used by the FeatureModelRegistry to notice changes on disk.
+
+        :returns: A list of paths.
+        :return-type: List[pathlib.Path]
+        """
+        dir_path = self._data_dir()
+        file_names = [
+            self._feature_set_file_name, self._ipa_file_name,
+            self._ipa_dcs_file_name
+        ]
+        return [dir_path / fname for fname in file_names if fname]
+
     def get_features_from_ipa(self, ipa_str: str) -> List[str]:
         """
         Takes Unicode IPA symbol (optionally with diacritics) and returns the
-        feature-set represented by this IPA. May throw a KeyError if the
-        feature set has no value for a certain symbol.
+        feature-set represented by this IPA. The base symbol is the longest
+        symbol of the feature set that ipa_str starts with, so it may be
+        several characters long, e.g. PHOIBLE's t̠ʃ. May throw a KeyError if
+        the feature set has no value for a certain symbol.
 
         :param str ipa_str: The IPA string to look up.
         :returns: The features as a list of feature values in canonical order.
         :return-type: List[str]
         """
-        ipa_char_features = self._ipa_dict[ipa_str[0]].copy()
-
+        ipa_str = "".join(ipa_str)
         if len(ipa_str) > 1:
-            for char in ipa_str[1:]:
+            base = self.tokeniser().base_length(ipa_str) or 1
+        else:
+            base = 1
+        ipa_char_features = self._ipa_dict[ipa_str[:base]].copy()
+
+        if len(ipa_str) > base:
+            for char in ipa_str[base:]:
                 try:
                     dc_feats = self._ipa_diacritics[char]
                     for feat in dc_feats:
@@ -230,15 +683,28 @@ class FeatureModel():
          (which features feature_list has different from ipa_feature_list,
           length of this list == hamming distance between the two)
         """
+        try:
+            ours = self.encode_features(feature_list)
+            theirs = self.encode_features(ipa_feature_list)
+        except ValueError:
+            # not a pair of plain +/-/0 lists: compare value by value
+            distant_symbols = list()
+            for i, (our,
+                    ipa) in enumerate(zip(feature_list, ipa_feature_list)):
+                if our != ipa:
+                    distant_symbols += [our + self.features[i]]
+            return (distant_symbols, len(distant_symbols))
+
+        diff = self.packed_hamming(*ours, *theirs)
         distant_symbols = list()
-        for i, (our, ipa) in enumerate(zip(feature_list, ipa_feature_list)):
-            if our != ipa:
-                distant_symbols += [our + self.features[i]]
+        for i, feature in enumerate(self.features):
+            if diff >> i & 1:
+                distant_symbols += [feature_list[i] + feature]
 
-        return (distant_symbols, len(distant_symbols))
+        return (distant_symbols, utils.popcount(diff))
 
     def is_good_feature(self, feature):
-        if feature in self.features:
+        if feature in self._feature_bits:
             return True
         else:
             return False
@@ -247,24 +713,65 @@ class FeatureModel():
         """
         Returns an IPA symbol if the Phone fits an IPA symbol in the feature-
         set used, requiring no diacritics, and None otherwise.
+        If several symbols have the features, the first one in the feature
+        set is returned; see _build_ipa_index.
         """
-        matching_symbols = list()
-        for ipa_char in self._ipa_dict:
-            if self._ipa_dict[ipa_char] == feature_list:
-                matching_symbols += [ipa_char]
-
-        if len(matching_symbols) > 1:
-            raise Exception("Multiple symbols match Phone: check feature set "
-                            "for non-contrasting symbols.")
-        elif len(matching_symbols) < 1:
-            return None
-        else:
-            return matching_symbols[0]
+        try:
+            return self._ipa_vector_index.get(
+                self.encode_features(feature_list))
+        except ValueError:
+            return self._ipa_index.get(tuple(feature_list))
 
     def get_ipa_from_features(self, feature_list):
         """
         Returns a string giving an IPA representation of the Phone.
         """
+        try:
+            specified, positive = self.encode_features(feature_list)
+        except ValueError:
+            return self._get_ipa_from_features_exhaustive(feature_list)
+        # check to see if the phone has a good IPA representation first
+        symbol = self._ipa_vector_index.get((specified, positive))
+        if symbol:
+            return symbol
+        return self._search_ipa(specified, positive, feature_list)
+
+    def get_ipa_from_vector(self, specified: int, positive: int) -> str:
+        """
+        Like get_ipa_from_features, but takes a packed feature vector (see
+        encode_features).
+
+        :param int specified: The mask of specified features.
+        :param int positive: The mask of positive features.
+        :returns: An IPA representation of the feature vector.
+        :return-type: str
+        """
+        symbol = self._ipa_vector_index.get((specified, positive))
+        if symbol:
+            return symbol
+        return self._search_ipa(specified, positive,
+                                self.decode_features(specified, positive))
+
+    def _search_ipa(self, specified, positive, feature_list):
+        """
+        Finds a base symbol plus diacritics for a feature vector that has no
+        exact symbol, using a SymbolSearch built on first use.
+        """
+        if self._symbol_search is None:
+            self._symbol_search = SymbolSearch(
+                self, self._IGNORE_DISTANCE_GREATER_THAN)
+        symbol = self._symbol_search.search(specified, positive, feature_list)
+        if symbol is None:
+            raise NoSymbolError("No IPA representation found for Phone!")
+        return symbol
+
+    def _get_ipa_from_features_exhaustive(self, feature_list):
+        """
+        Finds an IPA representation by comparing the feature list with every
+        base symbol and trying every way of adding diacritics. Slow; used
+        only for feature lists that cannot be packed into a vector, and as a
+        reference implementation for SymbolSearch.
+        """
         # check to see if the phone has a good IPA representation first
         symbol = self.is_good_ipa(feature_list)
         # if it does, return it
@@ -339,18 +846,27 @@ class FeatureModel():
         #       if it is unique, use that, otherwise I D K
         # for now we pick the first one, if there are any...
         if len(valid) < 1:
-            raise Exception("No IPA representation found for Phone!")
+            raise NoSymbolError("No IPA representation found for Phone!")
         else:
             final_choice = valid[0]
 
         final_glyph = final_choice[0] + "".join(final_choice[1])
         return final_glyph
 
+    # the attributes making up the JSON representation of a FeatureModel
+    _JSON_FIELDS = ("JSON_OBJECT_NAME", "JSON_VERSION_NO",
+                    "_feature_set_ipa_lookup", "_feature_set_file_name",
+                    "_feature_set_path", "_ipa_file_name",
+                    "_ipa_dcs_file_name", "features", "_ipa_dict",
+                    "_ipa_diacritics")
+
     def to_json(self):
         """
         Returns a JSON representation of the FeatureModel
         """
-        return json.dumps(self.__dict__, default=self.jdefault)
+        return json.dumps({f: getattr(self, f)
+                           for f in self._JSON_FIELDS},
+                          default=self.jdefault)
 
     def from_json(self, json_fm):
         """
@@ -371,4 +887,159 @@ class FeatureModel():
                                 pre_fm["JSON_VERSION_NO"],
                                 self.JSON_VERSION_NO))
 
-        self.__dict__ = pre_fm
+        del pre_fm["JSON_OBJECT_NAME"]
+        del pre_fm["JSON_VERSION_NO"]
+        pre_fm["_ipa_diacritics"] = {
+            k: frozenset(v)
+            for k, v in pre_fm["_ipa_diacritics"].items()
+        }
+        self.__dict__.update(pre_fm)
+        # the tables now come from the JSON, not from a compiled file
+        self._compiled = None
+        self._build_feature_index()
+        self._build_ipa_index(warn=False)
+
+
+class FeatureModelRegistry():
+    """
+    A process-wide store of loaded FeatureModels. Loading and parsing a
+    feature set is expensive, and every Phone needs a FeatureModel, so
+    Phones, WordFactories etc. take their models from here instead of
+    instantiating their own.
+
+    Models are keyed by feature set name and directory path. A model is
+    reloaded when any of its files has changed on disk; to keep lookups cheap,
+    the files are checked at most once every `check_interval` seconds.
+    All methods are thread-safe.
+    """
+
+    def __init__(self, check_interval: float = 1.0):
+        self.check_interval = check_interval
+        # (name, path) -> [model, file stamp, time of next check]
+        self._models = dict()
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _key(name: str, path: Optional[str]) -> Tuple[str, Optional[str]]:
+        if path:
+            path = str(pathlib.Path(path).resolve())
+        return (name, path or None)
+
+    @staticmethod
+    def _stamp(model: FeatureModel) -> Tuple[Optional[float], ...]:
+        """
+        Returns the modification times of the files of a feature model,
+        including its compiled version.
+        Files that do not exist on disk (e.g. package data in an archive)
+        get a stamp of None and are thus never considered changed.
+        """
+        stamp = []
+        for fpath in model.source_files() + [model.compiled_file()]:
+            try:
+                stamp.append(os.stat(fpath).st_mtime)
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def get(self, name: str, path: Optional[str] = None) -> FeatureModel:
+        """
+        Returns the FeatureModel for a feature set, loading it if it has not
+        been loaded yet or if its files have changed.
+
+        :param str name: The feature set file name.
+        :param Optional[str] path: An optional directory to load from.
+        :returns: The shared FeatureModel.
+        :return-type: FeatureModel
+        """
+        key = self._key(name, path)
+        entry = self._models.get(key)
+        if entry is not None and time.monotonic() < entry[2]:
+            return entry[0]
+
+        with self._lock:
+            entry = self._models.get(key)
+            now = time.monotonic()
+            if entry is not None:
+                if now < entry[2]:
+                    return entry[0]
+                if self._stamp(entry[0]) == entry[1]:
+                    entry[2] = now + self.check_interval
+                    return entry[0]
+            model = FeatureModel(name, path)
+            self._models[key] = [
+                model, self._stamp(model), now + self.check_interval
+            ]
+            return model
+
+    def preload(self, names: Iterable[str],
+                path: Optional[str] = None) -> List[FeatureModel]:
+        """
+        Loads several feature sets ahead of time, e.g. before starting
+        worker threads.
+
+        :param Iterable[str] names: The feature set file names.
+        :param Optional[str] path: An optional directory to load from.
+        :returns: The loaded FeatureModels.
+        :return-type: List[FeatureModel]
+        """
+        if isinstance(names, str):
+            names = [names]
+        return [self.get(name, path) for name in names]
+
+    def evict(self, name: Optional[str] = None,
+              path: Optional[str] = None) -> None:
+        """
+        Removes feature models from the registry, so the next request loads
+        them from disk again. If no name is passed, every model is evicted.
+        Phones keep working with the models they already have.
+
+        :param Optional[str] name: The feature set file name.
+        :param Optional[str] path: The directory the feature set was loaded
+                                   from.
+        """
+        with self._lock:
+            if name is None:
+                self._models.clear()
+            else:
+                self._models.pop(self._key(name, path), None)
+
+    def loaded(self) -> Dict[Tuple[str, Optional[str]], FeatureModel]:
+        """
+        Returns the currently loaded models by (name, path).
+        """
+        with self._lock:
+            return {k: v[0] for k, v in self._models.items()}
+
+    def __contains__(self, name_and_path):
+        if isinstance(name_and_path, str):
+            name_and_path = (name_and_path, None)
+        return self._key(*name_and_path) in self._models
+
+
+# the registry used throughout the package
+registry = FeatureModelRegistry()
+
+
+def get_feature_model(name: str, path: Optional[str] = None) -> FeatureModel:
+    """
+    Returns the shared FeatureModel for a feature set from the
+    process-wide registry.
+    """
+    return registry.get(name, path)
+
+
+def preload_feature_models(names: Iterable[str],
+                           path: Optional[str] = None) -> List[FeatureModel]:
+    """
+    Loads feature sets into the process-wide registry ahead of time.
+    """
+    return registry.preload(names, path)
+
+
+def evict_feature_model(name: Optional[str] = None,
+                        path: Optional[str] = None) -> None:
+    """
+    Removes feature sets from the process-wide registry. Evicts every
+    feature set if no name is passed.
+    """
+    registry.evict(name, path)
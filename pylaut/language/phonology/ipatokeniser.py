@@ -0,0 +1,137 @@
+"""
+Module defining IpaTokeniser, which splits IPA strings into segments using
+the symbols of a feature set.
+"""
+
+from typing import Iterable, List, Optional, Tuple
+
+# combining tie bars, which join two base symbols into one segment, e.g. t͡ʃ
+TIE_BARS = frozenset(("͡", "͜"))
+STRESS_MARKS = frozenset(("'", "ˈ"))
+SYLLABLE_BREAK = "."
+
+# key of the trie node marking the end of a symbol
+_END = None
+
+
+class IpaTokeniser():
+    """
+    Splits IPA strings into segments in a single pass from left to right.
+
+    A segment is the longest base symbol of the feature set starting at the
+    current position (or, failing that, a single character), optionally
+    joined to a following symbol by a tie bar, followed by any number of
+    diacritics, so that e.g. PHOIBLE's t̠ʃʰ and monophone's tʰʷ are one
+    segment each. The base symbols are kept in a trie, so finding the longest
+    one costs a dictionary lookup per character.
+
+    Stress marks and syllable breaks are never part of a segment, even in
+    feature sets that list them as diacritics.
+
+    :param Iterable[str] symbols: The base symbols of the feature set.
+    :param Iterable[str] diacritics: The diacritics of the feature set.
+    """
+
+    def __init__(self, symbols: Iterable[str], diacritics: Iterable[str]):
+        self._trie = dict()
+        for symbol in symbols:
+            node = self._trie
+            for char in symbol:
+                node = node.setdefault(char, dict())
+            node[_END] = True
+        self.diacritics = frozenset(
+            dc for dc in diacritics
+            if len(dc) == 1 and dc not in STRESS_MARKS
+            and dc != SYLLABLE_BREAK)
+
+    def base_length(self, s: str, start: int = 0) -> int:
+        """
+        Returns the length of the longest base symbol at position start of
+        s, or 0 if no base symbol starts there.
+        """
+        node = self._trie
+        length = 0
+        for i in range(start, len(s)):
+            node = node.get(s[i])
+            if node is None:
+                break
+            if _END in node:
+                length = i - start + 1
+        return length
+
+    def _segment_end(self, s: str, start: int) -> Optional[int]:
+        """
+        Returns the end of the segment starting at position start of s, or
+        None if the character there is a diacritic without a base.
+        """
+        length = self.base_length(s, start)
+        if not length:
+            if s[start] in self.diacritics:
+                return None
+            length = 1
+        end = start + length
+        n = len(s)
+        while end < n:
+            char = s[end]
+            if char in self.diacritics:
+                end += 1
+            elif char in TIE_BARS and end + 1 < n:
+                end += 1 + (self.base_length(s, end + 1) or 1)
+            else:
+                break
+        return end
+
+    def segments(self, s: str) -> List[str]:
+        """
+        Splits s into segments. Stress marks and syllable breaks are
+        returned as segments of their own; diacritics that do not follow a
+        base symbol are dropped.
+
+        :param str s: The IPA string.
+        :returns: The segments, in order.
+        :return-type: List[str]
+        """
+        segments = []
+        i = 0
+        n = len(s)
+        while i < n:
+            char = s[i]
+            if char in STRESS_MARKS or char == SYLLABLE_BREAK:
+                segments.append(char)
+                i += 1
+                continue
+            end = self._segment_end(s, i)
+            if end is None:
+                i += 1
+                continue
+            segments.append(s[i:end])
+            i = end
+        return segments
+
+    def syllables(self, s: str) -> List[Tuple[str, ...]]:
+        """
+        Splits s into syllables of segments. Syllables are separated by
+        syllable breaks and before stress marks; a stressed syllable starts
+        with its stress mark, e.g. "ka'ta" gives [("k", "a"), ("'", "t",
+        "a")]. Empty syllables are left out.
+
+        :param str s: The IPA string.
+        :returns: The syllables, in order.
+        :return-type: List[Tuple[str, ...]]
+        """
+        syllables = []
+        current = []
+        for segment in self.segments(s):
+            if segment == SYLLABLE_BREAK or segment in STRESS_MARKS:
+                # a stress mark before a break still belongs to the next
+                # syllable
+                if current and not (len(current) == 1
+                                    and current[0] in STRESS_MARKS):
+                    syllables.append(tuple(current))
+                    current = []
+                if segment == SYLLABLE_BREAK:
+                    continue
+            current.append(segment)
+        if current:
+            syllables.append(tuple(current))
+        return syllables
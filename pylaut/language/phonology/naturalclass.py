@@ -0,0 +1,79 @@
+"""
+Module defining NaturalClass, a compiled predicate on Phones for feature
+expressions such as [+sibilant -voice].
+"""
+
+from typing import Dict
+
+
+class NaturalClass():
+    """
+    A predicate that is True for Phones in the natural class described by a
+    dictionary of feature values.
+
+    The feature values are turned into bitmasks once, against the feature
+    model (see FeatureModel.natural_class_masks), so testing a phone is a
+    couple of bitwise operations on its packed features. Phones of another
+    feature model are tested against masks compiled for their own model.
+
+    Invalid feature names or values do not raise when the class is created,
+    only when it is used, as they did before feature expressions were
+    compiled.
+
+    :param Dict[str, str] feature_dict: Feature names and values.
+    :param feature_model: The FeatureModel to compile against.
+    """
+
+    def __init__(self, feature_dict: Dict[str, str], feature_model):
+        self.feature_dict = dict(feature_dict)
+        self.feature_model = feature_model
+        self._key = frozenset(self.feature_dict.items())
+        try:
+            self.masks = feature_model.natural_class_masks(self.feature_dict)
+        except Exception:
+            self.masks = None
+
+    def __call__(self, phone) -> bool:
+        if phone.feature_model is self.feature_model and self.masks:
+            care, specified, positive = self.masks
+        else:
+            # raises for invalid features, or for things that are not phones
+            care, specified, positive = \
+                phone.feature_model.natural_class_masks(self.feature_dict)
+        return (phone._specified & care == specified
+                and phone._positive & care == positive)
+
+    def __eq__(self, other):
+        return (isinstance(other, NaturalClass)
+                and self.feature_model is other.feature_model
+                and self._key == other._key)
+
+    def __hash__(self):
+        return hash(self._key)
+
+    def __repr__(self):
+        return "[{}]".format(" ".join(
+            v + k for k, v in self.feature_dict.items()))
+
+
+class SymbolClass():
+    """
+    A predicate that is True for Phones with a given symbol.
+
+    :param str symbol: The IPA symbol.
+    """
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+
+    def __call__(self, phone) -> bool:
+        return phone.is_symbol(self.symbol)
+
+    def __eq__(self, other):
+        return isinstance(other, SymbolClass) and self.symbol == other.symbol
+
+    def __hash__(self):
+        return hash(self.symbol)
+
+    def __repr__(self):
+        return "/{}/".format(self.symbol)
@@ -1,3 +1,4 @@
+from pylaut.language.phonology import featureset
 from pylaut.language.phonology.phone import Phone
 
 
@@ -7,8 +8,13 @@ class PhoiblePhone(Phone):
     For further information, please refer to Phone.
     """
 
+    __slots__ = ()
+
     _FEATURE_SET_NAME = "phoible-segf"
 
+    JSON_OBJECT_NAME = "Phone/PhoiblePhone"
+    JSON_VERSION_NO = "PhoiblePhone-pre-alpha-1"
+
     _CONSONANTAL_FEATURE = "consonantal"
     _LO_V_FEATURE, _HI_V_FEATURE = "low", "high"
     _FR_V_FEATURE, _BA_V_FEATURE = "front", "back"
@@ -257,10 +263,7 @@ class PhoiblePhone(Phone):
                 return -1
 
     def __init__(self, ipa_string=None):
-        super().__init__()
-        self.JSON_OBJECT_NAME = "Phone/PhoiblePhone"
-        self.JSON_VERSION_NO = "PhoiblePhone-pre-alpha-1"
-        self.load_set_feature_set(self.feature_set_filename())
+        super().__init__(featureset.get_feature_model(self._FEATURE_SET_NAME))
         if ipa_string:
             self.set_features_from_ipa(ipa_string)
             self.symbol = ipa_string
@@ -271,13 +274,15 @@ class PhoiblePhoneme(PhoiblePhone):
     Wrapper/decorator for Phones, containing extra information.
     """
 
+    __slots__ = ("subsystem", )
+
+    JSON_OBJECT_NAME = "PhoiblePhoneme"
+    JSON_VERSION_NO = "pre-alpha-1"
+
     def __init__(self, ipa_string=None):
         super().__init__(ipa_string)
         self.subsystem = dict()
 
-        self.JSON_OBJECT_NAME = "PhoiblePhoneme"
-        self.JSON_VERSION_NO = "pre-alpha-1"
-
     def __repr__(self):
         """
         The representation of a phoneme is the IPA symbol in slashes
@@ -1,9 +1,49 @@
 import json
-from copy import deepcopy
+import copy
+from collections import namedtuple
+from collections.abc import MutableMapping
 
+from pylaut import utils
 from pylaut.language.phonology import featureset
 
 
+class PhoneFeatures(MutableMapping):
+    """
+    A dictionary-like view of the packed feature vector of a Phone, mapping
+    feature names to "+", "-" or "0". Writes go straight to the Phone.
+    """
+
+    def __init__(self, phone):
+        self._phone = phone
+
+    def __getitem__(self, feature):
+        phone = self._phone
+        bit = phone.feature_model._feature_bits[feature]
+        if phone._positive & bit:
+            return phone.feature_model._TRUE_FEATURE
+        elif phone._specified & bit:
+            return phone.feature_model._FALSE_FEATURE
+        else:
+            return phone.feature_model._NULL_FEATURE
+
+    def __setitem__(self, feature, value):
+        if value is None:
+            value = self._phone.feature_model._NULL_FEATURE
+        self._phone.set_feature(feature, value)
+
+    def __delitem__(self, feature):
+        self[feature] = None
+
+    def __iter__(self):
+        return iter(self._phone.feature_model.features)
+
+    def __len__(self):
+        return len(self._phone.feature_model.features)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
 class Phone(object):
     """
     Phones are the atomic unit of PyLaut. They are somewhere between acoustic
@@ -11,8 +51,29 @@ class Phone(object):
 
     They are a collection [dictionary + canonical order] of phonological
     features with extra structure to make manipulating them easier.
+
+    Internally, the features are packed into two bitmasks laid out in the
+    canonical feature order of the FeatureModel (see
+    FeatureModel.encode_features); the features attribute is a dictionary
+    view onto them.
+
+    Phones can be interned with their FeatureModel (see intern), which makes
+    them immutable and shareable; feature edits on interned phones (see
+    with_feature) return interned phones again.
     """
 
+    # _frozen and _phone_id are only set on interned phones, see
+    # FeatureModel.intern
+    __slots__ = ("feature_model", "_specified", "_positive", "symbol",
+                 "_frozen", "_phone_id")
+
+    # whether phones of this class are fully described by their features
+    # and may thus be interned
+    _internable = True
+
+    JSON_OBJECT_NAME = "Phone"
+    JSON_VERSION_NO = "pre-alpha-1"
+
     @staticmethod
     def jdefault(o):
         if isinstance(o, featureset.FeatureModel):
@@ -20,10 +81,18 @@ class Phone(object):
 
     def __init__(self, feature_model: featureset.FeatureModel, ipa_str=None):
 
+        # a feature set name may be passed instead of a model, in which case
+        # the shared model is taken from the registry
+        if isinstance(feature_model, str):
+            feature_model = featureset.get_feature_model(feature_model)
         self.feature_model = feature_model
+        self._frozen = False
+        self._phone_id = None
 
-        # the features of the Phone
-        self.features = dict()
+        # the features of the Phone, as packed bitmasks of the specified
+        # and the positive features
+        self._specified = 0
+        self._positive = 0
 
         # representation of the Phone
         self.symbol = "0"
@@ -31,9 +100,9 @@ class Phone(object):
         if ipa_str:
             self.set_features_from_ipa(ipa_str)
             self.set_symbol_from_features()
-
-        self.JSON_OBJECT_NAME = "Phone"
-        self.JSON_VERSION_NO = "pre-alpha-1"
+            # share the mask ints with all other phones of the same features
+            self._specified, self._positive = feature_model.shared_vector(
+                self._specified, self._positive)
 
     def __repr__(self):
         """
@@ -41,11 +110,56 @@ class Phone(object):
         """
         return "[" + self.symbol + "]"
 
+    @property
+    def features(self):
+        return PhoneFeatures(self)
+
+    @features.setter
+    def features(self, feature_dict):
+        self._check_mutable()
+        self._specified, self._positive = 0, 0
+        for feature, value in feature_dict.items():
+            if value is not None:
+                self.set_feature(feature, value)
+
+    @property
+    def feature_vector(self):
+        """
+        The packed (specified, positive) feature bitmasks of the Phone.
+        """
+        return (self._specified, self._positive)
+
+    # slots that are not part of the JSON representation
+    _JSON_EXCLUDED = frozenset(
+        ("_specified", "_positive", "_frozen", "_phone_id", "__dict__"))
+
+    def _json_fields(self):
+        """
+        Returns the names of the attributes that make up the JSON
+        representation of the phone, i.e. the public slots of its class and
+        any attributes set outside of them.
+        """
+        fields = []
+        for cls in reversed(type(self).__mro__):
+            slots = cls.__dict__.get("__slots__", ())
+            if isinstance(slots, str):
+                slots = (slots, )
+            fields.extend(f for f in slots if f not in self._JSON_EXCLUDED)
+        fields.extend(getattr(self, "__dict__", ()))
+        return fields
+
     def to_json(self):
         """
         Returns a JSON representation of the Phone
         """
-        return json.dumps(self.__dict__, default=self.jdefault)
+        pre_phone = {
+            "JSON_OBJECT_NAME": self.JSON_OBJECT_NAME,
+            "JSON_VERSION_NO": self.JSON_VERSION_NO
+        }
+        for field in self._json_fields():
+            pre_phone[field] = getattr(self, field)
+        pre_phone["features"] = dict(self.features)
+        return json.dumps(pre_phone, default=self.jdefault)
 
     def from_json(self, json_phone):
         """
@@ -66,7 +180,23 @@ class Phone(object):
                                 pre_phone["JSON_VERSION_NO"],
                                 self.JSON_VERSION_NO))
 
-        self.__dict__ = pre_phone
+        # the feature model is stored as its own JSON representation; the
+        # actual model is shared, so it is fetched from the registry again
+        pre_fm = pre_phone.get("feature_model")
+        if isinstance(pre_fm, str):
+            pre_fm = json.loads(pre_fm)
+            pre_phone["feature_model"] = featureset.get_feature_model(
+                pre_fm["_feature_set_file_name"], pre_fm["_feature_set_path"])
+
+        features = pre_phone.pop("features", {})
+        del pre_phone["JSON_OBJECT_NAME"]
+        del pre_phone["JSON_VERSION_NO"]
+        self._frozen = False
+        self._phone_id = None
+        for field, value in pre_phone.items():
+            setattr(self, field, value)
+        self._specified, self._positive = 0, 0
+        self.features = features
 
     def print_feature_list(self):
         """
@@ -74,10 +204,11 @@ class Phone(object):
         e.g. [-syllabic] [+consonantal] [-continuant] [+sonorant] ...
         """
         output = []
+        bits = self.feature_model._feature_bits
         for feature in self.feature_model.features:
-            if self.features[feature] == self.feature_model._TRUE_FEATURE:
+            if self._positive & bits[feature]:
                 output += ["[+{}]".format(feature)]
-            elif self.features[feature] == self.feature_model._FALSE_FEATURE:
+            elif self._specified & bits[feature]:
                 output += ["[-{}]".format(feature)]
             else:
                 pass
@@ -86,9 +217,15 @@ class Phone(object):
 
     def clear_features(self):
         """
-        Clears the entries of self.features.
+        Clears the entries of self.features, i.e. sets them all to null.
         """
-        self.features = {x: None for x in self.features}
+        self._check_mutable()
+        self._specified, self._positive = 0, 0
+
+    def _check_mutable(self):
+        if self._frozen:
+            raise TypeError("{} is interned and thus immutable. Use copy() "
+                            "or with_feature() instead.".format(self))
 
     def set_feature(self, feature_name, feature_value):
         """
@@ -96,19 +233,26 @@ class Phone(object):
         This ought not to be used directly, instead use
         set_feature_true/false/null()
         """
+        self._check_mutable()
         if not self.feature_model:
             raise Exception("Phone does not have a feature set initialised!")
         else:
-            if feature_name not in self.feature_model.features:
+            bit = self.feature_model._feature_bits.get(feature_name)
+            if bit is None:
                 raise Exception("Feature '{}' not found in Phone's "
                                 "feature set".format(feature_name))
-            elif (feature_value not in self.feature_model.
-                  _possible_feature_values):
+            elif feature_value == self.feature_model._TRUE_FEATURE:
+                self._specified |= bit
+                self._positive |= bit
+            elif feature_value == self.feature_model._FALSE_FEATURE:
+                self._specified |= bit
+                self._positive &= ~bit
+            elif feature_value == self.feature_model._NULL_FEATURE:
+                self._specified &= ~bit
+                self._positive &= ~bit
+            else:
                 raise Exception("'{}' not a valid value for feature in "
                                 "Phone".format(feature_value))
-            else:
-                # do it
-                self.features[feature_name] = feature_value
 
     def set_features_to_values(self, feature_names, values):
         for f, v in zip(feature_names, values):
@@ -164,27 +308,53 @@ class Phone(object):
         Returns a list of the values of features from self.features, using the
         canonical order from self.feature_set.
         """
-        feature_list = list()
-        for feature in self.feature_model.features:
-            feature_list += [self.features[feature]]
-        return feature_list
+        return self.feature_model.decode_features(self._specified,
+                                                  self._positive)
 
     def feature_is(self, feature, hey_boo):
         """
         Returns True if the feature 'feature' in the phone is hey_boo,
         otherwise returns False
         """
-        if not self.feature_model.is_good_feature(feature):
+        bit = self.feature_model._feature_bits.get(feature)
+        if bit is None:
             raise Exception("{} not a valid feature.".format(feature))
+        elif hey_boo == self.feature_model._TRUE_FEATURE:
+            return bool(self._positive & bit)
+        elif hey_boo == self.feature_model._FALSE_FEATURE:
+            return bool(self._specified & ~self._positive & bit)
+        elif hey_boo == self.feature_model._NULL_FEATURE:
+            return not self._specified & bit
         else:
-            if hey_boo not in self.feature_model._possible_feature_values:
-                raise Exception(
-                    "{} not a valid feature value.".format(hey_boo))
-            else:
-                if (self.features[feature]) == hey_boo:
-                    return True
-                else:
-                    return False
+            raise Exception("{} not a valid feature value.".format(hey_boo))
+
+    def matches_features(self, feature_dict):
+        """
+        Returns True if the phone has all the feature values in feature_dict,
+        i.e. if it belongs to the natural class described by it.
+        """
+        care, specified, positive = self.feature_model.natural_class_masks(
+            feature_dict)
+        return (self._specified & care == specified
+                and self._positive & care == positive)
+
+    def has_same_features(self, other):
+        """
+        Returns True if other has exactly the same features as this phone.
+        """
+        return (self.feature_model is other.feature_model
+                and self._specified == other._specified
+                and self._positive == other._positive)
+
+    def feature_distance(self, other):
+        """
+        Returns the Hamming distance between the features of this phone and
+        those of other, i.e. the number of features whose values differ.
+        """
+        return utils.popcount(
+            self.feature_model.packed_hamming(self._specified, self._positive,
+                                              other._specified,
+                                              other._positive))
 
     def feature_is_true(self, feature):
         if self.feature_is(feature, self.feature_model._TRUE_FEATURE):
@@ -208,8 +378,9 @@ class Phone(object):
         """
         Sets self.symbol using get_ipa_from_features
         """
-        self.symbol = self.feature_model.get_ipa_from_features(
-            self.get_feature_list())
+        self._check_mutable()
+        self.symbol = self.feature_model.get_ipa_from_vector(
+            self._specified, self._positive)
 
     def is_symbol(self, ipa_string):
         if self.symbol == ipa_string:
@@ -217,8 +388,81 @@ class Phone(object):
         else:
             return False
 
+    def is_interned(self):
+        return self._phone_id is not None
+
+    @property
+    def phone_id(self):
+        """
+        The ID of the interned phone with these features.
+        """
+        return self.intern()._phone_id
+
+    def intern(self):
+        """
+        Returns the canonical immutable phone with the same class and features
+        as this one. See FeatureModel.intern.
+        """
+        return self.feature_model.intern(self)
+
+    def with_features(self, feature_dict):
+        """
+        Returns the interned phone that has the features of this one, but with
+        the values in feature_dict, and a symbol to match. The phone itself
+        is left unchanged.
+        """
+        if not self._internable:
+            new = self.copy()
+            for feature, value in feature_dict.items():
+                new.set_feature(feature, value)
+            new.set_symbol_from_features()
+            return new
+        return self.feature_model.edit_interned(self.intern(), feature_dict)
+
+    def with_feature(self, feature_name, feature_value):
+        """
+        Like with_features, for a single feature.
+        """
+        return self.with_features({feature_name: feature_value})
+
+    def _properties(self):
+        """
+        Returns the result of the class's _classify method for this phone's
+        features. Results are computed once per feature vector and shared by
+        all phones of the feature model.
+        """
+        classify = type(self)._classify
+        table = self.feature_model.property_table(classify)
+        key = (self._specified, self._positive)
+        try:
+            return table[key]
+        except KeyError:
+            props = table[key] = classify(self)
+            return props
+
     def copy(self):
-        return deepcopy(self)
+        """
+        Returns a mutable copy of the phone, sharing its FeatureModel.
+        """
+        new = copy.copy(self)
+        new._frozen = False
+        new._phone_id = None
+        return new
+
+    def __deepcopy__(self, memo):
+        # interned phones are immutable, so they can be shared
+        if self._frozen:
+            return self
+        return self.copy()
+
+
+# the classification of a MonoPhone's features, see MonoPhone._classify
+MonoPhoneProperties = namedtuple("MonoPhoneProperties", [
+    "vowel", "low_vowel", "high_vowel", "mid_vowel", "front_vowel",
+    "back_vowel", "central_vowel", "rounded_vowel", "consonant",
+    "voiced_consonant", "stop", "nasal_stop", "approximant",
+    "lateral_approximant", "fricative", "sonority"
+])
 
 
 class MonoPhone(Phone):
@@ -227,8 +471,13 @@ class MonoPhone(Phone):
     information, please refer to Phone.
     """
 
+    __slots__ = ()
+
     _FEATURE_SET_NAME = "monophone"
 
+    JSON_OBJECT_NAME = "Phone/MonoPhone"
+    JSON_VERSION_NO = "MonoPhone-pre-alpha-1"
+
     _CONSONANTAL_FEATURE = "consonantal"
     _LO_V_FEATURE, _HI_V_FEATURE = "low", "high"
     _FR_V_FEATURE, _BA_V_FEATURE = "front", "back"
@@ -243,138 +492,133 @@ class MonoPhone(Phone):
     _NAS_C_FEATURE = "nasal"
 
     def __init__(self, ipa_string=None):
-        super().__init__(featureset.FeatureModel('monophone'), ipa_string)
-        self.JSON_OBJECT_NAME = "Phone/MonoPhone"
-        self.JSON_VERSION_NO = "MonoPhone-pre-alpha-1"
-        if ipa_string:
-            self.set_features_from_ipa(ipa_string)
-            self.set_symbol_from_features()
+        super().__init__(
+            featureset.get_feature_model(self._FEATURE_SET_NAME), ipa_string)
 
     # interface compliance
     def is_tone(self):
         return False
 
+    def _classify(self):
+        """
+        Computes the classification of this phone's features read by the
+        is_* methods and get_sonority. See Phone._properties.
+        """
+        model = self.feature_model
+        plus, minus = model._TRUE_FEATURE, model._FALSE_FEATURE
+
+        vowel = self.feature_is(MonoPhone._CONSONANTAL_FEATURE, minus)
+        low_vowel = vowel and self.feature_is(MonoPhone._LO_V_FEATURE, plus)
+        high_vowel = vowel and self.feature_is(MonoPhone._HI_V_FEATURE, plus)
+        front_vowel = vowel and self.feature_is(MonoPhone._FR_V_FEATURE,
+                                                plus)
+        back_vowel = vowel and self.feature_is(MonoPhone._BA_V_FEATURE, plus)
+        central_vowel = vowel and not front_vowel and not back_vowel
+
+        consonant = self.feature_is(MonoPhone._CONSONANTAL_FEATURE, plus)
+        continuant = consonant and self.feature_is(
+            MonoPhone._CONT_C_FEATURE, plus)
+        stop = consonant and self.feature_is(MonoPhone._CONT_C_FEATURE, minus)
+        approximant = continuant and self.feature_is(MonoPhone._SON_C_FEATURE,
+                                                     plus)
+        fricative = continuant and self.feature_is(MonoPhone._SON_C_FEATURE,
+                                                   minus)
+        voiced_consonant = consonant and self.feature_is(
+            MonoPhone._VOI_C_FEATURE, plus)
+        lateral_approximant = approximant and self.feature_is(
+            MonoPhone._LAT_C_FEATURE, plus)
+        nasal_stop = stop and self.feature_is(MonoPhone._NAS_C_FEATURE, plus)
+
+        # based on:
+        # http://www.gial.edu/images/PDF/Parker%20dissertation.pdf
+        if vowel:
+            if central_vowel:
+                sonority = 10
+            elif low_vowel:
+                sonority = 13
+            elif high_vowel:
+                sonority = 11
+            else:
+                sonority = 12
+        elif lateral_approximant:
+            sonority = 8
+        elif approximant:
+            sonority = 9
+        elif nasal_stop:
+            sonority = 5
+        elif fricative:
+            sonority = 3 if voiced_consonant else 2
+        elif stop:
+            sonority = 2 if voiced_consonant else 0
+        else:
+            sonority = -1
+
+        return MonoPhoneProperties(
+            vowel=vowel,
+            low_vowel=low_vowel,
+            high_vowel=high_vowel,
+            mid_vowel=vowel and not low_vowel and not high_vowel,
+            front_vowel=front_vowel,
+            back_vowel=back_vowel,
+            central_vowel=central_vowel,
+            rounded_vowel=vowel and self.feature_is(MonoPhone._RO_V_FEATURE,
+                                                    plus),
+            consonant=consonant,
+            voiced_consonant=voiced_consonant,
+            stop=stop,
+            nasal_stop=nasal_stop,
+            approximant=approximant,
+            lateral_approximant=lateral_approximant,
+            fricative=fricative,
+            sonority=sonority)
+
     # vowel properties
     def is_vowel(self):
-        if self.feature_is(MonoPhone._CONSONANTAL_FEATURE,
-                           self.feature_model._FALSE_FEATURE):
-            return True
-        else:
-            return False
+        return self._properties().vowel
 
     def is_low_vowel(self):
-        if self.is_vowel() and self.feature_is(
-                MonoPhone._LO_V_FEATURE, self.feature_model._TRUE_FEATURE):
-            return True
-        else:
-            return False
+        return self._properties().low_vowel
 
     def is_high_vowel(self):
-        if self.is_vowel() and self.feature_is(
-                MonoPhone._HI_V_FEATURE, self.feature_model._TRUE_FEATURE):
-            return True
-        else:
-            return False
+        return self._properties().high_vowel
 
     def is_mid_vowel(self):
-        if (self.is_vowel() and not self.is_low_vowel()
-                and not self.is_high_vowel()):
-            return True
-        else:
-            return False
+        return self._properties().mid_vowel
 
     def is_front_vowel(self):
-        if self.is_vowel() and self.feature_is(
-                MonoPhone._FR_V_FEATURE, self.feature_model._TRUE_FEATURE):
-            return True
-        else:
-            return False
+        return self._properties().front_vowel
 
     def is_back_vowel(self):
-        if self.is_vowel() and self.feature_is(
-                MonoPhone._BA_V_FEATURE, self.feature_model._TRUE_FEATURE):
-            return True
-        else:
-            return False
+        return self._properties().back_vowel
 
     def is_central_vowel(self):
-        if (self.is_vowel() and not self.is_front_vowel()
-                and not self.is_back_vowel()):
-            return True
-        else:
-            return False
+        return self._properties().central_vowel
 
     def is_rounded_vowel(self):
-        if self.is_vowel() and self.feature_is(
-                MonoPhone._RO_V_FEATURE, self.feature_model._TRUE_FEATURE):
-            return True
-        else:
-            return False
+        return self._properties().rounded_vowel
 
     # consonant properties
 
     def is_consonant(self):
-        if self.feature_is(MonoPhone._CONSONANTAL_FEATURE,
-                           self.feature_model._TRUE_FEATURE):
-            return True
-        else:
-            return False
+        return self._properties().consonant
 
     def is_voiced_consonant(self):
-        if self.is_consonant() and self.feature_is(
-                MonoPhone._VOI_C_FEATURE, self.feature_model._TRUE_FEATURE):
-            return True
-        else:
-            return False
+        return self._properties().voiced_consonant
 
     def is_stop(self):
-        if self.is_consonant() and self.feature_is(
-                MonoPhone._CONT_C_FEATURE, self.feature_model._FALSE_FEATURE):
-            return True
-        else:
-            return False
+        return self._properties().stop
 
     def is_nasal_stop(self):
-        if self.is_stop() and self.feature_is(
-                MonoPhone._NAS_C_FEATURE, self.feature_model._TRUE_FEATURE):
-            return True
-        else:
-            return False
+        return self._properties().nasal_stop
 
     def is_approximant(self):
-        if self.is_consonant():
-            if self.feature_is(MonoPhone._CONT_C_FEATURE,
-                               self.feature_model._TRUE_FEATURE):
-                if self.feature_is(MonoPhone._SON_C_FEATURE,
-                                   self.feature_model._TRUE_FEATURE):
-                    return True
-                else:
-                    return False
-            else:
-                return False
-        else:
-            return False
+        return self._properties().approximant
 
     def is_lateral_approximant(self):
-        if self.is_approximant() and self.feature_is(
-                MonoPhone._LAT_C_FEATURE, self.feature_model._TRUE_FEATURE):
-            return True
-        else:
-            return False
+        return self._properties().lateral_approximant
 
     def is_fricative(self):
-        if self.is_consonant():
-            if self.feature_is(MonoPhone._CONT_C_FEATURE,
-                               self.feature_model._TRUE_FEATURE):
-                if self.feature_is(MonoPhone._SON_C_FEATURE,
-                                   self.feature_model._FALSE_FEATURE):
-                    return True
-                else:
-                    return False
-            else:
-                return False
-        else:
-            return False
+        return self._properties().fricative
 
     def get_sonority(self):
         """
@@ -382,33 +626,4 @@ class MonoPhone(Phone):
         phone. 10 or greater is a vowel; laterals are 8, other approximants are
         9; nasals are 5, everything else is lower.
         """
-        # based on;
-        # http://www.gial.edu/images/PDF/Parker%20dissertation.pdf
-        if self.is_vowel():
-            if self.is_central_vowel():
-                return 10
-            elif self.is_low_vowel():
-                return 13
-            elif self.is_mid_vowel():
-                return 12
-            elif self.is_high_vowel():
-                return 11
-            else:
-                return -1
-        else:
-            if self.is_lateral_approximant():
-                return 8
-            elif self.is_approximant():
-                return 9
-            elif self.is_nasal_stop():
-                return 5
-            elif self.is_fricative() and self.is_voiced_consonant():
-                return 3
-            elif self.is_fricative() and not self.is_voiced_consonant():
-                return 2
-            elif self.is_stop() and self.is_voiced_consonant():
-                return 2
-            elif self.is_stop() and not self.is_voiced_consonant():
-                return 0
-            else:
-                return -1
+        return self._properties().sonority
@@ -1,4 +1,6 @@
+from pylaut.language.phonology import featureset
 from pylaut.language.phonology.phone import MonoPhone
+from pylaut.language.phonology.featurematrix import FeatureMatrix
 import json
 
 
@@ -7,12 +9,16 @@ class Phoneme(MonoPhone):
     Wrapper/decorator for Phones, containing extra information.
     """
 
+    # the subsystem dict is only created when it is used, since most
+    # phonemes (e.g. those in words) never are in a subsystem
+    __slots__ = ("_subsystem", )
+
+    JSON_OBJECT_NAME = "Phoneme"
+    JSON_VERSION_NO = "pre-alpha-1"
+
     def __init__(self, ipa_string=None):
         super().__init__(ipa_string)
-        self.subsystem = dict()
-
-        self.JSON_OBJECT_NAME = "Phoneme"
-        self.JSON_VERSION_NO = "pre-alpha-1"
+        self._subsystem = None
 
     def __repr__(self):
         """
@@ -20,6 +26,28 @@ class Phoneme(MonoPhone):
         """
         return "/" + self.symbol + "/"
 
+    @property
+    def subsystem(self):
+        if self._subsystem is None:
+            self._subsystem = dict()
+        return self._subsystem
+
+    @subsystem.setter
+    def subsystem(self, subsystem):
+        self._subsystem = subsystem
+
+    def _json_fields(self):
+        return [
+            "subsystem" if f == "_subsystem" else f
+            for f in super()._json_fields()
+        ]
+
+    def copy(self):
+        new = super().copy()
+        if self._subsystem is not None:
+            new._subsystem = dict(self._subsystem)
+        return new
+
     def is_in_vowel_subsystem(self, subsystem):
         """
         Returns True if the Phoneme is in a vowel subsystem 'subsystem'
@@ -44,6 +72,82 @@ class Phoneme(MonoPhone):
             return self.subsystem[subsystem]
 
 
+class PhonemeSet(set):
+    """
+    A set of phonemes that counts its changes, so that what is computed
+    from it can be cached (see Phonology.get_feature_matrix). Changes to
+    the phonemes themselves are not seen; count them with touch.
+    """
+
+    __slots__ = ("version", )
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.version = 0
+
+    def touch(self):
+        """
+        Counts a change made in place to a phoneme of the set, such as a
+        feature edit.
+        """
+        self.version += 1
+
+    def __repr__(self):
+        return repr(set(self))
+
+    def add(self, phoneme):
+        super().add(phoneme)
+        self.version += 1
+
+    def discard(self, phoneme):
+        super().discard(phoneme)
+        self.version += 1
+
+    def remove(self, phoneme):
+        super().remove(phoneme)
+        self.version += 1
+
+    def pop(self):
+        self.version += 1
+        return super().pop()
+
+    def clear(self):
+        super().clear()
+        self.version += 1
+
+    def update(self, *others):
+        super().update(*others)
+        self.version += 1
+
+    def difference_update(self, *others):
+        super().difference_update(*others)
+        self.version += 1
+
+    def intersection_update(self, *others):
+        super().intersection_update(*others)
+        self.version += 1
+
+    def symmetric_difference_update(self, other):
+        super().symmetric_difference_update(other)
+        self.version += 1
+
+    def __ior__(self, other):
+        self.version += 1
+        return super().__ior__(other)
+
+    def __iand__(self, other):
+        self.version += 1
+        return super().__iand__(other)
+
+    def __isub__(self, other):
+        self.version += 1
+        return super().__isub__(other)
+
+    def __ixor__(self, other):
+        self.version += 1
+        return super().__ixor__(other)
+
+
 class Phonology(object):
     """
     Refer to comments for inchoate comments.
@@ -51,7 +155,7 @@ class Phonology(object):
 
     def __init__(self, phonemes=[], phoneme_cls=Phoneme):
         self.phoneme_cls = phoneme_cls
-        self.phonemes = {self.phoneme_cls(x) for x in phonemes}
+        self.phonemes = [self.phoneme_cls(x) for x in phonemes]
         self.vowel_subsystems = dict()
 
         # between 0 and 1 -- please normalise
@@ -59,12 +163,33 @@ class Phonology(object):
         self.nucleus_frequencies = dict()
         self.coda_frequencies = dict()
 
+        # syllable structure, see Syllabifier; None means no limit
+        self.maximise_onsets = True
+        self.max_onset = None
+        self.max_coda = None
+        self.permitted_codas = None
+
         self.JSON_OBJECT_NAME = "Phonology"
         self.JSON_VERSION_NO = "pre-alpha-1"
 
     def __repr__(self):
         return str(self.phonemes)
 
+    @property
+    def phonemes(self):
+        """
+        The phonemes of the phonology, as a PhonemeSet. Changing it in place
+        is fine: the cached feature matrix follows its version.
+        """
+        return self._phonemes
+
+    @phonemes.setter
+    def phonemes(self, phonemes):
+        self._phonemes = PhonemeSet(phonemes)
+        # see get_feature_matrix: the version of the phonemes the matrix was
+        # built for, and the matrix
+        self._feature_matrix = None
+
     def jdefault(self, o):
         """
         Turns some un-JSONable objects into JSONable ones
@@ -75,7 +200,11 @@ class Phonology(object):
             return o.to_json()
 
     def to_json(self):
-        return json.dumps(self.__dict__, default=self.jdefault)
+        fields = {
+            "phonemes" if k == "_phonemes" else k: v
+            for k, v in self.__dict__.items() if k != "_feature_matrix"
+        }
+        return json.dumps(fields, default=self.jdefault)
 
     def restore_phoneme_set(self, json_list):
         """
@@ -126,6 +255,13 @@ class Phonology(object):
         if "coda_frequencies" in pre_phonology:
             self.coda_frequencies = pre_phonology["coda_frequencies"]
 
+        # restore syllable structure
+        for key in ("maximise_onsets", "max_onset", "max_coda"):
+            if key in pre_phonology:
+                setattr(self, key, pre_phonology[key])
+        if pre_phonology.get("permitted_codas") is not None:
+            self.permitted_codas = set(pre_phonology["permitted_codas"])
+
     def add_phoneme(self, phoneme):
         """
         Add a Phoneme object to the Phonology
@@ -161,23 +297,36 @@ class Phonology(object):
             raise Exception(
                 "Phoneme /{}/ not found in Phonology.".format(ipa_str))
 
+    def get_feature_matrix(self):
+        """
+        Returns a FeatureMatrix with a row for each phoneme, labelled with the
+        phoneme. The matrix is cached, and rebuilt if phonemes have been
+        added or removed since. The features of the phonemes are those they
+        had when it was built: after editing a phoneme of the phonology in
+        place, call phonemes.touch().
+        """
+        phonemes = self._phonemes
+        cached = self._feature_matrix
+        if cached is not None and cached[0] == phonemes.version:
+            return cached[1]
+        feature_model = featureset.get_feature_model(
+            self.phoneme_cls._FEATURE_SET_NAME)
+        matrix = FeatureMatrix.from_phones(phonemes, feature_model)
+        self._feature_matrix = (phonemes.version, matrix)
+        return matrix
+
     def get_phonemes_with_feature(self, feature, value):
         """
         Returns subset of self.phonemes where the 'feature' is "+" or "-"
         """
-        return set(
-            [ph for ph in self.phonemes if ph.feature_is(feature, value)])
+        return self.get_phonemes_with_features({feature: value})
 
     def get_phonemes_with_features(self, feature_dict):
         """
         Takes a dictionary of {feature:value...} pairs and returns the subset
         of self.phonemes where these features are found
         """
-        valid_ph = self.phonemes.copy()
-        for feature, value in feature_dict.items():
-            valid_ph = set(
-                [ph for ph in valid_ph if ph.feature_is(feature, value)])
-        return valid_ph
+        return set(self.get_feature_matrix().select(feature_dict))
 
     def get_phoneme_dictionary(self):
         """
@@ -0,0 +1,196 @@
+"""
+Module defining Syllabifier, which divides sequences of phones into
+syllables by sonority.
+"""
+
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+def segment_class(phone) -> Tuple[int, bool]:
+    """
+    Returns the sonority of a phone and whether it can be the nucleus of a
+    syllable, i.e. whether it is a vowel or [+syllabic]. Syllabifier caches
+    the result per feature vector (see FeatureModel.property_table).
+    """
+    model = phone.feature_model
+    nucleus = phone.is_vowel()
+    if not nucleus and "syllabic" in model.features:
+        nucleus = phone.feature_is("syllabic", model._TRUE_FEATURE)
+    return phone.get_sonority(), nucleus
+
+
+class Syllabifier():
+    """
+    Divides sequences of phones into syllables in time linear in their
+    length.
+
+    Every vowel or [+syllabic] phone is the nucleus of a syllable. The
+    consonants before the first nucleus and after the last one belong to the
+    first and last syllable; each cluster between two nuclei is split into
+    the coda of one syllable and the onset of the next:
+
+    * the onset rises in sonority towards its nucleus and has at most
+      max_onset phones
+    * the coda has at most max_coda phones, all of whose symbols are in
+      permitted_codas
+    * if maximise_onsets is set, the onset is the longest that meets these
+      constraints; otherwise, it is the shortest, but not empty unless the
+      cluster is
+
+    If no split meets all of them, the coda constraints win over the
+    sonority of the onset. None means no limit for all constraints.
+
+    Constraints that are not given are taken from a Phonology's attributes
+    of the same names, if there is one.
+
+    :param phonology: A Phonology to take constraints from.
+    :param Optional[bool] maximise_onsets: Whether to prefer long onsets
+                                           (default) or long codas.
+    :param Optional[int] max_onset: The longest onset.
+    :param Optional[int] max_coda: The longest word-internal coda.
+    :param Optional[Iterable[str]] permitted_codas: The symbols allowed in
+                                                    word-internal codas.
+    """
+
+    def __init__(self,
+                 phonology=None,
+                 maximise_onsets: Optional[bool] = None,
+                 max_onset: Optional[int] = None,
+                 max_coda: Optional[int] = None,
+                 permitted_codas: Optional[Iterable[str]] = None):
+
+        def from_phonology(value, name, default=None):
+            if value is None:
+                value = getattr(phonology, name, None)
+            return default if value is None else value
+
+        self.maximise_onsets = from_phonology(maximise_onsets,
+                                              "maximise_onsets", True)
+        self.max_onset = from_phonology(max_onset, "max_onset")
+        self.max_coda = from_phonology(max_coda, "max_coda")
+        permitted_codas = from_phonology(permitted_codas, "permitted_codas")
+        self.permitted_codas = (None if permitted_codas is None else
+                                frozenset(permitted_codas))
+
+    def _classify(self, phone) -> Tuple[int, bool]:
+        children = getattr(phone, "children", None)
+        if children:
+            # a contour is as sonorous as its most sonorous part
+            classes = [self._classify(child) for child in children]
+            return (max(c[0] for c in classes), any(c[1] for c in classes))
+        table = phone.feature_model.property_table(segment_class)
+        key = (phone._specified, phone._positive)
+        try:
+            return table[key]
+        except KeyError:
+            cls = table[key] = segment_class(phone)
+            return cls
+
+    def _onset_length(self, cluster: Sequence, sonorities: Sequence[int],
+                      nucleus_sonority: int) -> int:
+        """
+        Returns how many phones at the end of an intervocalic cluster go
+        into the onset of the next syllable.
+        """
+        n = len(cluster)
+        if not n:
+            return 0
+
+        # the longest onset rising in sonority towards the nucleus
+        rise = 0
+        ceiling = nucleus_sonority
+        while rise < n and sonorities[n - 1 - rise] < ceiling:
+            ceiling = sonorities[n - 1 - rise]
+            rise += 1
+        if self.max_onset is not None:
+            rise = min(rise, self.max_onset)
+
+        # the shortest onset leaving a permitted coda; codas only get more
+        # permissible as they get shorter
+        coda = n
+        if self.permitted_codas is not None:
+            coda = 0
+            while (coda < n
+                   and cluster[coda].symbol in self.permitted_codas):
+                coda += 1
+        if self.max_coda is not None:
+            coda = min(coda, self.max_coda)
+        shortest = n - coda
+
+        if shortest > rise:
+            return shortest
+        if self.maximise_onsets:
+            return rise
+        return max(shortest, min(1, rise))
+
+    def boundaries(self, phones: Sequence) -> List[int]:
+        """
+        Returns the index of the first phone of every syllable of phones. A
+        sequence without a nucleus is one syllable.
+
+        :param Sequence phones: The phones to syllabify.
+        :returns: The syllable boundaries, starting with 0.
+        :return-type: List[int]
+        """
+        classes = [self._classify(ph) for ph in phones]
+        sonorities = [c[0] for c in classes]
+        nuclei = [i for i, c in enumerate(classes) if c[1]]
+
+        starts = [0]
+        for prev, nxt in zip(nuclei, nuclei[1:]):
+            onset = self._onset_length(phones[prev + 1:nxt],
+                                       sonorities[prev + 1:nxt],
+                                       sonorities[nxt])
+            starts.append(nxt - onset)
+        return starts
+
+    def split(self, phones: Sequence) -> List[list]:
+        """
+        Returns phones divided into syllables, as lists of phones.
+        """
+        starts = self.boundaries(phones)
+        ends = starts[1:] + [len(phones)]
+        return [list(phones[s:e]) for s, e in zip(starts, ends)]
+
+    def syllabify_word(self, word):
+        """
+        Returns a new Word with the phonemes of word, syllabified afresh. The
+        syllable containing the first nucleus of a stressed syllable of word
+        is stressed. A CompactWord gives a CompactWord.
+        """
+        # imported here, since word imports this module
+        from pylaut.language.phonology.compactword import CompactWord
+        from pylaut.language.phonology.word import Syllable, Word
+
+        if isinstance(word, CompactWord):
+            return CompactWord.from_word(
+                self.syllabify_word(word.to_word()), word.feature_model)
+
+        phones = word.phonemes
+        stressed = set()
+        i = 0
+        for syllable in word.syllables:
+            n = len(syllable.phonemes)
+            if syllable.is_stressed() and n:
+                nuclei = [j for j in range(i, i + n)
+                          if self._classify(phones[j])[1]]
+                stressed.add(nuclei[0] if nuclei else i)
+            i += n
+
+        starts = self.boundaries(phones)
+        ends = starts[1:] + [len(phones)]
+        syllables = []
+        for start, end in zip(starts, ends):
+            syllable = Syllable(phones[start:end])
+            if any(start <= j < end for j in stressed):
+                syllable.set_stressed()
+            syllables.append(syllable)
+        return Word(syllables)
+
+    def syllabify_words(self, words: Iterable) -> Iterator:
+        """
+        Resyllabifies many Words, e.g. a whole lexicon after a set of sound
+        changes, lazily and in order. See syllabify_word.
+        """
+        for word in words:
+            yield self.syllabify_word(word)
@@ -0,0 +1,184 @@
+"""
+Module defining the search structure FeatureModels use to find IPA
+representations for feature vectors that do not match any base symbol
+exactly, i.e. that need to be written as a base symbol plus diacritics.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import pylaut.utils as utils
+
+
+class SymbolSearch():
+    """
+    Finds the IPA representation of packed feature vectors (see
+    FeatureModel.encode_features) in a feature model.
+
+    The base symbols are stored in a multi-index hash: the features are split
+    into blocks, and every symbol is indexed by its exact values in each
+    block. A symbol within distance d of a vector must agree with it on every
+    feature of at least one of d + 1 blocks, so looking the vector up in each
+    block yields every candidate without scanning the whole feature set.
+
+    A candidate is usable if the features it differs in can be expressed by
+    a sequence of diacritics. Candidates are tried by distance, then in
+    feature set order; for each, the ways to cut the differing features into
+    diacritics are tried with the fewest diacritics first, abandoning any cut
+    as soon as one of its pieces has no diacritic.
+    Results are memoized per feature vector.
+    """
+
+    # the most vectors memoized before the memo is cleared
+    MEMO_SIZE = 1 << 16
+
+    def __init__(self, feature_model, max_distance: int):
+        self.feature_model = feature_model
+        self.max_distance = max_distance
+
+        n_features = len(feature_model.features)
+        self._full_mask = (1 << n_features) - 1
+
+        # base symbols in feature set order, as
+        # (symbol, specified, positive, always_different) tuples. The last
+        # mask marks values that are not +, - or 0 (e.g. PHOIBLE contours),
+        # which differ from every value a Phone can have.
+        self._entries = []
+        # entries that do not have a value for every feature; compared the
+        # way feature_hamming does, i.e. only on the features they have
+        self._partial_entries = []
+
+        for symbol, feature_list in feature_model._ipa_dict.items():
+            specified, positive, different = 0, 0, 0
+            for i, value in enumerate(feature_list[:n_features]):
+                bit = 1 << i
+                if value == feature_model._TRUE_FEATURE:
+                    specified |= bit
+                    positive |= bit
+                elif value == feature_model._FALSE_FEATURE:
+                    specified |= bit
+                elif value != feature_model._NULL_FEATURE:
+                    different |= bit
+            care = (1 << min(len(feature_list), n_features)) - 1
+            entry = (len(self._entries) + len(self._partial_entries), symbol,
+                     specified, positive, different, care)
+            if care == self._full_mask:
+                self._entries.append(entry)
+            else:
+                self._partial_entries.append(entry)
+
+        # split the features into max_distance + 1 blocks of similar size
+        n_blocks = max(1, min(max_distance + 1, n_features))
+        bounds = [n_features * b // n_blocks for b in range(n_blocks + 1)]
+        self._blocks = [((1 << hi) - 1) ^ ((1 << lo) - 1)
+                        for lo, hi in zip(bounds, bounds[1:])]
+        self._block_index = [dict() for _ in self._blocks]
+        for idx, entry in enumerate(self._entries):
+            _, _, specified, positive, different, _ = entry
+            for block, index in zip(self._blocks, self._block_index):
+                if different & block:
+                    continue
+                key = (specified & block, positive & block)
+                index.setdefault(key, []).append(idx)
+
+        # frozenset of differing features -> diacritic; as in the original
+        # reverse lookup, later diacritics win over earlier ones
+        self._reverse_diacritics = {
+            feats: dc
+            for dc, feats in feature_model._ipa_diacritics.items()
+        }
+        self._memo = dict()
+
+    def candidates(self, specified: int,
+                   positive: int) -> List[Tuple[int, int, str, int]]:
+        """
+        Returns all base symbols within max_distance of a feature vector as
+        (distance, feature set position, symbol, difference mask) tuples,
+        sorted by distance and position.
+        """
+        found = set()
+        for block, index in zip(self._blocks, self._block_index):
+            found.update(
+                index.get((specified & block, positive & block), ()))
+
+        entries = [self._entries[idx] for idx in found]
+        entries.extend(self._partial_entries)
+
+        candidates = []
+        for order, symbol, r_spec, r_pos, different, care in entries:
+            diff = ((specified ^ r_spec) | (positive ^ r_pos)
+                    | different) & care
+            distance = utils.popcount(diff)
+            if distance <= self.max_distance:
+                candidates.append((distance, order, symbol, diff))
+        candidates.sort()
+        return candidates
+
+    def _decompose(self, diffs: List[str]) -> Optional[List[str]]:
+        """
+        Returns the diacritics expressing the differing features `diffs`,
+        cut into contiguous pieces, or None if there is no way to do so.
+        Fewer pieces are preferred, then earlier cuts.
+        """
+        reverse = self._reverse_diacritics
+        n = len(diffs)
+
+        def cut(start, remaining):
+            # place `remaining` more cuts after position `start`
+            if remaining == 0:
+                dc = reverse.get(frozenset(diffs[start:]))
+                return None if dc is None else [dc]
+            for brk in range(start + 1, n - remaining + 1):
+                dc = reverse.get(frozenset(diffs[start:brk]))
+                if dc is None:
+                    continue
+                rest = cut(brk, remaining - 1)
+                if rest is not None:
+                    return [dc] + rest
+            return None
+
+        for n_cuts in range(max(n, 1)):
+            diacritics = cut(0, n_cuts)
+            if diacritics is not None:
+                return diacritics
+        return None
+
+    def search(self, specified: int, positive: int,
+               feature_list: List[str]) -> Optional[str]:
+        """
+        Returns the IPA representation of a feature vector that has no exact
+        base symbol, or None if there is none.
+
+        :param int specified: The mask of specified features.
+        :param int positive: The mask of positive features.
+        :param List[str] feature_list: The same vector as a feature list.
+        :returns: A base symbol followed by diacritics, or None.
+        :return-type: Optional[str]
+        """
+        key = (specified, positive)
+        try:
+            return self._memo[key]
+        except KeyError:
+            pass
+
+        result = None
+        features = self.feature_model.features
+        for _, _, symbol, diff in self.candidates(specified, positive):
+            diffs = [
+                feature_list[i] + feature for i, feature in enumerate(features)
+                if diff >> i & 1
+            ]
+            diacritics = self._decompose(diffs)
+            if diacritics is not None:
+                result = symbol + "".join(diacritics)
+                break
+
+        if len(self._memo) >= self.MEMO_SIZE:
+            self._memo.clear()
+        self._memo[key] = result
+        return result
+
+    def memo_info(self) -> Dict[str, int]:
+        """
+        Returns the number of memoized vectors.
+        """
+        return {"size": len(self._memo), "max_size": self.MEMO_SIZE}
@@ -8,9 +8,83 @@ as well as any eventual automagical phonological analysis.
 from copy import deepcopy
 from typing import Optional
 
+from pylaut.language.phonology import featureset
 from pylaut.language.phonology.phonology import Phonology, Phoneme
-from pylaut.utils import replace
-from pylaut.tokenise_ipa import tokenise_ipa, syllabify
+from pylaut.language.phonology.syllabifier import Syllabifier
+from pylaut.tokenise_ipa import tokenise_syllables
+
+
+def _phone_key(phone):
+    """
+    Returns what identifies a phone in structural comparisons: its class and
+    features, which are what it is interned by (see FeatureModel.intern),
+    or for contours, the keys of their parts. Phones are not interned.
+    """
+    children = getattr(phone, "children", None)
+    if children is not None:
+        return tuple(_phone_key(child) for child in children)
+    return (type(phone), phone._specified, phone._positive)
+
+
+class PhonemeList(list):
+    """
+    A list of phonemes that counts its changes, so that what is computed
+    from it can be cached (see Syllable.get_structure).
+    """
+
+    __slots__ = ("version", )
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.version = 0
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self.version += 1
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self.version += 1
+
+    def append(self, phoneme):
+        super().append(phoneme)
+        self.version += 1
+
+    def extend(self, phonemes):
+        super().extend(phonemes)
+        self.version += 1
+
+    def insert(self, index, phoneme):
+        super().insert(index, phoneme)
+        self.version += 1
+
+    def remove(self, phoneme):
+        super().remove(phoneme)
+        self.version += 1
+
+    def clear(self):
+        super().clear()
+        self.version += 1
+
+    def reverse(self):
+        super().reverse()
+        self.version += 1
+
+    def __iadd__(self, phonemes):
+        self.version += 1
+        return super().__iadd__(phonemes)
+
+    def __imul__(self, n):
+        self.version += 1
+        return super().__imul__(n)
+
+    def pop(self, *args):
+        self.version += 1
+        return super().pop(*args)
+
+    def sort(self, *, key=None, reverse=False):
+        super().sort(key=key, reverse=reverse)
+        self.version += 1
 
 
 class Syllable(object):
@@ -20,17 +94,122 @@ class Syllable(object):
     surrounded optionally by less sonorous phonemes.
     """
 
+    __slots__ = ("_phonemes", "stressed", "word_position", "_cache_version",
+                 "_structure", "_pattern", "_phones_key", "_phones_hash",
+                 "_phone_set", "_phone_set_version")
+
     def __init__(self, phonemes):
         self.phonemes = [p for p in phonemes if p is not None]
         self.stressed = False
         self.word_position = None
-        self.structure = None
+
+    @property
+    def phonemes(self):
+        """
+        The phonemes of the syllable, as a PhonemeList. Changing it in place
+        is fine: the cached structure follows its version.
+        """
+        return self._phonemes
+
+    @phonemes.setter
+    def phonemes(self, phonemes):
+        if type(phonemes) is not PhonemeList:
+            phonemes = PhonemeList(phonemes)
+        self._phonemes = phonemes
+        self._cache_version = None
+        self._phone_set_version = None
+
+    def _cache_is_current(self):
+        return self._cache_version == self._phonemes.version
+
+    def _validate_cache(self):
+        if not self._cache_is_current():
+            self._structure = None
+            self._pattern = None
+            self._phones_key = None
+            self._phones_hash = None
+            self._cache_version = self._phonemes.version
+
+    @property
+    def structure(self):
+        """
+        The cached (onset, nucleus, coda) of the syllable, or None if it has
+        not been computed since the phonemes last changed.
+        """
+        return self._structure if self._cache_is_current() else None
+
+    def structural_key(self):
+        """
+        Returns a hashable key made of the classes and features of the
+        syllable's phonemes and its stress. Syllables with equal keys are
+        equal, wherever they are in a word. If the phonemes are all
+        interned, and so cannot be changed in place, the phonemes' part is
+        cached until the phonemes change.
+        """
+        self._validate_cache()
+        key = self._phones_key
+        if key is None:
+            key = tuple(_phone_key(ph) for ph in self._phonemes)
+            if all(ph._frozen for ph in self._phonemes):
+                self._phones_key = key
+        return (self.stressed, key)
+
+    def phone_set(self):
+        """
+        Returns the feature model of the syllable's phonemes and the set of
+        their phone IDs, as a bitset (bit i for phone ID i), or None if they
+        are not all internable phones of one feature model. Contours count
+        as not internable. If the phonemes are all interned, and so cannot
+        be changed in place, the result is cached until the phonemes change.
+        """
+        if self._phone_set_version == self._phonemes.version:
+            return self._phone_set
+        model = None
+        bits = 0
+        frozen = True
+        for ph in self._phonemes:
+            if getattr(ph, "children", None) is not None or (
+                    model is not None and ph.feature_model is not model):
+                bits = None
+                break
+            model = ph.feature_model
+            frozen = frozen and ph._frozen
+            phone_id = ph.phone_id
+            if phone_id is None:
+                bits = None
+                break
+            bits |= 1 << phone_id
+        phone_set = None if bits is None else (model, bits)
+        if frozen:
+            self._phone_set = phone_set
+            self._phone_set_version = self._phonemes.version
+        return phone_set
+
+    def _share_phone_set(self, other):
+        """
+        Gives the syllable the cached phone set of other, if it has one,
+        which has the same phonemes.
+        """
+        if other._phone_set_version == other._phonemes.version:
+            self._phone_set = other._phone_set
+            self._phone_set_version = self._phonemes.version
 
     def __eq__(self, other):
-        return repr(self) == repr(other)
+        if self is other:
+            return True
+        if not isinstance(other, Syllable):
+            return NotImplemented
+        return self.structural_key() == other.structural_key()
 
     def __hash__(self):
-        return self.__repr__().__hash__()
+        self._validate_cache()
+        phones_hash = self._phones_hash
+        if phones_hash is None:
+            phones_hash = hash(self.structural_key()[1])
+            # the key is only cached if it cannot go stale
+            if self._phones_key is not None:
+                self._phones_hash = phones_hash
+        return hash((self.stressed, phones_hash))
 
     def __iter__(self):
         for ph in self.phonemes:
@@ -111,39 +290,31 @@ class Syllable(object):
 
     def find_nuclei(self):
         """
-        Finds all possible nuclei in the syllable. So far, has problems
-        dealing with things that aren't easy and unambiguous. Additionally,
-        this relies on phonemes knowing their own sonority, which may be an
-        architectural problem in the future.
+        Finds all possible nuclei in the syllable: the first phoneme of each
+        run of the most sonorous phonemes, where all vowels count as equally
+        sonorous. Syllables without vowels or sonorants (sonority 5 or more)
+        have none. So far, has problems dealing with things that aren't easy
+        and unambiguous. Additionally, this relies on phonemes knowing their
+        own sonority, which may be an architectural problem in the future.
         """
-        sonorities = [(ph, ph.get_sonority()) for ph in self.phonemes]
-        # check to see if there are phones w/ sonorities >= 10
-        if max(sonorities, key=lambda x: x[1])[1] >= 10:
-            maximum_sonority = 10
-            # reduce all vowels to level 10, n := 10
-            sonorities = [(s[0], 10) if s[1] > 10 else s for s in sonorities]
-            # if there are none, check for sonorities >= 5 and use max as n
-        elif max(sonorities, key=lambda x: x[1])[1] >= 5:
-            maximum_sonority = max(sonorities, key=lambda x: x[1])[1]
-            # if there are neither, return 0
-        else:
+        sonorities = [ph.get_sonority() for ph in self.phonemes]
+        if not sonorities:
+            return []
+        peak = max(sonorities)
+        if peak >= 10:
+            # all vowels are 10
+            peak = 10
+        elif peak < 5:
             return []
 
-        # group together all adjacent ns
-        # TODO: fun fact: len(a) is too big, and a smaller value will work.
-        # find it
-        for m in range(len(sonorities)):
-            for i, n in enumerate(sonorities):
-                try:
-                    if i > 0 and sonorities[i - 1][1] == n[1]:
-                        sonorities[i] = None
-                        sonorities = [x for x in sonorities if x]
-                        break
-                except TypeError:
-                    continue
-
-        # return ns in the list
-        return [x[0] for x in sonorities if x[1] == maximum_sonority]
+        nuclei = []
+        previous = None
+        for ph, sonority in zip(self.phonemes, sonorities):
+            sonority = min(sonority, peak)
+            if sonority == peak and previous != peak:
+                nuclei.append(ph)
+            previous = sonority
+        return nuclei
 
     def count_nuclei(self):
         """
@@ -155,59 +326,65 @@ class Syllable(object):
         return len(self.find_nuclei())
 
     def get_structure(self):
-        if self.structure is not None:
-            return self.structure
+        """
+        Returns the onset, nucleus and coda of the syllable as lists of
+        phonemes. The result is cached until the phonemes change.
+        """
+        self._validate_cache()
+        if self._structure is None:
+            self._structure = self._find_structure()
+        return self._structure
+
+    def _find_structure(self):
+        nuclei_num = self.count_nuclei()
+        if nuclei_num < 1:
+            raise Exception("Syllable {} has no nucleus!".format(self))
+        elif nuclei_num > 1:
+            raise Exception("Syllable {} has {} nuclei!".format(
+                self, nuclei_num))
         else:
-            nuclei_num = self.count_nuclei()
-            if nuclei_num < 1:
-                raise Exception("Syllable {} has no nucleus!".format(self))
-            elif nuclei_num > 1:
-                raise Exception("Syllable {} has {} nuclei!".format(
-                    self, nuclei_num))
-            else:
+            pass
+
+        non_tones = list(filter(lambda p: not p.is_tone(), self.phonemes))
+
+        onset, nucleus, coda = [], [], []
+        if self.contains_vowel():  # the job is easier!
+            n, c = False, False
+            for i, ph in enumerate(non_tones):
+                # we haven"t triggered either nucleus or coda bit + is C
+                if not n and not c and ph.is_consonant():
+                    onset += [ph]
+                    # we haven't triggered nucleus or coda bit + is V
+                elif not n and not c and ph.is_vowel():
+                    n = True
+                    nucleus += [ph]
+                    # we HAVE triggered nucleus but not coda bit + is V
+                elif n and not c and ph.is_vowel():
+                    nucleus += [ph]
+                    # we HAVE triggered nucleus but not coda bit + is V
+                elif n and not c and ph.is_consonant():
+                    c = True
+                    coda += [ph]
+                    # nucleus and coda bit both triggered, all consonants
+                    # now go in coda
+                elif n and c and ph.is_consonant():
+                    coda += [ph]
+                    # this would mean multiple nuclei + the first part of
+                    # this is supposed to check for this!
+                elif n and c and ph.is_vowel():
+                    raise Exception("Vowel {} found in coda of {}".format(
+                        ph, self))
+        else:
+            nc = self.find_nuclei()[0]
+            nucleus.append(nc)
+            ncidx = non_tones.index(nc)
+            onset = non_tones[:ncidx]
+            try:
+                coda = non_tones[ncidx + 1:]
+            except IndexError:
                 pass
 
-            non_tones = list(filter(lambda p: not p.is_tone(), self.phonemes))
-
-            onset, nucleus, coda = [], [], []
-            if self.contains_vowel():  # the job is easier!
-                n, c = False, False
-                for i, ph in enumerate(non_tones):
-                    # we haven"t triggered either nucleus or coda bit + is C
-                    if not n and not c and ph.is_consonant():
-                        onset += [ph]
-                        # we haven't triggered nucleus or coda bit + is V
-                    elif not n and not c and ph.is_vowel():
-                        n = True
-                        nucleus += [ph]
-                        # we HAVE triggered nucleus but not coda bit + is V
-                    elif n and not c and ph.is_vowel():
-                        nucleus += [ph]
-                        # we HAVE triggered nucleus but not coda bit + is V
-                    elif n and not c and ph.is_consonant():
-                        c = True
-                        coda += [ph]
-                        # nucleus and coda bit both triggered, all consonants
-                        # now go in coda
-                    elif n and c and ph.is_consonant():
-                        coda += [ph]
-                        # this would mean multiple nuclei + the first part of
-                        # this is supposed to check for this!
-                    elif n and c and ph.is_vowel():
-                        raise Exception("Vowel {} found in coda of {}".format(
-                            ph, self))
-            else:
-                nc = self.find_nuclei()[0]
-                nucleus.append(nc)
-                ncidx = non_tones.index(nc)
-                onset = non_tones[:ncidx]
-                try:
-                    coda = non_tones[ncidx + 1:]
-                except IndexError:
-                    pass
-
-            self.structure = (onset, nucleus, coda)
-            return self.structure
+        return (onset, nucleus, coda)
 
     def get_onset(self):
         return self.get_structure()[0]
@@ -268,6 +445,12 @@ class Syllable(object):
                 "Syllable {} contains no polyphthong".format(self))
 
     def get_pattern(self):
+        self._validate_cache()
+        if self._pattern is None:
+            self._pattern = self._find_pattern()
+        return self._pattern
+
+    def _find_pattern(self):
         ptn = []
         onset, nucleus, coda = self.get_structure()
         for c in onset:
@@ -286,6 +469,8 @@ class Syllable(object):
 
 
 class Word(object):
+    __slots__ = ("syllables", "phonemes")
+
     def __init__(self, syllables):
         self.syllables = syllables
         self.phonemes = [
@@ -320,6 +505,56 @@ class Word(object):
         for syl in self.syllables:
             yield syl
 
+    def shallow_copy(self):
+        """
+        Returns a new Word with new Syllables holding the same phonemes. It
+        can be changed in place without changing this one.
+        """
+        syllables = []
+        for syl in self.syllables:
+            new = Syllable(PhonemeList(syl.phonemes))
+            new.stressed = syl.stressed
+            new._share_phone_set(syl)
+            syllables.append(new)
+        return Word(syllables)
+
+    def structural_key(self):
+        """
+        Returns a hashable key made of the keys of the word's syllables (see
+        Syllable.structural_key). Words with equal keys are equal.
+        """
+        return tuple(syl.structural_key() for syl in self.syllables)
+
+    def phone_set(self, feature_model) -> Optional[int]:
+        """
+        Returns the set of the phone IDs of the word's phonemes in
+        feature_model as a bitset (bit i for phone ID i), or None if they
+        are not all internable phones of feature_model. The set of each
+        syllable is cached (see Syllable.phone_set), so this is cheap to
+        ask again until the word changes.
+        """
+        bits = 0
+        for syl in self.syllables:
+            if not syl.phonemes:
+                continue
+            phone_set = syl.phone_set()
+            if phone_set is None or phone_set[0] is not feature_model:
+                return None
+            bits |= phone_set[1]
+        return bits
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, Word):
+            return NotImplemented
+        return (len(self.syllables) == len(other.syllables)
+                and all(a == b for a, b in zip(self.syllables,
+                                               other.syllables)))
+
+    def __hash__(self):
+        return hash(tuple(hash(syl) for syl in self.syllables))
+
     def has_stress(self) -> bool:
         return any(map(lambda s: s.is_stressed(), self.syllables))
 
@@ -352,6 +587,23 @@ class WordFactory(object):
             self.phoneme_cls = phonology.phoneme_cls
         else:
             self.phoneme_cls = phoneme_cls
+        self.feature_model = featureset.get_feature_model(
+            getattr(self.phoneme_cls, "_FEATURE_SET_NAME", "monophone"))
+        # IPA segment -> Phoneme, copied for every occurrence
+        self._segment_memo = dict()
+        self.syllabifier = Syllabifier(self.phonology)
+
+    def make_phoneme(self, segment):
+        """
+        Returns a new Phoneme for an IPA segment. Each distinct segment is
+        only looked up in the feature set once per factory; later Phonemes
+        are copies of the first.
+        """
+        try:
+            phoneme = self._segment_memo[segment]
+        except KeyError:
+            phoneme = self._segment_memo[segment] = self.phoneme_cls(segment)
+        return phoneme.copy()
 
     def make_syllable(self, segs):
         proto_syl = []
@@ -363,19 +615,16 @@ class WordFactory(object):
             else:
                 return None
         for ipa_seg in segs:
-            proto_syl += [self.phoneme_cls(ipa_seg)]
+            proto_syl += [self.make_phoneme(ipa_seg)]
         syl = Syllable(proto_syl)
         if stressed:
             syl.set_stressed()
         return syl
 
     def make_word(self, raw_word):
-        # turn ' into .' to allow splitting into syllables
+        # the tokeniser starts a new syllable at every ' or ˈ
         # what about ˌ ?
-        raw_word = replace(raw_word, "'", ".", "'")
-        raw_word = replace(raw_word, "ˈ", ".", "ˈ")
-        # raw_syllables = [syl for syl in split(raw_word, ".") if syl]
-        raw_syllables = tokenise_ipa(raw_word)
+        raw_syllables = tokenise_syllables(raw_word, self.feature_model)
         syllables = []
         for rs in raw_syllables:
             syl = []
@@ -394,7 +643,7 @@ class WordFactory(object):
                 proto_rs = rs
 
             for ipa_char in proto_rs:
-                proto_syl += [self.phoneme_cls(ipa_char)]
+                proto_syl += [self.make_phoneme(ipa_char)]
             syl = Syllable(proto_syl)
             if stressed:
                 syl.set_stressed()
@@ -404,9 +653,26 @@ class WordFactory(object):
         word = Word(syllables)
         return word
 
+    def make_words(self, raw_words):
+        """
+        Makes a Word for each IPA string in raw_words, lazily, in order.
+        Segments are memoised across the words (see make_phoneme), so making
+        a lexicon costs one feature lookup per distinct segment.
+        """
+        for raw_word in raw_words:
+            yield self.make_word(raw_word)
+
     def fromlist(self, seglist):
-        syllabified = syllabify(seglist, sep='.')
-        return self.make_word(syllabified)
+        """
+        Makes a Word from a list of IPA segments, or an IPA string without
+        syllable breaks, and divides it into syllables by sonority (see
+        Syllabifier).
+        """
+        if isinstance(seglist, str):
+            seglist = self.feature_model.tokeniser().segments(seglist)
+        phonemes = [self.make_phoneme(seg) for seg in seglist]
+        return Word([Syllable(syl)
+                     for syl in self.syllabifier.split(phonemes)])
 
 
 ###############################################################################
@@ -4,15 +4,22 @@ internally and externally in the form of user-callable library functions.
 """
 
 from pylaut.change import change, change_functions
+from pylaut.language.phonology import featureset
+from pylaut.language.phonology.naturalclass import NaturalClass, SymbolClass
 from pylaut.language.phonology.phone import Phone
+from pylaut.language.phonology.phonology import Phoneme
 from typing import Any
 
 
-def make_predicate(parser_entity):
+def make_predicate(parser_entity, feature_model=None):
     """
     This function creates a predicate on a Phone to use with
     Change.to. It switches on types to determine how best to construct
-    such a predicate.
+    such a predicate. Feature expressions are compiled into NaturalClass
+    predicates against feature_model, by default that of Phoneme, and
+    phonemes and symbols into SymbolClass predicates, so that changes made
+    with them can be compiled and indexed (see the fst and dispatch
+    modules).
     """
 
     def default(_: Any) -> bool:
@@ -22,31 +29,19 @@ def make_predicate(parser_entity):
 
     # We have a feature expression
     if isinstance(parser_entity, dict):
-        predicates = []
-        for k, v in parser_entity.items():
-            predicates.append(lambda p, k=k, v=v: p.feature_is(k, v))
-
-        def feature_predicate(p, predicates=predicates):
-            for f in predicates:
-                if not f(p):
-                    return False
-            return True
-
-        predicate = feature_predicate
+        if feature_model is None:
+            feature_model = featureset.get_feature_model(
+                Phoneme._FEATURE_SET_NAME)
+        predicate = NaturalClass(parser_entity, feature_model)
     # A phoneme
     elif isinstance(parser_entity, Phone):
-
-        def phone_predicate(p, t=parser_entity):
-            return p.is_symbol(t.symbol)
-
-        predicate = phone_predicate
+        predicate = SymbolClass(parser_entity.symbol)
     # An improper phoneme
     elif isinstance(parser_entity, str):
-
-        def symbol_predicate(p, t=parser_entity):
-            return p.is_symbol(t)
-
-        predicate = symbol_predicate
+        predicate = SymbolClass(parser_entity)
+    # A phoneme expression of a single phoneme
+    elif isinstance(parser_entity, tuple) and len(parser_entity) == 1:
+        return make_predicate(parser_entity[0], feature_model)
     # A phoneme list
     elif isinstance(parser_entity, tuple):
         predicates = []
@@ -58,7 +53,7 @@ def make_predicate(parser_entity):
 
         predicate = list_predicate
     elif isinstance(parser_entity, list):
-        return make_predicate(parser_entity[0])
+        return make_predicate(parser_entity[0], feature_model)
 
     return predicate
 
@@ -68,8 +63,8 @@ def metathesis(left, right):
     pr = make_predicate(right)
 
     def exchange(this):
-        current = this.phonemes.index(this.phoneme)
-        sylidx = this.syllable.phonemes.index(this.phoneme)
+        current = this.phoneme_index
+        sylidx = this.syllable_phoneme_index
         try:
             next = this.phonemes[current + 1]
         except IndexError:
@@ -80,8 +75,8 @@ def metathesis(left, right):
         try:
             this.syllable.phonemes[sylidx + 1] = this.phoneme
         except IndexError:
-            cursyl = this.syllables.index(this.syllable)
-            this.syllables[cursyl + 1].phonemes[0] = this.phoneme
+            this.syllables[this.syllable_index + 1].phonemes[0] = \
+                this.phoneme
         this.advance()
         return next
 
@@ -124,8 +119,8 @@ def epenthesis(this, phoneme):
 
     def epenthesize(td, p=p, t=phoneme):
         if p(td.phoneme):
-            cur_idx = td.phonemes.index(td.phoneme)
-            syl_idx = td.syllable.phonemes.index(td.phoneme)
+            cur_idx = td.phoneme_index
+            syl_idx = td.syllable_phoneme_index
             td.phonemes.insert(cur_idx + 1, t)
             td.syllable.phonemes.insert(syl_idx + 1, t)
             td.advance()
@@ -136,7 +131,7 @@ def epenthesis(this, phoneme):
 
 
 def resyllabify(*args):
-    return change.Resyllabify()
+    return change_functions.Resyllabify()
 
 
 def get_library():
@@ -6,10 +6,13 @@ language.
 
 from lark import Lark, ParseError, Transformer
 from pkgutil import get_data
+from pylaut.language.phonology import featureset as fs
+from pylaut.language.phonology.naturalclass import NaturalClass, SymbolClass
 from pylaut.language.phonology.phone import Phone
 from pylaut.language.phonology.phonology import Phoneme
 from pylaut.language.phonology.word import Syllable
-from pylaut.change.change import Change, This, ChangeGroup
+from pylaut.change.change import (AllOf, AnyOf, Change, ChangeGroup, Not,
+                                  This)
 from pylaut.change import change_functions
 from pylaut.change.soundlaw import SoundLaw, SoundLawGroup
 from pylaut.pylautlang.lib import get_library, make_predicate
@@ -35,30 +38,19 @@ def get_parser():
 def phoneme_list_from_string(s):
     """
     An ad-hoc tokenizing function that creates a list of Phonemes from
-    an IPA string. Returns a tuple of Phoneme objects; the zero Phoneme
-    returns an empty tuple, a single phoneme a singleton, and so on.
+    an IPA string. Returns a tuple of interned Phoneme objects; the zero
+    Phoneme returns an empty tuple, a single phoneme a singleton, and so on.
 
     :param str s: An IPA string representing one or more phonemes.
     :returns: A tuple of zero or more Phoneme objects.
     """
     p = Phoneme()
     ret = []
-    curr = []
-    for ch in s:
-        if curr == []:
-            curr.append(ch)
-        elif ch in p.feature_model._ipa_diacritics:
-            curr.append(ch)
-        else:
-            try:
-                ret.append(Phoneme(curr))
-            except KeyError:
-                pass
-            curr = [ch]
-    try:
-        ret.append(Phoneme(curr))
-    except KeyError:
-        pass
+    for segment in p.feature_model.tokeniser().segments(s):
+        try:
+            ret.append(Phoneme(segment).intern())
+        except KeyError:
+            pass
     return tuple(ret)
 
 
@@ -152,6 +144,14 @@ class PyLautLang(Transformer):
         super().__init__()
         self.funcs = funcs
         self.featureset = featureset
+        # the feature model feature expressions are compiled against
+        if featureset is None:
+            self.feature_model = fs.get_feature_model(
+                Phoneme._FEATURE_SET_NAME)
+        elif isinstance(featureset, str):
+            self.feature_model = fs.get_feature_model(featureset)
+        else:
+            self.feature_model = featureset
         self.parser = get_parser()
 
     def compile(self, scstring):
@@ -360,23 +360,15 @@ class PyLautLang(Transformer):
         :returns: A Change object.
         """
         domain, codomain = args[0], args[1]
-        ch = Change()
-        for name, value in codomain.items():
-            ch = ch.do(lambda td: change_functions.change_feature(
-                td.phoneme, name, value))
-
-        def match_features(p, fdict=domain):
-            """
-            Function that closes over the change domain.
-            Matches the domain feature values with the
-            target phoneme's features.
-            """
-            for name, value in fdict.items():
-                if not p.feature_is(name, value):
-                    return False
-            return True
-
-        ch = ch.to(This.forall(Phone)(match_features))
+        # change_feature leaves features with values other than + and -
+        # alone, so they can be dropped here
+        edits = {
+            name: value
+            for name, value in codomain.items() if value in ('+', '-')
+        }
+        ch = Change().do(change_functions.SetFeatures(edits))
+        ch = ch.to(This.forall(Phone)(NaturalClass(domain,
+                                                   self.feature_model)))
         return ch
 
     def replace_by_feature(self, args):
@@ -389,20 +381,8 @@ class PyLautLang(Transformer):
         :returns: A Change object.
         """
         domain, codomain = args[0], args[1]
-
-        def match_features(p, fdict=domain):
-            """
-            Function that closes over the change domain.
-            Matches the domain feature values with the
-            target phoneme's features.
-            """
-            for name, value in fdict.items():
-                if not p.feature_is(name, value):
-                    return False
-            return True
-
-        ch = Change().do(lambda p: codomain).to(
-            This.forall(Phone)(match_features))
+        ch = Change().do(change_functions.ReplaceWith(codomain)).to(
+            This.forall(Phone)(NaturalClass(domain, self.feature_model)))
         return ch
 
     def positive_condition(self, args):
@@ -423,7 +403,7 @@ class PyLautLang(Transformer):
         :param list args: A list with one element, a predicate.
         :returns: A predicate.
         """
-        return lambda td: not args[0](td)
+        return Not(args[0])
 
     def and_condition(self, args):
         """
@@ -465,30 +445,9 @@ class PyLautLang(Transformer):
                 and_conditions.append(condition)
             else:
                 or_conditions.append(condition)
-
-        def predicate(td, ac=and_conditions, oc=or_conditions):
-            """
-            Function that closes over condition lists and runs them
-            on its transducer argument.
-            """
-
-            def run_ac():
-                for f in ac:
-                    if not f(td):
-                        return False
-                return True
-
-            def run_oc():
-                if not oc:
-                    return True
-                for f in oc:
-                    if f(td):
-                        return True
-                return False
-
-            return run_ac() and run_oc()
-
-        return predicate
+        if or_conditions:
+            and_conditions.append(AnyOf(or_conditions))
+        return AllOf(and_conditions)
 
     def basic_conditional(self, args):
         """
@@ -659,37 +618,20 @@ class PyLautLang(Transformer):
                 # slashes.
                 else:
                     for p in arg:
-                        conditions.append(
-                            This.at(Phone, pos, lambda q, p=p: q.is_symbol(p)))
+                        conditions.append(This.at(Phone, pos, SymbolClass(p)))
             elif isinstance(arg, dict):
                 # If the argument is a dictionary, we have a feature expression
                 # Match the features according to the expression
-                for k, v in arg.items():
-                    conditions.append(
-                        This.at(
-                            Phone, pos,
-                            lambda p, k=k, v=v: p.feature_is(k, v)))
+                conditions.append(
+                    This.at(Phone, pos, NaturalClass(arg,
+                                                     self.feature_model)))
             else:
                 # The argument is a Phone
                 # Perform by-symbol matching
-                s = arg.symbol
                 conditions.append(
-                    This.at(Phone, pos, lambda q, s=s: q.is_symbol(s)))
-
-        def run_conditions(td, c=conditions):
-            """
-            Function that closes over the condition list
-            from the relative expression translation.
-            """
-            for f in c:
-                try:
-                    if not f(td):
-                        return False
-                except IndexError:
-                    return False
-            return True
-
-        return run_conditions
+                    This.at(Phone, pos, SymbolClass(arg.symbol)))
+
+        return AllOf(conditions)
 
     def inexpr(self, args):
         """
@@ -703,10 +645,12 @@ class PyLautLang(Transformer):
 
         def is_in_position(td, get_current_position=current_position):
             cpos = get_current_position(td)
+            # positions are compared by identity: equal syllables may be in
+            # different places
             if isinstance(cpos, Syllable):
-                return td.syllable == cpos
+                return td.syllable is cpos
             elif isinstance(cpos, Phone):
-                return td.phoneme == cpos
+                return td.phoneme is cpos
             else:
                 return False
 
@@ -738,7 +682,7 @@ class PyLautLang(Transformer):
 
         entity = args[0]
         value = args[1]
-        pred = make_predicate(value)
+        pred = make_predicate(value, self.feature_model)
 
         def is_true(td, f=entity, pred=pred):
             return pred(f(td))
@@ -762,20 +706,19 @@ class PyLautLang(Transformer):
             if counter == "Syllable":
 
                 def get_at_syllable_offset(this, p=position):
-                    idx = this.syllables.index(this.syllable)
+                    idx = this.syllable_index + p
                     if idx < 0 or idx >= len(this.syllables):
                         return None
-                    return this.syllables[this.syllables.index(this.syllable) +
-                                          p]
+                    return this.syllables[idx]
 
                 return get_at_syllable_offset
             elif counter == "Phone":
 
                 def get_at_phoneme_offset(this, p=position):
-                    idx = this.phonemes.index(this.phoneme)
+                    idx = this.phoneme_index + p
                     if idx < 0 or idx >= len(this.phonemes):
                         return None
-                    return this.phonemes[this.phonemes.index(this.phoneme) + p]
+                    return this.phonemes[idx]
 
                 return get_at_phoneme_offset
         else:
@@ -837,12 +780,8 @@ class PyLautLang(Transformer):
                 # f(td) must produce a vowel!
                 e = f(td)
                 if isinstance(e, list):
-                    vowel = e[0].copy()
-                else:
-                    vowel = e.copy()
-                vowel.set_features_false("long")
-                vowel.set_symbol_from_features()
-                return vowel
+                    e = e[0]
+                return e.with_feature("long", "-")
 
             ret = get_vowel_quality
         elif field == 'is_monosyllable':
@@ -1,6 +1,7 @@
 from itertools import tee
-from pkgutil import get_data
-from pylaut import utils
+from pylaut.language.phonology import featureset
+from pylaut.language.phonology.phonology import Phoneme
+from pylaut.language.phonology.syllabifier import Syllabifier
 
 
 def pairwise(iterable):
@@ -10,53 +11,52 @@ def pairwise(iterable):
     return zip(a, b)
 
 
-def tokenise_ipa(s, feature_set=None):
+def tokenise_syllables(s, feature_set=None):
     """
-    Outputs a tuple of tokenised ipa symbols, with diacritics grouped with base
-    glyphs. If the ipa is presented sI'lab.ik.lI, it outputs a tuple of tuples
+    Outputs a tuple of syllables, each a tuple of tokenised ipa symbols with
+    diacritics grouped with base glyphs, even if there is only one syllable.
+    A stressed syllable starts with its stress mark. See
+    FeatureModel.tokeniser.
     """
     if not feature_set:
-        dia_file = get_data("pylaut", "data/monophone_ipa_diacritics").decode(
-            'utf-8')
-        read_words = [x for x in dia_file.splitlines()]
-        diacritics = [x.split()[0] for x in read_words]
-    else:
-        diacritics = feature_set._feature_set_ipa_diacritics.keys()
-
-    s = utils.replace(s, "'", ".'")
-    sl = utils.split(s, ".")
-
-    tokens = []
-
-    for syllable in sl:
-        syllable_tokens = []
-        # if syllable and syllable[0] == "'":
-        #     stress = "'"
-        #     syl = syllable[1:]
-        # else:
-        #     stress = ""
-        #     syl = syllable
-        syl = syllable
-
-        for i, c in enumerate(syl):
-            if c in diacritics:
-                pass
-            elif i < len(syl)-1 and syl[i+1] in diacritics:
-                syllable_tokens += [c + syl[i+1]]
-            else:
-                syllable_tokens += [c]
-
-        tokens += [syllable_tokens]
+        feature_set = featureset.get_feature_model("monophone")
+    return tuple(feature_set.tokeniser().syllables(s))
 
-        out = [tuple(x) for x in tokens]
 
-        if len(out) == 1:
-            out = out[0]
+def tokenise_ipa(s, feature_set=None):
+    """
+    Outputs a tuple of tokenised ipa symbols, with diacritics grouped with base
+    glyphs. If the ipa is presented sI'lab.ik.lI, it outputs a tuple of tuples
+    """
+    out = tokenise_syllables(s, feature_set)
 
-        out = tuple(t for t in out if t is not ())
+    if len(out) == 1:
+        out = out[0]
 
     return out
 
 
-def syllabify(seglist: list, sep: str) -> list:
-    pass
+def syllabify(seglist: list, sep: str = ".", syllabifier=None,
+              phoneme_cls=Phoneme) -> list:
+    """
+    Divides a list of segments, as IPA strings or Phones, into syllables by
+    sonority, and outputs it with sep between the syllables, e.g. ["a", "m",
+    "a", "r", "e"] gives ["a", ".", "m", "a", ".", "r", "e"]. IPA strings are
+    made into phoneme_cls. See Syllabifier.
+    """
+    if syllabifier is None:
+        syllabifier = Syllabifier()
+    phones = dict()
+    for seg in seglist:
+        if isinstance(seg, str) and seg not in phones:
+            phones[seg] = phoneme_cls(seg)
+    starts = set(syllabifier.boundaries(
+        [phones.get(seg, seg) if isinstance(seg, str) else seg
+         for seg in seglist]))
+
+    out = []
+    for i, seg in enumerate(seglist):
+        if i and i in starts:
+            out.append(sep)
+        out.append(seg)
+    return out
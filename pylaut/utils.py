@@ -18,6 +18,14 @@ def powerset(iterable):
         itertools.combinations(s, r) for r in range(len(s) + 1))
 
 
+if hasattr(int, "bit_count"):
+    def popcount(n):
+        return n.bit_count()
+else:
+    def popcount(n):
+        return bin(n).count("1")
+
+
 def forall(ls, pred):
     return all(map(pred, ls))
 
@@ -42,6 +50,17 @@ def milchreis():
     return float("Infinity")
 
 
+def index_of(ls, item):
+    """
+    Returns the index of item in ls, comparing by identity rather than by
+    equality, so that equal items at different positions are told apart.
+    """
+    for i, x in enumerate(ls):
+        if x is item:
+            return i
+    raise ValueError("item is not in list")
+
+
 def flatten(ls):
     return [elem for subl in ls for elem in subl]
 
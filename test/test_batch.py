@@ -0,0 +1,105 @@
+"""
+Test module for batch.py
+"""
+
+import pytest
+from pylaut.change.batch import MAX_PHONES, BatchEngine, run_batch
+from pylaut.language.lexicon import Lexicon
+from pylaut.language.phonology import word
+from pylaut.language.phonology.compactword import CompactWord, WordTable
+from pylaut.language.phonology.phonology import Phoneme
+from pylaut.pylautlang import parser
+
+LEXICON = ["ma'sa.la", "'kat", "a'ma.re", "'sa.na.ke", "pe'ti.kas", "'lo.ra",
+           "a.ta'pas", "'ne.ka", "ka'ren.tas", "'e.pa.la", "'a"]
+
+
+@pytest.fixture
+def wf():
+    return word.WordFactory()
+
+
+def test_agrees_with_words(wf):
+    law = parser.compile("""
+    CHANGE BEGIN
+      /a/ -> /e/ | #_
+      /e/ -> /0/ | _#
+      [+sibilant] -> /ts/ | [-consonantal]_ | _#
+      /n/ -> /m/ | ! _[-consonantal]
+      [-consonantal] -> [+long] | #[+consonantal]_ & !_[+consonantal]
+      /k/ => /x/ | [-consonantal]_[-consonantal]
+          => /k/
+      Metathesis([+sibilant -voice],[-consonantal])
+      [+consonantal] -> [+voice] | [+voice]_
+      /l/ -> /0/ | #_
+    END
+    """)[0]
+    words = list(wf.make_words(LEXICON))
+    results = run_batch([law], words)
+    assert results == [CompactWord.from_word(law.apply(w)) for w in words]
+
+
+def test_masks(wf):
+    engine = BatchEngine(WordTable.from_words(wf.make_words(["'ka.ta",
+                                                             "'ap"])))
+    assert len(engine) == 2
+    # one byte per position: /ka.ta/ then /ap/
+    assert engine.word_starts_mask().to_bytes(6, "little") == bytes(
+        [1, 0, 0, 0, 1, 0])
+    assert engine.word_ends_mask().to_bytes(6, "little") == bytes(
+        [0, 0, 0, 1, 0, 1])
+    vowels = parser.NaturalClass({"consonantal": "-"},
+                                 engine.feature_model)
+    # positions followed by a vowel of the same word
+    assert engine.shifted(engine.test_mask(vowels), 1).to_bytes(
+        6, "little") == bytes([1, 0, 1, 0, 0, 0])
+
+
+def test_lexicon_batch():
+    lexicon = Lexicon()
+    lexicon.from_string("ma'sa.la masala sauce\n'kat kat cat\n")
+    law = parser.compile("CHANGE BEGIN /a/ -> /e/ | _# END")[0]
+    new = lexicon.run_sound_changes([law], batch=True)
+    assert [repr(e) for e in new.entries] == ["/ma.'sa.le/", "/'kat/"]
+    assert isinstance(new.entries[0].phonetic, word.Word)
+
+
+def test_too_many_phones(wf):
+    features = wf.feature_model.features[-9:]
+
+    def words(n):
+        # n words of a distinct phone each, then /a/
+        for bits in range(n):
+            phone = Phoneme("ʀ")
+            for k, feature in enumerate(features):
+                if bits >> k & 1:
+                    value = "-" if phone.feature_is_true(feature) else "+"
+                    phone.set_feature(feature, value)
+            yield word.Word([word.Syllable([phone]),
+                             word.Syllable([Phoneme("a")])])
+
+    law = parser.compile("""
+    CHANGE BEGIN
+      /a/ -> /e/
+      /e/ -> /iː/ | _#
+    END
+    """)[0]
+    # too many phones from the start, and only after the first change
+    for n in (MAX_PHONES + 45, MAX_PHONES - 2):
+        table = WordTable.from_words(words(n))
+        results = list(BatchEngine(table).run([law]).compact_words())
+        assert results == [
+            CompactWord.from_word(law.apply(w)) for w in words(n)
+        ]
+
+
+def test_contours(wf):
+    law = parser.compile("""
+    CHANGE BEGIN
+      {/ui/, /ai/, /iə/} -> {/uː/, /eː/, /iː/}
+      /p/ -> /b/ | [-consonantal]_[-consonantal]
+    END
+    """)[0]
+    words = list(wf.make_words(LEXICON + ["'sa.pa"]))
+    results = run_batch([law], words)
+    assert [repr(r) for r in results] == [repr(law.apply(w)) for w in words]
@@ -0,0 +1,48 @@
+"""
+Test module for change.py
+"""
+
+import pytest
+from pylaut.change.change import Change, ChangeGroup, This
+from pylaut.language.phonology import word
+from pylaut.language.phonology.phone import Phone
+from pylaut.language.phonology.word import Syllable
+
+
+@pytest.fixture
+def wf():
+    return word.WordFactory()
+
+
+def voice(td):
+    return td.phoneme.with_feature("voice", "+")
+
+
+def is_s(p):
+    return p.is_symbol("s")
+
+
+def test_builders_share_structure(wf):
+    base = Change().do(voice).to(This.forall(Phone)(is_s))
+    word_final = base.when(This.is_at_index(Phone, -1))
+    not_final = base.unless(This.is_at_index(Phone, -1))
+    assert base.conditions == ()
+    assert len(word_final.conditions) == len(not_final.conditions) == 1
+    assert word_final.changes is base.changes
+    w = wf.make_word("'sas")
+    assert repr(base.apply(w)) == "/'zaz/"
+    assert repr(word_final.apply(w)) == "/'saz/"
+    assert repr(not_final.apply(w)) == "/'zas/"
+
+
+def test_group_conditions(wf):
+    to_z = Change().do(voice).to(This.forall(Phone)(is_s))
+    to_e = Change().do(lambda td: td.phoneme.with_feature("high", "-")).to(
+        This.forall(Phone)(lambda p: p.is_symbol("i")))
+    group = ChangeGroup([to_z, to_e])
+    initial = group.when(This.is_at_index(Syllable, 0))
+    assert group.changes[0] is to_z
+    assert to_z.conditions == ()
+    w = wf.make_word("'si.si")
+    assert repr(group.apply(w)) == "/'ze.ze/"
+    assert repr(initial.apply(w)) == "/'ze.si/"
@@ -0,0 +1,84 @@
+"""
+Test module for changecache.py
+"""
+
+import pytest
+from pylaut.change.changecache import ChangeCache
+from pylaut.language.phonology import word
+from pylaut.language.phonology.compactword import CompactWord
+from pylaut.pylautlang import parser
+
+
+@pytest.fixture
+def wf():
+    return word.WordFactory()
+
+
+@pytest.fixture
+def voicing():
+    law = parser.compile("CHANGE BEGIN [+sibilant] -> [+voice] END")[0]
+    return law.changes[0]
+
+
+def test_hits_and_misses(wf, voicing):
+    cache = ChangeCache()
+    first = voicing.apply(wf.make_word("ma'sa.la"), cache)
+    again = voicing.apply(wf.make_word("ma'sa.la"), cache)
+    other = voicing.apply(wf.make_word("'sa.la"), cache)
+    assert repr(first) == "/ma.'za.la/"
+    # each lookup gets a word of its own
+    assert again == first and again is not first
+    first.syllables[0].phonemes.pop()
+    assert repr(voicing.apply(wf.make_word("ma'sa.la"), cache)) == \
+        "/ma.'za.la/"
+    assert repr(other) == "/'za.la/"
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.size) == (2, 2, 2)
+    # a change made from another has a fingerprint of its own
+    unstressed = voicing.when(lambda td: not td.syllable.is_stressed())
+    assert unstressed.fingerprint() != voicing.fingerprint()
+    assert repr(unstressed.apply(wf.make_word("ma'sa.la"), cache)) == \
+        "/ma.'sa.la/"
+    assert cache.stats().misses == 3
+
+
+def test_compact_words(wf, voicing):
+    cache = ChangeCache()
+    cw = CompactWord.from_word(wf.make_word("ma'sa.la"))
+    result = voicing.apply(cw, cache)
+    assert isinstance(result, CompactWord)
+    assert voicing.apply(CompactWord.from_word(cw.to_word()),
+                         cache) is result
+
+
+def test_input_is_unchanged(wf):
+    epenthesis = parser.compile(
+        "CHANGE BEGIN Epenthesis([+sibilant], /ə/) END")[0]
+    w = wf.make_word("ma'sa.la")
+    assert repr(epenthesis.apply(w, ChangeCache())) == "/ma.'səa.la/"
+    assert repr(w) == "/ma.'sa.la/"
+
+
+def test_sound_laws(wf):
+    law = parser.compile("CHANGE BEGIN [+sibilant] -> [+voice] END")[0]
+    cache = ChangeCache()
+    assert law.apply(wf.make_word("'sa"), cache) == \
+        law.apply(wf.make_word("'sa"), cache)
+    assert cache.stats().hits == 1
+
+
+def test_eviction_and_bypass(wf, voicing):
+    cache = ChangeCache(maxsize=2)
+    for raw in ("'sa", "'sa.sa", "'sa.sa.sa", "'sa"):
+        voicing.apply(wf.make_word(raw), cache)
+    stats = cache.stats()
+    assert (stats.misses, stats.evictions, stats.size) == (4, 2, 2)
+
+    impure = voicing.uncached()
+    assert impure.apply(wf.make_word("'sa"), cache) is not \
+        impure.apply(wf.make_word("'sa"), cache)
+    assert cache.stats().bypassed == 2
+    cache.clear()
+    assert cache.stats() == (0, 0, 0, 0, 0, 2)
+    with pytest.raises(ValueError):
+        ChangeCache(0)
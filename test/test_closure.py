@@ -0,0 +1,78 @@
+"""
+Test module for closure.py
+"""
+
+import pytest
+from pylaut.change.closure import InventoryClosure
+from pylaut.language import lexicon as lex
+from pylaut.language.phonology import word
+from pylaut.pylautlang import parser
+
+
+@pytest.fixture
+def wf():
+    return word.WordFactory()
+
+
+def law_of(rules):
+    return parser.compile("CHANGE BEGIN\n{}\nEND".format(rules))[0]
+
+
+def symbols(closure, phone_ids):
+    return [p.symbol for p in closure.phones(phone_ids)]
+
+
+def test_reachable(wf):
+    law = law_of("""
+      /θ/ -> /s/
+      /x/ -> /h/
+      [+sibilant] -> [+voice] | [-consonantal]_[-consonantal]
+      /q/ -> /k/
+    """)
+    inventory = [wf.make_phoneme(c) for c in "maslθk"]
+    closure = InventoryClosure([law], inventory)
+    assert symbols(closure, closure.stages[0].reachable) == [
+        "a", "k", "l", "m", "s"
+    ]
+    # the voicing is conditional, so /s/ may stay as it is
+    assert symbols(closure, closure.reachable) == [
+        "a", "k", "l", "m", "s", "z"
+    ]
+    assert closure.complete
+    assert [i for i, _ in closure.dead_changes()] == [1, 3]
+    assert "never fires" in closure.report().splitlines()[2]
+
+
+def test_unknown_codomain(wf):
+    law = law_of("""
+      /x/ -> /h/
+      Epenthesis([+sibilant], /ə/)
+      /q/ -> /k/
+    """)
+    closure = InventoryClosure([law], [wf.make_phoneme(c) for c in "sak"])
+    assert [s.complete for s in closure.stages] == [True, False, False]
+    # /q/ might be made by the change before, so it is not reported
+    assert [i for i, _ in closure.dead_changes()] == [0]
+
+
+def test_install_tables(wf):
+    law = law_of("""
+      [+sibilant] -> [+voice] | [-consonantal]_[-consonantal]
+      [-consonantal] -> [+long] | _#
+      /z/ -> /r/
+    """)
+    lexicon = lex.Lexicon()
+    lexicon.from_string("ma'sa.la a b\n'θa.kas c d\n")
+    words = [entry.phonetic for entry in lexicon.entries]
+    expected = [law.apply(w) for w in words]
+    closure = lexicon.inventory_closure([law])
+    assert closure.install_tables() == 2
+    changer = law.changes[0].changes
+    assert changer.tables
+    assert [law.apply(w) for w in words] == expected
+
+
+def test_no_phonology():
+    lexicon = lex.Lexicon()
+    with pytest.raises(ValueError):
+        lexicon.inventory_closure([])
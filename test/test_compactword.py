@@ -0,0 +1,68 @@
+"""
+Test module for compactword.py
+"""
+
+import pytest
+from pylaut.language.phonology import word
+from pylaut.language.phonology.compactword import (CompactWord, WordTable,
+                                                   can_store)
+from pylaut.pylautlang import parser
+
+
+@pytest.fixture
+def wf():
+    return word.WordFactory()
+
+
+def test_round_trip(wf):
+    w = wf.make_word("ma'sa.la")
+    cw = CompactWord.from_word(w)
+    assert repr(cw) == repr(w) == "/ma.'sa.la/"
+    assert list(cw.syllable_starts) == [0, 2, 4]
+    assert cw.stress == 0b10
+    nw = cw.to_word()
+    assert repr(nw) == repr(w)
+    assert len({id(ph) for ph in nw.phonemes}) == len(nw.phonemes)
+    assert CompactWord.from_word(nw) == cw
+    assert hash(CompactWord.from_word(nw)) == hash(cw)
+    assert CompactWord.from_word(wf.make_word("'ma.sa.la")) != cw
+
+
+def test_changes_take_compact_words(wf):
+    sc = parser.compile("CHANGE BEGIN [+sibilant] -> [+voice] END")[0]
+    cw = CompactWord.from_word(wf.make_word("ma'sa.la"))
+    nw = sc.apply(cw)
+    assert isinstance(nw, CompactWord)
+    assert repr(nw) == "/ma.'za.la/"
+
+
+def test_contours(wf):
+    law = parser.compile("""
+    CHANGE BEGIN
+      {/ui/, /ai/, /iə/} -> {/uː/, /eː/, /iː/}
+      /p/ -> /b/ | [-consonantal]_[-consonantal]
+    END
+    """)[0]
+    for raw in ["'sa.pa", "'pai.pa", "ma'sa.la"]:
+        w = wf.make_word(raw)
+        expected = law.apply(w)
+        result = law.apply(CompactWord.from_word(w))
+        assert repr(result) == repr(expected)
+        assert isinstance(result, CompactWord) == can_store(expected)
+    # the final /a/ is left as a contour, which cannot be stored
+    w = law.changes[0].apply(wf.make_word("'sa.pa"))
+    assert not can_store(w)
+    with pytest.raises(ValueError):
+        CompactWord.from_word(w)
+
+
+def test_word_table(wf):
+    raw = ["ma'sa.la", "'kat", "a'ma.re"]
+    table = WordTable.from_words(wf.make_words(raw))
+    assert len(table) == 3
+    assert [repr(w) for w in table] == ["/ma.'sa.la/", "/'kat/",
+                                        "/a.'ma.re/"]
+    assert repr(table[-1]) == "/a.'ma.re/"
+    assert len(table.phone_ids) == 14
+    with pytest.raises(IndexError):
+        table[3]
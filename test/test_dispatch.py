@@ -0,0 +1,57 @@
+"""
+Test module for dispatch.py
+"""
+
+import pytest
+from pylaut.change.dispatch import RuleIndex
+from pylaut.change.fst import compile_change
+from pylaut.language.phonology import word
+from pylaut.pylautlang import parser
+
+
+@pytest.fixture
+def wf():
+    return word.WordFactory()
+
+
+def test_index(wf):
+    law = parser.compile("""
+    CHANGE BEGIN
+      /s/ -> /z/ | [-consonantal]_[-consonantal]
+      Epenthesis(/k/, /ə/)
+      Resyllabify()
+      [+sibilant] -> /t/
+      Merge({/d/,/t/},/l/)
+    END
+    """)[0]
+    model = wf.feature_model
+    s, k, a = (wf.make_phoneme(c) for c in "ska")
+    index = RuleIndex(law.changes, model, inventory=[s, k, a])
+    # Resyllabify has no domain, and Merge's is a closure
+    assert index.rules(s.phone_id) == [0, 2, 3, 4]
+    assert index.rules(k.phone_id) == [1, 2, 4]
+    assert index.rules(a.phone_id) == [2, 4]
+    bits = wf.make_word("'ka").phone_set(model)
+    assert index.candidates(bits) == 0b10110
+    assert not index.may_apply(0, bits)
+    assert index.candidates(None) == 0b11111
+
+
+def test_feeding_and_bleeding(wf):
+    law = parser.compile("""
+    CHANGE BEGIN
+      /θ/ -> /s/
+      /s/ -> /z/ | [-consonantal]_[-consonantal]
+      /z/ -> /r/
+      /s/ -> /h/
+    END
+    """)[0]
+    cc = compile_change(law)
+    # /θ/ feeds the rules on /s/, which feeds the one on /z/; the second
+    # /θ/ comes out as /s/ and is then bled from /s/ to /h/
+    assert repr(cc.apply(wf.make_word("a'θaθ"))) == "/a.'rah/"
+    assert [s.applied for s in cc.skip_stats()] == [1, 1, 1, 1]
+    assert repr(cc.apply(wf.make_word("'ka"))) == "/'ka/"
+    assert [s.skipped for s in cc.skip_stats()] == [1, 1, 1, 1]
+    words = list(wf.make_words(["a'θaθ", "'sa.za", "'θa.sa", "'kas"]))
+    assert cc.differential(words) == []
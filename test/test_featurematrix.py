@@ -0,0 +1,65 @@
+"""
+Test module for featurematrix.py
+"""
+
+import pytest
+
+from pylaut.language.phonology import featureset
+from pylaut.language.phonology.featurematrix import FeatureMatrix
+
+
+@pytest.fixture
+def matrix():
+    return featureset.get_feature_model('monophone').feature_matrix()
+
+
+def test_select(matrix):
+    model = matrix.feature_model
+    feature_dict = {'consonantal': '+', 'voice': '-', 'continuant': '+'}
+    columns = {f: model.features.index(f) for f in feature_dict}
+    expected = [
+        symbol for symbol in matrix.labels
+        if all(model.get_features_from_ipa(symbol)[columns[f]] == v
+               for f, v in feature_dict.items())
+    ]
+    assert matrix.select(feature_dict) == expected
+    assert matrix.count(feature_dict) == len(expected)
+    assert 's' in expected and 'z' not in expected
+
+
+def test_select_bad_feature(matrix):
+    with pytest.raises(Exception):
+        matrix.select({'rounded': '+'})
+
+
+def test_values(matrix):
+    model = matrix.feature_model
+    row = matrix.row('a')
+    assert [{1: '+', -1: '-', 0: '0'}[v]
+            for v in row] == model.get_features_from_ipa('a')
+    assert matrix.column('voice')[matrix.labels.index('z')] == 1
+
+
+def test_minimal_specification():
+    model = featureset.get_feature_model('monophone')
+    sub = model.feature_matrix().subset(['p', 't', 'k', 'b', 'd', 'm'])
+    spec = sub.minimal_specification(['p', 't', 'k'])
+    assert spec == {'voice': '-'}
+    assert sub.select(spec) == ['p', 't', 'k']
+    assert sub.minimal_specification(['p', 'd']) is None
+
+
+def test_distance_matrix(matrix):
+    sub = matrix.subset(matrix.labels[:40])
+    distances = sub.distance_matrix()
+    for i, a in enumerate(sub.labels):
+        for j, b in enumerate(sub.labels):
+            expected = sum(x != y for x, y in zip(sub.row(a), sub.row(b)))
+            assert distances[i][j] == expected
+
+
+def test_from_phones():
+    from pylaut.language.phonology.phonology import Phoneme
+    phones = [Phoneme(s) for s in ('a', 'i', 'p')]
+    m = FeatureMatrix.from_phones(phones)
+    assert m.select({'syllabic': '+'}) == phones[:2]
@@ -1,4 +1,9 @@
-from pylaut.language.phonology import featureset
+import copy
+import os
+
+import pytest
+
+from pylaut.language.phonology import compiledfeatureset, featureset
 
 
 def test_load_from_package():
@@ -35,6 +40,19 @@ def test_features_from_ipa_string():
     ]
 
 
+def test_tokeniser_segments():
+    f = featureset.get_feature_model('monophone')
+    tok = f.tokeniser()
+    assert tok is f.tokeniser()
+    assert tok.segments("tʰʷa") == ["tʰʷ", "a"]
+    assert tok.syllables("ka'tʰʷa.na") == [("k", "a"), ("'", "tʰʷ", "a"),
+                                          ("n", "a")]
+    with pytest.warns(featureset.FeatureSetWarning):
+        p = featureset.FeatureModel('phoible-segf')
+    assert p.tokeniser().segments("t̠ʃʰat͡sa") == ["t̠ʃʰ", "a", "t͡s", "a"]
+    assert p.get_features_from_ipa("t̠ʃʰ") == p._ipa_dict["t̠ʃʰ"]
+
+
 def test_ipa_from_features():
 
     f = featureset.FeatureModel('monophone')
@@ -51,3 +69,139 @@ def test_ipa_from_features():
 
     assert esh == 'ʂ'
     assert esh_ph == 'ʂˤ'
+
+
+def test_registry_shares_models():
+    featureset.evict_feature_model()
+    f1 = featureset.get_feature_model('monophone')
+    f2 = featureset.get_feature_model('monophone')
+    assert f1 is f2
+    assert ('monophone', None) in featureset.registry
+
+
+def test_registry_evict():
+    f1 = featureset.get_feature_model('monophone')
+    featureset.evict_feature_model('monophone')
+    assert 'monophone' not in featureset.registry
+    f2 = featureset.get_feature_model('monophone')
+    assert f1 is not f2
+
+
+def test_registry_preload():
+    featureset.evict_feature_model()
+    models = featureset.preload_feature_models(['monophone'])
+    assert models[0] is featureset.get_feature_model('monophone')
+
+
+def test_registry_reloads_changed_files(tmp_path):
+    for fname in ['monophone', 'monophone_ipa', 'monophone_ipa_diacritics']:
+        with open(f'pylaut/data/{fname}', encoding='utf-8') as inf:
+            (tmp_path / fname).write_text(inf.read(), encoding='utf-8')
+    registry = featureset.FeatureModelRegistry(check_interval=0)
+    f1 = registry.get('monophone', str(tmp_path))
+    assert registry.get('monophone', str(tmp_path)) is f1
+
+    dcs = tmp_path / 'monophone_ipa_diacritics'
+    dcs.write_text(dcs.read_text(encoding='utf-8') + '˭ -aspirated\n',
+                   encoding='utf-8')
+    stat = dcs.stat()
+    os.utime(dcs, (stat.st_atime, stat.st_mtime + 10))
+
+    f2 = registry.get('monophone', str(tmp_path))
+    assert f2 is not f1
+    assert '˭' in f2._ipa_diacritics
+
+
+def test_deepcopy_shares_model():
+    f = featureset.get_feature_model('monophone')
+    assert copy.deepcopy(f) is f
+
+
+def test_packed_hamming():
+    f = featureset.get_feature_model('monophone')
+    s = f.get_features_from_ipa('s')
+    z = f.get_features_from_ipa('z')
+    assert f.feature_hamming(s, z) == (['-voice'], 1)
+    assert f.feature_hamming(s, s) == ([], 0)
+
+
+def test_ipa_index_exact_lookup():
+    f = featureset.get_feature_model('monophone')
+    for symbol, feature_list in f._ipa_dict.items():
+        assert f.is_good_ipa(feature_list) == symbol
+    assert f.duplicate_symbols == []
+
+
+def test_duplicate_symbols_reported_at_load(tmp_path):
+    (tmp_path / 'tiny').write_text('tiny\ntiny_ipa\n0\n\n[voice]\n[nasal]\n',
+                                   encoding='utf-8')
+    (tmp_path / 'tiny_ipa').write_text(
+        '[voice] [nasal]\nb + -\nm + +\nβ + -\nx -\n', encoding='utf-8')
+    with pytest.warns(featureset.FeatureSetWarning):
+        f = featureset.FeatureModel('tiny', str(tmp_path))
+    assert f.duplicate_symbols == [('b', 'β')]
+    assert f.is_good_ipa(['+', '-']) == 'b'
+    assert f.is_good_ipa(['-', '-']) is None
+
+
+def test_ipa_search_matches_exhaustive():
+    f = featureset.FeatureModel('monophone')
+    flip = {'+': '-', '-': '+', '0': '+'}
+    for symbol in list(f._ipa_dict)[::7]:
+        base = f.get_features_from_ipa(symbol)
+        for i in range(0, len(base), 3):
+            feature_list = list(base)
+            feature_list[i] = flip[feature_list[i]]
+            try:
+                expected = f._get_ipa_from_features_exhaustive(feature_list)
+            except Exception:
+                expected = None
+            try:
+                found = f.get_ipa_from_features(feature_list)
+            except Exception:
+                found = None
+            assert found == expected
+            spec, pos = f.encode_features(feature_list)
+            if found is not None:
+                assert f.get_ipa_from_vector(spec, pos) == found
+
+
+@pytest.fixture
+def feature_set_dir(tmp_path):
+    for fname in ('monophone', 'monophone_ipa', 'monophone_ipa_diacritics'):
+        (tmp_path / fname).write_bytes(
+            (featureset._PACKAGE_DATA_PATH / fname).read_bytes())
+    return tmp_path
+
+
+def test_compiled_feature_set(feature_set_dir):
+    text = featureset.FeatureModel('monophone', str(feature_set_dir))
+    path = compiledfeatureset.compile_feature_set('monophone',
+                                                  str(feature_set_dir))
+    assert path == text.compiled_file()
+    compiled = featureset.FeatureModel('monophone', str(feature_set_dir))
+    assert compiled._compiled is not None
+    assert compiled.features == text.features
+    assert list(compiled._ipa_dict.items()) == list(text._ipa_dict.items())
+    assert compiled._ipa_diacritics == text._ipa_diacritics
+    assert compiled._ipa_dict['ʃ'] == text._ipa_dict['ʃ']
+    assert 'ʃʃ' not in compiled._ipa_dict
+    assert compiled.get_ipa_from_features(
+        text.get_features_from_ipa('ʂˤ')) == 'ʂˤ'
+
+
+def test_compiled_feature_set_stale(feature_set_dir):
+    compiledfeatureset.compile_feature_set('monophone', str(feature_set_dir))
+    with (feature_set_dir / 'monophone_ipa').open('a') as ipaf:
+        ipaf.write('X - - - - - - - - - - - - - - - - - - - - - - - - - -\n')
+    f = featureset.FeatureModel('monophone', str(feature_set_dir))
+    assert f._compiled is None
+    assert 'X' in f._ipa_dict
+
+
+def test_compiled_feature_set_corrupt(feature_set_dir):
+    f = featureset.FeatureModel('monophone', str(feature_set_dir))
+    f.compiled_file().write_bytes(b'not a feature set')
+    with pytest.warns(featureset.FeatureSetWarning):
+        f = featureset.FeatureModel('monophone', str(feature_set_dir))
+    assert f._compiled is None
@@ -0,0 +1,73 @@
+"""
+Test module for fst.py
+"""
+
+import pytest
+from pylaut.change.fst import compile_change
+from pylaut.language.phonology import word
+from pylaut.language.phonology.compactword import CompactWord
+from pylaut.pylautlang import parser
+
+LEXICON = ["ma'sa.la", "'kat", "a'ma.re", "'sa.na.ke", "pe'ti.kas", "'lo.ra",
+           "a.ta'pas", "'ne.ka", "ka'ren.tas", "'e.pa.la"]
+
+
+@pytest.fixture
+def wf():
+    return word.WordFactory()
+
+
+def test_differential(wf):
+    law = parser.compile("""
+    CHANGE BEGIN
+      /a/ -> /e/ | #_
+      /e/ -> /0/ | _#
+      [+sibilant] -> /ts/ | [-consonantal]_ | _#
+      /n/ -> /m/ | ! _[-consonantal]
+      [-consonantal] -> [+long] | #[+consonantal]_ & !_[+consonantal]
+      /k/ => /x/ | [-consonantal]_[-consonantal]
+          => /k/
+      {/p/, /t/} -> {/f/, /θ/} | _/a/
+      Metathesis([+sibilant -voice],[-consonantal])
+      [+consonantal] -> [+voice] | [+voice]_
+    END
+    """)[0]
+    cc = compile_change(law)
+    assert cc.compiled(wf.feature_model) == [True] * 9 + [False, True]
+    words = list(wf.make_words(LEXICON))
+    assert cc.differential(words) == []
+    for w in words:
+        cw = CompactWord.from_word(w)
+        assert cc.apply(cw) == CompactWord.from_word(law.apply(w))
+
+
+def test_single_pass(wf):
+    sc = parser.compile(
+        "CHANGE BEGIN [+sibilant] -> [+voice] | [-consonantal]_[-consonantal]"
+        " END")[0]
+    cc = compile_change(sc)
+    fst = cc.fst(0, wf.feature_model)
+    assert (fst.left, fst.right) == (1, 1)
+    w = wf.make_word("ma'sa.sas")
+    assert repr(cc.apply(w)) == "/ma.'za.zas/"
+    assert fst.positions([ph.intern().phone_id for ph in w.phonemes]) == [2, 4]
+
+
+def test_skipping(wf):
+    law = parser.compile("""
+    CHANGE BEGIN
+      /θ/ -> /s/
+      Epenthesis([+round], /ə/)
+      [+sibilant] -> [+voice] | [-consonantal]_[-consonantal]
+    END
+    """)[0]
+    cc = compile_change(law)
+    w = wf.make_word("'ka.la")
+    assert cc.apply(w) is w
+    cw = CompactWord.from_word(w)
+    assert cc.apply(cw) is cw
+    assert repr(cc.apply(wf.make_word("a'θo.ka"))) == "/a.'zoə.ka/"
+    assert [s[1:] for s in cc.skip_stats()] == [(1, 2), (1, 2), (1, 2)]
+    assert cc.skip_report().splitlines()[0].endswith(
+        "skipped 2 of 3 words (66.7%)")
+    assert cc.differential(wf.make_words(LEXICON)) == []
@@ -0,0 +1,70 @@
+"""
+Test module for fusion.py
+"""
+
+import pytest
+from pylaut.change.batch import run_batch
+from pylaut.change.fusion import FusedChange, fuse_sound_law
+from pylaut.language.phonology import word
+from pylaut.language.phonology.compactword import CompactWord
+from pylaut.pylautlang import parser
+
+LEXICON = ["ma'ʃa.la", "'kaz", "a'θa.re", "'sa.na.ze", "pe'ti.kaʃ", "'lo.ra",
+           "a.ta'pas", "'θe.ka", "ka'ren.tas", "'e.pa.la"]
+
+
+@pytest.fixture
+def wf():
+    return word.WordFactory()
+
+
+@pytest.fixture
+def law():
+    return parser.compile("""
+    CHANGE BEGIN
+      /ʃ/ -> /sn/
+      /z/ -> /s/
+      /θ/ -> /z/
+      [+sibilant] -> [+voice] | [-consonantal]_[-consonantal]
+      /e/ -> /0/
+      [-consonantal] -> [+long]
+      {/p/, /t/} -> {/f/, /p/}
+      /a/ -> /e/ | #_
+    END
+    """)[0]
+
+
+def test_fuse(wf, law, capsys):
+    fused = fuse_sound_law(law, debug=True)
+    kinds = [type(ch) for ch in fused.changes]
+    assert kinds == [FusedChange, type(law.changes[3]), FusedChange,
+                     type(law.changes[7])]
+    assert len(fused.changes[2].changes) == 4
+    out = capsys.readouterr().out.splitlines()
+    assert out[0].endswith("fused changes 0 to 2: /ʃ/ -> /sn/; "
+                           "/z/ -> /s/; /θ/ -> /z/")
+    assert out[1].endswith("fused changes 4 to 7: /e/ -> /0/; "
+                           "[-consonantal] -> [+long]; /p/ -> /f/; "
+                           "/t/ -> /p/")
+
+    for w in wf.make_words(LEXICON):
+        expected = law.apply(w)
+        got = fused.apply(w)
+        assert got == expected and repr(got) == repr(expected)
+        assert fused.apply(CompactWord.from_word(w)) == \
+            CompactWord.from_word(expected)
+
+
+def test_order(wf):
+    # /θ/ becomes /z/ after /z/ has become /s/, so it stays /z/
+    law = parser.compile("CHANGE BEGIN /z/ -> /s/ /θ/ -> /z/ END")[0]
+    fused = FusedChange(law.changes)
+    assert repr(fused.apply(wf.make_word("'θaz"))) == "/'zas/"
+    cw = CompactWord.from_word(wf.make_word("'pa"))
+    assert fused.apply(cw) is cw
+
+
+def test_batch(wf, law):
+    words = list(wf.make_words(LEXICON))
+    fused = fuse_sound_law(law)
+    assert run_batch([fused], words) == run_batch([law], words)
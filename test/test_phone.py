@@ -77,3 +77,105 @@ def test_set_features_true(phone):
 
 def test_set_symbol_from_features(phone):
     phone.set_symbol_from_features()
+
+
+def test_features_view(phone):
+    assert phone.features['consonantal'] == '-'
+    phone.features['voice'] = '-'
+    assert phone.feature_is_false('voice')
+    assert list(phone.features) == phone.feature_model.features
+
+
+def test_feature_vector_round_trip(phone):
+    fm = phone.feature_model
+    assert fm.decode_features(*phone.feature_vector) == fm.get_features_from_ipa('e')
+    assert fm.encode_features(phone.get_feature_list()) == phone.feature_vector
+
+
+def test_matches_features(phone):
+    assert phone.matches_features({'consonantal': '-', 'front': '+'})
+    assert not phone.matches_features({'consonantal': '-', 'back': '+'})
+    assert phone.matches_features({})
+
+
+def test_has_same_features(phone):
+    other = phone.copy()
+    assert phone.has_same_features(other)
+    other.set_features_true('long')
+    assert not phone.has_same_features(other)
+    assert phone.feature_distance(other) == 1
+
+
+def test_json_round_trip(phone):
+    new = ph.Phone(phone.feature_model)
+    new.from_json(phone.to_json())
+    assert new.symbol == 'e'
+    assert new.feature_model is featureset.get_feature_model('monophone')
+    assert new.feature_vector == phone.feature_vector
+
+
+def test_intern_shares_phones(phone):
+    interned = phone.intern()
+    assert interned is ph.Phone(phone.feature_model, 'e').intern()
+    assert interned.is_interned() and not phone.is_interned()
+    assert interned.feature_model.interned_phone(interned.phone_id) is interned
+
+
+def test_interned_phones_are_immutable(phone):
+    interned = phone.intern()
+    with pytest.raises(TypeError):
+        interned.set_features_true('long')
+    mutable = interned.copy()
+    mutable.set_features_true('long')
+    assert not interned.feature_is_true('long')
+
+
+def test_with_feature(phone):
+    long_e = phone.with_feature('long', '+')
+    assert long_e.symbol == 'eː'
+    assert long_e is phone.intern().with_feature('long', '+')
+    assert long_e.with_feature('long', '-') is phone.intern()
+    assert phone.symbol == 'e'
+
+
+def test_intern_sets_symbol():
+    from pylaut.language.phonology.phonology import Phoneme
+    from pylaut.language.phonology.word import Syllable
+    # a phone whose symbol was not updated after its features were set
+    stale = Phoneme('ʈ')
+    stale.set_features_true('voice')
+    hash(Syllable([stale]))
+    assert stale.intern().symbol == 'ɖ'
+    assert Phoneme('ʈ').with_feature('voice', '+').symbol == 'ɖ'
+    # features without a symbol keep the phone's own
+    odd = Phoneme('a')
+    odd.set_features_true(['consonantal', 'nasal', 'lateral', 'syllabic'])
+    with pytest.raises(featureset.NoSymbolError):
+        odd.copy().set_symbol_from_features()
+    assert odd.intern().symbol == 'a'
+
+
+def test_monophone_properties():
+    vowel = ph.MonoPhone('i')
+    assert vowel.is_vowel() and vowel.is_high_vowel()
+    assert vowel.get_sonority() == 11
+    assert ph.MonoPhone('a').get_sonority() == 10
+    table = vowel.feature_model.property_table(ph.MonoPhone._classify)
+    assert (vowel._specified, vowel._positive) in table
+    vowel.set_features_true('consonantal')
+    assert not vowel.is_vowel() and vowel.is_consonant()
+    assert ph.MonoPhone('l').get_sonority() == 8
+    assert ph.MonoPhone('z').get_sonority() == 3
+    assert ph.MonoPhone('t').get_sonority() == 0
+
+
+def test_phones_are_slotted():
+    from pylaut.language.phonology.phonology import Phoneme
+    phoneme = Phoneme('a')
+    assert not hasattr(phoneme, '__dict__')
+    assert phoneme.JSON_OBJECT_NAME == 'Phoneme'
+    phoneme.subsystem['long'] = '-'
+    new = Phoneme()
+    new.from_json(phoneme.to_json())
+    assert new.subsystem == {'long': '-'}
+    assert new.has_same_features(phoneme) and new.symbol == 'a'
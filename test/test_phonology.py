@@ -106,6 +106,28 @@ def test_get_phonemes_with_features(sample_phonology, long_vowels):
     assert lv == long_vowels
 
 
+def test_feature_matrix_follows_changes(sample_phonology, phoneme):
+    vowels = sample_phonology.get_phonemes_with_features({'syllabic': '+'})
+    sample_phonology.add_phoneme(phoneme)
+    assert sample_phonology.get_phonemes_with_features(
+        {'syllabic': '+'}) == vowels | {phoneme}
+    phoneme.set_feature('syllabic', '-')
+    # a phoneme edited in place is only seen once the set is touched
+    assert phoneme in sample_phonology.get_phonemes_with_features(
+        {'syllabic': '+'})
+    sample_phonology.phonemes.touch()
+    assert phoneme not in sample_phonology.get_phonemes_with_features(
+        {'syllabic': '+'})
+    matrix = sample_phonology.get_feature_matrix()
+    assert sample_phonology.get_feature_matrix() is matrix
+    sample_phonology.phonemes.remove(phoneme)
+    assert phoneme not in sample_phonology.get_feature_matrix()
+    sample_phonology.phonemes = set(list(vowels)[:1])
+    assert isinstance(sample_phonology.phonemes, phonology.PhonemeSet)
+    assert sample_phonology.get_phonemes_with_features(
+        {'syllabic': '+'}) == set(list(vowels)[:1])
+
+
 def test_get_phoneme_dictionary_keys(sample_phonology, vowels, consonants):
     pdict = sample_phonology.get_phoneme_dictionary()
     assert set(pdict.keys()) == vowels | consonants
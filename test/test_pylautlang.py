@@ -14,6 +14,14 @@ def test_simple_unconditional(wf):
     assert repr(nw) == "/'et.ne/"
 
 
+def test_unstressed_monosyllable(wf):
+    sc = parser.compile("CHANGE BEGIN /tʰʷ/ -> /p/ END")[0]
+    w = wf.make_word("tʰʷat")
+    assert len(w.syllables) == 1
+    nw = sc.apply(w)
+    assert repr(nw) == "/pat/"
+
+
 def test_multiple_unconditional(wf):
     sc = parser.compile("CHANGE BEGIN {/b/,/d/,/ɡ/} -> {/β/,/ð/,/ɣ/} END")[0]
     w = wf.make_word("ba'ɡo.dam")
@@ -28,6 +36,24 @@ def test_change_feature(wf):
     assert repr(nw) == "/ma.'za.la/"
 
 
+def test_change_several_features(wf):
+    sc = parser.compile("CHANGE BEGIN [+sibilant -voice] -> "
+                        "[+voice +long] END")[0]
+    w = wf.make_word("ma'sa.za")
+    nw = sc.apply(w)
+    assert repr(nw) == "/ma.'zːa.za/"
+
+
+def test_feature_expressions_are_compiled():
+    pll = parser.PyLautLang()
+    pred = pll.isexpr([lambda td: td, {'sibilant': '+', 'voice': '-'}])
+    assert pred(word.Phoneme('s'))
+    assert not pred(word.Phoneme('z'))
+    nc = parser.make_predicate({'sibilant': '+'}, pll.feature_model)
+    assert isinstance(nc, parser.NaturalClass)
+    assert repr(nc) == '[+sibilant]'
+
+
 def test_replace_by_feature(wf):
     sc = parser.compile("CHANGE BEGIN [+sibilant] -> /h/ END")[0]
     w = wf.make_word("ma'sa.la")
@@ -126,3 +152,16 @@ def test_compound_expression_with_word_break_in_relexp(wf):
     new_words = [repr(sc.apply(w)) for w in words]
     assert new_words == ["/ok.to/", "/a.po.lo/", "/te.o.lo/",
                          "/kwen.dre.lo/"]
+
+
+def test_positions_of_repeated_phonemes(wf):
+    # Epenthesis inserts the same phoneme object after each sibilant
+    ep = parser.compile("CHANGE BEGIN Epenthesis([+sibilant], /ə/) END")[0]
+    w = ep.apply(wf.make_word("'sa.so"))
+    assert repr(w) == "/'səa.səo/"
+    assert w.phonemes[1] is w.phonemes[4]
+    sc = parser.compile("CHANGE BEGIN /ə/ -> /e/ | _/o/ END")[0]
+    assert repr(sc.apply(w)) == "/'səa.seo/"
+    mt = parser.compile(
+        "CHANGE BEGIN Metathesis([+sibilant], [+syllabic]) END")[0]
+    assert repr(mt.apply(wf.make_word("'sa.ka"))) == "/'as.ka/"
@@ -0,0 +1,150 @@
+"""
+Test module for word.py
+"""
+
+import pytest
+from pylaut import tokenise_ipa
+from pylaut.change import change_functions
+from pylaut.change.fst import compile_change
+from pylaut.language.phonology import phonology, word
+from pylaut.pylautlang import parser
+
+
+@pytest.fixture
+def wf():
+    return word.WordFactory()
+
+
+def test_make_words(wf):
+    raw = ["'ka.sa", "sa'ka", "'kas"]
+    words = wf.make_words(iter(raw))
+    assert not isinstance(words, list)
+    words = list(words)
+    assert [repr(w) for w in words] == ["/'ka.sa/", "/sa.'ka/", "/'kas/"]
+    # one lookup per distinct segment, but no Phoneme is shared
+    assert set(wf._segment_memo) == {"k", "a", "s"}
+    phonemes = [ph for w in words for ph in w.phonemes]
+    assert len({id(ph) for ph in phonemes}) == len(phonemes)
+
+
+def test_fromlist(wf):
+    assert repr(wf.fromlist("aktjone")) == "/ak.tjo.ne/"
+    assert repr(wf.fromlist(["a", "s", "t", "r", "a"])) == "/as.tra/"
+    assert repr(wf.fromlist("kantl̩")) == "/kan.tl̩/"
+
+
+def test_syllabify():
+    assert tokenise_ipa.syllabify(list("amare")) == [
+        "a", ".", "m", "a", ".", "r", "e"
+    ]
+
+
+def test_syllable_structure_from_phonology():
+    p = phonology.Phonology(list("astrkjone"))
+    p.maximise_onsets = False
+    assert repr(word.WordFactory(p).fromlist("astra")) == "/ast.ra/"
+    p.maximise_onsets = True
+    p.permitted_codas = {"n", "s"}
+    assert repr(word.WordFactory(p).fromlist("aktjone")) == "/a.ktjo.ne/"
+
+
+def test_resyllabify_keeps_stress(wf):
+    w = wf.make_word("mas'a.za")
+    nw = change_functions.Resyllabify().apply(w)
+    assert repr(nw) == "/ma.'sa.za/"
+    assert nw.phonemes == w.phonemes
+
+
+def test_resyllabify_lexicon():
+    from pylaut.language.lexicon import Lexicon, LexiconEntry
+    lexicon = Lexicon()
+    lexicon.from_string("mas'a.za masaza a\n'kat kat b\n")
+    new = lexicon.resyllabify()
+    assert [repr(e) for e in new.entries] == ["/ma.'sa.za/", "/'kat/"]
+    lexicon.add_entry(LexiconEntry("'ta", "ta", "c"))
+    with pytest.raises(ValueError):
+        lexicon.resyllabify()
+
+
+def test_find_nuclei(wf):
+    syllable = wf.make_word("'stral").syllables[0]
+    assert [ph.symbol for ph in syllable.find_nuclei()] == ["a"]
+    syllable = wf.make_word("'tl̩").syllables[0]
+    assert [ph.symbol for ph in syllable.find_nuclei()] == ["l̩"]
+    assert word.Syllable([]).find_nuclei() == []
+
+
+def test_structure_follows_changes(wf):
+    syllable = wf.make_word("'kans.ta").syllables[0]
+    assert syllable.get_pattern() == "CVCC"
+    assert syllable.get_structure() is syllable.get_structure()
+    syllable.phonemes.insert(1, wf.make_phoneme("r"))
+    assert syllable.structure is None
+    assert syllable.get_pattern() == "CCVCC"
+    syllable.phonemes = syllable.phonemes[2:]
+    assert syllable.get_onset() == []
+    assert syllable.get_pattern() == "VCC"
+
+
+def test_structural_equality(wf):
+    w = wf.make_word("'ba.ba")
+    first, second = w.syllables
+    assert first != second
+    second.set_stressed()
+    # the word position does not matter
+    assert first == second
+    assert hash(first) == hash(second)
+
+    assert wf.make_word("ma'sa.la") == wf.make_word("ma'sa.la")
+    assert wf.make_word("ma'sa.la") != wf.make_word("'ma.sa.la")
+    assert len({wf.make_word("'kat"), wf.make_word("'kat")}) == 1
+
+    key = first.structural_key()
+    first.phonemes[0] = wf.make_phoneme("p")
+    assert first.structural_key() != key
+
+
+def test_structural_equality_follows_features(wf):
+    model = wf.feature_model
+    w, other = wf.make_word("'ʈat"), wf.make_word("'ʈat")
+    for each in (w, other):
+        # a vowel that is not interned yet
+        each.phonemes[1].set_features_true(["nasal", "long", "round"])
+    n_interned = len(model.interned_phones())
+    assert w == other and hash(w) == hash(other)
+    # comparing words does not intern their phones
+    assert len(model.interned_phones()) == n_interned
+    w.phonemes[0].set_feature("voice", "+")
+    assert w != other
+    assert hash(w) != hash(other)
+
+
+def test_phone_set(wf):
+    w = wf.make_word("'ka.sa")
+    model = wf.feature_model
+    ids = {ph.phone_id for ph in w.phonemes}
+    assert w.phone_set(model) == sum(1 << i for i in ids)
+    # only the sets of syllables of interned phones are cached
+    assert w.syllables[1].phone_set() is not w.syllables[1].phone_set()
+    w = word.Word([word.Syllable([ph.intern() for ph in syl])
+                   for syl in w.syllables])
+    first, second = w.syllables
+    cached = second.phone_set()
+    assert second.phone_set() is cached
+    # a change keeps the sets of the syllables it leaves alone
+    voicing = parser.compile("CHANGE BEGIN /k/ -> /g/ END")[0]
+    new = voicing.apply(w)
+    assert new.syllables[1].phone_set() is cached
+    assert new.phone_set(model) != w.phone_set(model)
+    second.phonemes.append(wf.make_phoneme("n").intern())
+    assert second.phone_set() != cached
+    assert w.phone_set(None) is None
+
+
+def test_phone_set_follows_features(wf):
+    law = parser.compile(
+        "CHANGE BEGIN [+voice +consonantal] -> [+long] END")[0]
+    w = wf.make_word("'pat")
+    w.phone_set(wf.feature_model)
+    w.phonemes[0].set_feature("voice", "+")
+    assert repr(compile_change(law).apply(w)) == repr(law.apply(w))